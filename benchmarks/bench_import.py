@@ -0,0 +1,29 @@
+# bench_import.py
+import subprocess
+import sys
+
+# modules which must not be loaded by `import in2xl`, numpy and pandas are imported on first use
+HEAVY = ('pandas', 'numpy', 'openpyxl', 'xlsxwriter')
+
+
+def timeraw_import_in2xl():
+    """
+    Time to import the package in a fresh interpreter.
+
+    """
+
+    return "import in2xl"
+
+
+def track_heavy_imports():
+    """
+    Number of heavy modules loaded by `import in2xl`, expected to be 0.
+
+    """
+
+    code = f"import sys, in2xl; print(len(set({HEAVY!r}) & set(sys.modules)))"
+
+    return int(subprocess.check_output([sys.executable, '-c', code]))
+
+
+track_heavy_imports.unit = 'modules'
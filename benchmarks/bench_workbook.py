@@ -0,0 +1,387 @@
+# bench_workbook.py
+import io
+import os
+import zipfile
+import numpy as np
+import pandas as pd
+import in2xl
+from .templates import TEMPLATES, make_templates
+
+# the templates are generated once per benchmark run into the working directory of asv
+DIRECTORY = 'templates'
+
+
+def setup_cache():
+    return make_templates(os.path.abspath(DIRECTORY))
+
+
+def frame(rows=2000, columns=8) -> pd.DataFrame:
+
+    """
+    Returns a DataFrame of floats, strings and dates, every seventh value is missing.
+
+    """
+
+    data = np.arange(rows * columns, dtype=float).reshape(rows, columns)
+    data[::7, 1::2] = np.nan
+
+    df = pd.DataFrame(data, columns=[f'col{i}' for i in range(columns)])
+    df['text'] = [f'text {i % 500}' if i % 7 else None for i in range(rows)]
+    df['date'] = pd.date_range('2020-01-01', periods=rows, freq='h')
+
+    return df
+
+
+class Load:
+
+    """
+    Opening a template: copy of the archive, parsing of the workbook.xml and the chart index.
+
+    """
+
+    params = list(TEMPLATES)
+    param_names = ['template']
+
+    def time_load_workbook(self, paths, template):
+        in2xl.load_workbook(paths[template]).close()
+
+    def time_load_workbook_cached(self, paths, template):
+        in2xl.load_workbook(paths[template], cache=True).close()
+
+    def time_chart_dict(self, paths, template):
+        wb = in2xl.load_workbook(paths[template])
+        wb.chart_dict
+        wb.close()
+
+    def peakmem_load_workbook(self, paths, template):
+        in2xl.load_workbook(paths[template]).close()
+
+
+class Insert:
+
+    """
+    The insert paths of `insert()`: scalars, DataFrames in both orientations (with missing values),
+    shared and inline strings, in memory and streamed.
+
+    """
+
+    params = (list(TEMPLATES), [False, True])
+    param_names = ['template', 'stream']
+
+    # every sample needs an unchanged workbook
+    number = 1
+    repeat = (3, 10, 30.0)
+
+    def setup(self, paths, template, stream):
+        self.df = frame()
+        self.wb = in2xl.load_workbook(paths[template], stream=stream)
+        self.ws = self.wb['Data']
+
+    def teardown(self, paths, template, stream):
+        self.wb.close()
+
+    def time_insert_scalar(self, paths, template, stream):
+        self.ws.insert('scalar', 3, 2)
+
+    def time_insert_scalars_session(self, paths, template, stream):
+        with self.wb.edit() as session:
+            ws = session['Data']
+            for i in range(1, 101):
+                ws.insert(i * 0.5, i, 12)
+
+    def time_insert_frame(self, paths, template, stream):
+        self.ws.insert(self.df, 2, 2)
+
+    def time_insert_frame_transposed(self, paths, template, stream):
+        self.ws.insert(self.df.head(200), 2, 2, axis=1, index=True)
+
+    def time_insert_frame_inline(self, paths, template, stream):
+        self.ws.insert(self.df, 2, 2, strings='inline')
+
+    def peakmem_insert_frame(self, paths, template, stream):
+        self.ws.insert(self.df, 2, 2)
+
+    def time_insert_many(self, paths, template, stream):
+        plan = [('Other', (1, 1 + i), f'title {i}') for i in range(10)]
+        plan += [('Data', (1 + 20 * i, 12), self.df.head(15)) for i in range(20)]
+        self.wb.insert_many(plan)
+
+
+class State:
+
+    """
+    Changing the visibility of a worksheet.
+
+    """
+
+    params = list(TEMPLATES)
+    param_names = ['template']
+
+    number = 1
+
+    def setup(self, paths, template):
+        self.wb = in2xl.load_workbook(paths[template])
+        self.ws = self.wb['Other']
+
+    def teardown(self, paths, template):
+        self.wb.close()
+
+    def time_state(self, paths, template):
+        self.ws.state = 1
+        self.ws.state = 0
+
+
+class Save:
+
+    """
+    Saving a workbook, unchanged (copy of the archive) and after inserting a DataFrame.
+
+    """
+
+    params = (list(TEMPLATES), [False, True])
+    param_names = ['template', 'stream']
+
+    number = 1
+
+    def setup(self, paths, template, stream):
+        self.wb = in2xl.load_workbook(paths[template], stream=stream)
+        self.output = os.path.abspath(f'out_{template}.xlsx')
+
+    def teardown(self, paths, template, stream):
+        self.wb.close()
+        if os.path.exists(self.output):
+            os.remove(self.output)
+
+    def time_save_unchanged(self, paths, template, stream):
+        self.wb.save(self.output)
+
+    def time_insert_save(self, paths, template, stream):
+        with self.wb.edit() as session:
+            session['Data'].insert(frame(), 2, 2)
+            session.save(self.output)
+
+    def peakmem_insert_save(self, paths, template, stream):
+        with self.wb.edit() as session:
+            session['Data'].insert(frame(), 2, 2)
+            session.save(self.output)
+
+
+class Read:
+
+    """
+    Reading a worksheet back into a DataFrame, the whole used range and a small lookup range.
+
+    """
+
+    params = list(TEMPLATES)
+    param_names = ['template']
+
+    def setup(self, paths, template):
+        self.wb = in2xl.load_workbook(paths[template])
+        self.ws = self.wb['Data']
+
+    def teardown(self, paths, template):
+        self.wb.close()
+
+    def time_read(self, paths, template):
+        self.ws.read()
+
+    def time_read_range(self, paths, template):
+        self.ws.read('A1:C40')
+
+    def peakmem_read(self, paths, template):
+        self.ws.read()
+
+
+class Openpyxl:
+
+    """
+    The same load-modify-save cycle and reading a worksheet with openpyxl, as a baseline for the numbers of in2xl.
+
+    """
+
+    params = list(TEMPLATES)
+    param_names = ['template']
+
+    number = 1
+
+    def setup(self, paths, template):
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            raise NotImplementedError('openpyxl is not installed')
+
+        self.df = frame()
+        self.output = os.path.abspath(f'out_openpyxl_{template}.xlsx')
+
+    def teardown(self, paths, template):
+        if os.path.exists(self.output):
+            os.remove(self.output)
+
+    def __cycle(self, path):
+        import openpyxl
+
+        wb = openpyxl.load_workbook(path)
+        ws = wb['Data']
+
+        for c, name in enumerate(self.df.columns, start=2):
+            ws.cell(1, c, name)
+
+        for r, row in enumerate(self.df.itertuples(index=False), start=2):
+            for c, value in enumerate(row, start=2):
+                ws.cell(r, c, None if pd.isna(value) else value)
+
+        wb.save(self.output)
+
+    def time_load_insert_save(self, paths, template):
+        self.__cycle(paths[template])
+
+    def time_read(self, paths, template):
+        import openpyxl
+
+        wb = openpyxl.load_workbook(paths[template], read_only=True)
+        pd.DataFrame(wb['Data'].values)
+        wb.close()
+
+    def peakmem_load_insert_save(self, paths, template):
+        self.__cycle(paths[template])
+
+
+class SaveParallel:
+
+    """
+    Saving two modified worksheets, their parts are serialized and compressed by several threads.
+
+    """
+
+    params = [1, 2, 4]
+    param_names = ['workers']
+
+    def setup(self, paths, workers):
+        self.wb = in2xl.load_workbook(paths['large'])
+        self.wb.package.begin()
+        # the modifications are kept in memory, every save serializes both worksheets again
+        self.wb['Data'].insert(frame(), 2, 2)
+        self.wb['Other'].insert(frame(), 2, 2)
+
+    def teardown(self, paths, workers):
+        self.wb.package.rollback()
+        self.wb.close()
+
+    def time_save(self, paths, workers):
+        self.wb.save(io.BytesIO(), workers=workers)
+
+
+class SaveCompression:
+
+    """
+    Saving a large modified worksheet without compression and with several deflate levels.
+
+    """
+
+    modes = {'stored': (zipfile.ZIP_STORED, None), 'deflate-1': (zipfile.ZIP_DEFLATED, 1),
+             'deflate-6': (zipfile.ZIP_DEFLATED, 6), 'deflate-9': (zipfile.ZIP_DEFLATED, 9)}
+
+    params = list(modes)
+    param_names = ['compression']
+
+    def setup(self, paths, compression):
+        self.wb = in2xl.load_workbook(paths['large'])
+        self.wb.package.begin()
+        self.wb['Data'].insert(frame(20000), 2, 2)
+
+    def teardown(self, paths, compression):
+        self.wb.package.rollback()
+        self.wb.close()
+
+    def __save(self, compression):
+        method, level = self.modes[compression]
+        return self.wb.save(io.BytesIO(), compression=method, level=level)
+
+    def time_save(self, paths, compression):
+        self.__save(compression)
+
+    def track_size(self, paths, compression):
+        return len(self.__save(compression).getvalue())
+
+    track_size.unit = 'bytes'
+
+
+class PivotRefresh:
+
+    """
+    Refreshing the pivot cache of the 'features' template from DataFrames of growing length, the records are
+    streamed into the archive and the data is written into the source range, so time and memory should grow
+    linearly with the rows.
+
+    """
+
+    params = [10000, 200000]
+    param_names = ['rows']
+
+    def setup(self, paths, rows):
+        self.wb = in2xl.load_workbook(paths['features'])
+        self.wb.package.begin()
+        self.df = pd.DataFrame({'label': [f'label {i % 100}' for i in range(rows)], 'value': np.arange(rows) * 0.5})
+
+    def teardown(self, paths, rows):
+        self.wb.package.rollback()
+        self.wb.close()
+
+    def time_refresh_pivot(self, paths, rows):
+        self.wb.refresh_pivot('Pivot', self.df)
+        self.wb.save(io.BytesIO())
+
+    def peakmem_refresh_pivot(self, paths, rows):
+        self.wb.refresh_pivot('Pivot', self.df)
+        self.wb.save(io.BytesIO())
+
+
+class CompactStrings:
+
+    """
+    Saving with the compaction of the shared string table after the strings of 'Data' were overwritten.
+
+    """
+
+    params = (list(TEMPLATES), [False, True])
+    param_names = ['template', 'stream']
+
+    def setup(self, paths, template, stream):
+        self.wb = in2xl.load_workbook(paths[template], stream=stream)
+        self.wb.package.begin()
+        self.wb['Data'].insert(frame(), 1, 1)
+
+    def teardown(self, paths, template, stream):
+        self.wb.package.rollback()
+        self.wb.close()
+
+    def time_save_compact(self, paths, template, stream):
+        self.wb.save(io.BytesIO(), compact_strings=True)
+
+
+class Formulas:
+
+    """
+    Scalar inserts into the 'features' template (a formula per fifth row): only the cached values of the
+    affected formulas are removed, or none with `full_calc`, so the time per insert should not grow with the sheet.
+
+    """
+
+    params = [False, True]
+    param_names = ['full_calc']
+
+    number = 1
+
+    def setup(self, paths, full_calc):
+        self.wb = in2xl.load_workbook(paths['features'], full_calc=full_calc)
+        self.wb.package.begin()
+
+    def teardown(self, paths, full_calc):
+        self.wb.package.rollback()
+        self.wb.close()
+
+    def time_insert_scalars(self, paths, full_calc):
+        ws = self.wb['Data']
+        for i in range(1, 101):
+            ws.insert(i * 0.5, i * 5, 2)
@@ -0,0 +1,324 @@
+# templates.py
+from xml.sax.saxutils import escape
+import zipfile
+import os
+
+# synthetic templates are written as raw OOXML, so no other Excel library is needed to create them
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet2.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '{extra}'
+    '</Types>'
+)
+
+_CALC_TYPE = '<Override PartName="/xl/calcChain.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.calcChain+xml"/>'
+
+_CHART_TYPES = (
+    '<Override PartName="/xl/drawings/drawing1.xml" ContentType="application/vnd.openxmlformats-officedocument.drawing+xml"/>'
+    '<Override PartName="/xl/charts/chart1.xml" ContentType="application/vnd.openxmlformats-officedocument.drawingml.chart+xml"/>'
+)
+
+_PIVOT_TYPES = (
+    '<Override PartName="/xl/pivotCache/pivotCacheDefinition1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.pivotCacheDefinition+xml"/>'
+    '<Override PartName="/xl/pivotCache/pivotCacheRecords1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.pivotCacheRecords+xml"/>'
+    '<Override PartName="/xl/pivotTables/pivotTable1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.pivotTable+xml"/>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Data" sheetId="1" r:id="rId1"/><sheet name="Other" sheetId="2" r:id="rId2"/></sheets>'
+    '{extra}'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet2.xml"/>'
+    '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '<Relationship Id="rId4" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+    '{extra}'
+    '</Relationships>'
+)
+
+_CALC_REL = '<Relationship Id="rId5" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/calcChain" Target="calcChain.xml"/>'
+
+_PIVOT_REL = '<Relationship Id="rId6" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/pivotCacheDefinition" Target="pivotCache/pivotCacheDefinition1.xml"/>'
+
+_PIVOT_CACHE = '<pivotCaches><pivotCache cacheId="1" r:id="rId6"/></pivotCaches>'
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<dimension ref="{ref}"/><sheetData>'
+)
+
+_SHEET_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/drawing" Target="../drawings/drawing1.xml"/>'
+    '</Relationships>'
+)
+
+_DRAWING = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<xdr:wsDr xmlns:xdr="http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+    '<xdr:oneCellAnchor><xdr:from><xdr:col>12</xdr:col><xdr:colOff>0</xdr:colOff><xdr:row>1</xdr:row><xdr:rowOff>0</xdr:rowOff></xdr:from>'
+    '<xdr:ext cx="5400000" cy="2700000"/>'
+    '<xdr:graphicFrame macro=""><xdr:nvGraphicFramePr><xdr:cNvPr id="1" name="Chart 1"/><xdr:cNvGraphicFramePr/></xdr:nvGraphicFramePr>'
+    '<xdr:xfrm><a:off x="0" y="0"/><a:ext cx="0" cy="0"/></xdr:xfrm>'
+    '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/chart">'
+    '<c:chart xmlns:c="http://schemas.openxmlformats.org/drawingml/2006/chart" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" r:id="rId1"/>'
+    '</a:graphicData></a:graphic></xdr:graphicFrame><xdr:clientData/></xdr:oneCellAnchor>'
+    '</xdr:wsDr>'
+)
+
+_DRAWING_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/chart" Target="../charts/chart1.xml"/>'
+    '</Relationships>'
+)
+
+_CHART = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<c:chartSpace xmlns:c="http://schemas.openxmlformats.org/drawingml/2006/chart" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+    '<c:chart><c:plotArea><c:layout/><c:barChart><c:barDir val="col"/><c:grouping val="clustered"/>'
+    '<c:ser><c:idx val="0"/><c:order val="0"/>'
+    '<c:val><c:numRef><c:f>\'Data\'!$B$2:$B${last}</c:f></c:numRef></c:val></c:ser>'
+    '<c:axId val="10"/><c:axId val="100"/></c:barChart>'
+    '<c:catAx><c:axId val="10"/><c:scaling><c:orientation val="minMax"/></c:scaling><c:axPos val="b"/><c:crossAx val="100"/></c:catAx>'
+    '<c:valAx><c:axId val="100"/><c:scaling><c:orientation val="minMax"/></c:scaling><c:axPos val="l"/><c:crossAx val="10"/></c:valAx>'
+    '</c:plotArea></c:chart></c:chartSpace>'
+)
+
+
+_PIVOT_DEFINITION = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<pivotCacheDefinition xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" r:id="rId1" recordCount="{rows}">'
+    '<cacheSource type="worksheet"><worksheetSource ref="A1:B{rows}" sheet="Data"/></cacheSource>'
+    '<cacheFields count="2"><cacheField name="label" numFmtId="0"><sharedItems count="{unique}">{items}</sharedItems></cacheField>'
+    '<cacheField name="value" numFmtId="0"><sharedItems containsSemiMixedTypes="0" containsString="0" containsNumber="1"/></cacheField>'
+    '</cacheFields></pivotCacheDefinition>'
+)
+
+_PIVOT_DEFINITION_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/pivotCacheRecords" Target="pivotCacheRecords1.xml"/>'
+    '</Relationships>'
+)
+
+_PIVOT_TABLE = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<pivotTableDefinition xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" name="Pivot" cacheId="1" dataCaption="Values">'
+    '<location ref="E1:F{last}" firstHeaderRow="1" firstDataRow="1" firstDataCol="1"/>'
+    '<pivotFields count="2"><pivotField axis="axisRow" showAll="0"><items count="{count}">{items}<item t="default"/></items></pivotField>'
+    '<pivotField dataField="1" showAll="0"/></pivotFields>'
+    '<rowFields count="1"><field x="0"/></rowFields>'
+    '<dataFields count="1"><dataField name="Sum of value" fld="1" baseField="0" baseItem="0"/></dataFields>'
+    '</pivotTableDefinition>'
+)
+
+_PIVOT_TABLE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/pivotCacheDefinition" '
+    'Target="../pivotCache/pivotCacheDefinition1.xml"/>'
+    '</Relationships>'
+)
+
+_OTHER_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/pivotTable" Target="../pivotTables/pivotTable1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _pivot(myzip, rows, unique):
+
+    """
+    Writes a pivot table on 'Other' with a pivot cache of the labels and the values of the first two columns
+    of 'Data' (the header row is not generated, so the first row counts as a record).
+
+    """
+
+    items = ''.join(f'<s v="{escape(f"label {i}")}"/>' for i in range(unique))
+    myzip.writestr('xl/pivotCache/pivotCacheDefinition1.xml', _PIVOT_DEFINITION.format(rows=rows, unique=unique, items=items))
+    myzip.writestr('xl/pivotCache/_rels/pivotCacheDefinition1.xml.rels', _PIVOT_DEFINITION_RELS)
+
+    with myzip.open('xl/pivotCache/pivotCacheRecords1.xml', 'w', force_zip64=True) as myfile:
+        myfile.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                      f'<pivotCacheRecords xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{rows}">').encode())
+        for r in range(1, rows + 1):
+            myfile.write(f'<r><x v="{r % unique}"/><n v="{2 * r + 0.5}"/></r>'.encode())
+        myfile.write(b'</pivotCacheRecords>')
+
+    items = ''.join(f'<item x="{i}"/>' for i in range(unique))
+    myzip.writestr('xl/pivotTables/pivotTable1.xml', _PIVOT_TABLE.format(last=unique + 2, count=unique + 1, items=items))
+    myzip.writestr('xl/pivotTables/_rels/pivotTable1.xml.rels', _PIVOT_TABLE_RELS)
+    myzip.writestr('xl/worksheets/_rels/sheet2.xml.rels', _OTHER_RELS)
+
+
+def _column_name(column):
+    name = ''
+    while column > 0:
+        column, rest = divmod(column - 1, 26)
+        name = chr(65 + rest) + name
+    return name
+
+
+def _sheet(myzip, name, rows, columns, unique, formulas=False, drawing=False):
+
+    """
+    Writes a worksheet row by row. The first column holds shared strings (`unique` different ones),
+    the other columns numbers. With `formulas` every fifth row ends with a formula and its cached value,
+    with `drawing` the worksheet references the drawing of the chart.
+
+    Returns:
+        list: The references of the formula cells.
+
+    """
+
+    last = _column_name(columns)
+    calc = []
+
+    with myzip.open(name, 'w', force_zip64=True) as myfile:
+        myfile.write(_SHEET_HEAD.format(ref=f'A1:{last}{rows}').encode())
+
+        for r in range(1, rows + 1):
+            cells = [f'<c r="A{r}" t="s"><v>{r % unique}</v></c>']
+            cells += [f'<c r="{_column_name(c)}{r}"><v>{r * c + 0.5}</v></c>' for c in range(2, columns)]
+
+            if formulas and (r % 5 == 0):
+                calc.append(f'{last}{r}')
+                cells.append(f'<c r="{last}{r}"><f>SUM(B{r}:{_column_name(columns - 1)}{r})</f><v>0</v></c>')
+            else:
+                cells.append(f'<c r="{last}{r}"><v>{r}</v></c>')
+
+            myfile.write(f'<row r="{r}" spans="1:{columns}">{"".join(cells)}</row>'.encode())
+
+        tail = '<drawing r:id="rId1"/>' if drawing else ''
+        myfile.write(f'</sheetData>{tail}</worksheet>'.encode())
+
+    return calc
+
+
+def make_template(path, rows=100, columns=10, unique=10, charts=False, calc_chain=False, formulas=False, pivot=False) -> str:
+
+    """
+    Writes a synthetic template with the worksheets 'Data' (the generated cells) and 'Other' (a small block).
+
+    Args:
+        path (str): The path of the template.
+        rows (int, optional): The number of rows of 'Data'. Defaults to 100.
+        columns (int, optional): The number of columns of 'Data'. Defaults to 10.
+        unique (int, optional): The number of different shared strings. Defaults to 10.
+        charts (bool, optional): True to add a chart referencing 'Data'. Defaults to False.
+        calc_chain (bool, optional): True to add a calculation chain for the formulas. Defaults to False.
+        formulas (bool, optional): True to write formulas into the last column of 'Data'. Defaults to False.
+        pivot (bool, optional): True to add a pivot table on 'Other' with a cache of the first two columns of 'Data'. Defaults to False.
+
+    Returns:
+        str: The path of the template.
+
+    """
+
+    unique = max(1, min(unique, rows))
+
+    with zipfile.ZipFile(path, mode='w', compression=zipfile.ZIP_DEFLATED) as myzip:
+        extra = (_CALC_TYPE if calc_chain and formulas else '') + (_CHART_TYPES if charts else '') + (_PIVOT_TYPES if pivot else '')
+        myzip.writestr('[Content_Types].xml', _CONTENT_TYPES.format(extra=extra))
+        myzip.writestr('_rels/.rels', _RELS)
+        myzip.writestr('xl/workbook.xml', _WORKBOOK.format(extra=_PIVOT_CACHE if pivot else ''))
+        extra = (_CALC_REL if calc_chain and formulas else '') + (_PIVOT_REL if pivot else '')
+        myzip.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS.format(extra=extra))
+        myzip.writestr('xl/styles.xml', _STYLES)
+
+        strings = ''.join(f'<si><t>{escape(f"label {i}")}</t></si>' for i in range(unique))
+        myzip.writestr('xl/sharedStrings.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{rows + 5}" uniqueCount="{unique}">'
+            f'{strings}</sst>'
+        ))
+
+        calc = _sheet(myzip, 'xl/worksheets/sheet1.xml', rows, columns, unique, formulas, charts)
+        _sheet(myzip, 'xl/worksheets/sheet2.xml', 5, 3, 1)
+
+        if calc_chain and calc:
+            cells = ''.join(f'<c r="{ref}" i="1"/>' for ref in calc)
+            myzip.writestr('xl/calcChain.xml', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<calcChain xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">{cells}</calcChain>'
+            ))
+
+        if charts:
+            myzip.writestr('xl/worksheets/_rels/sheet1.xml.rels', _SHEET_RELS)
+            myzip.writestr('xl/drawings/drawing1.xml', _DRAWING)
+            myzip.writestr('xl/drawings/_rels/drawing1.xml.rels', _DRAWING_RELS)
+            myzip.writestr('xl/charts/chart1.xml', _CHART.format(last=rows))
+
+        if pivot:
+            _pivot(myzip, rows, unique)
+
+    return path
+
+
+# the templates of the benchmarks: name -> keyword arguments of `make_template`
+TEMPLATES = {
+    'small': dict(rows=100, columns=10, unique=10),
+    'large': dict(rows=20000, columns=10, unique=10),
+    'strings': dict(rows=20000, columns=10, unique=20000),
+    'features': dict(rows=2000, columns=10, unique=100, charts=True, calc_chain=True, formulas=True, pivot=True),
+}
+
+
+def make_templates(directory) -> dict:
+
+    """
+    Writes all templates of the benchmarks into a directory.
+
+    Returns:
+        dict: A dictionary of template names and their paths.
+
+    """
+
+    os.makedirs(directory, exist_ok=True)
+
+    return {name: make_template(os.path.join(directory, f'{name}.xlsx'), **kwargs) for name, kwargs in TEMPLATES.items()}
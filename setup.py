@@ -24,7 +24,7 @@ setup(
     packages=['in2xl', 'in2xl.in2xl'],
 
 
-    install_requires=['openpyxl', 'xlsxwriter', 'ruamel.std.zipfile', 'lxml', 'pandas'],
+    install_requires=['lxml', 'numpy', 'pandas'],
     keywords=['python', 'xlsx', 'excel', 'dataframe', 'insert in excel', 'template', 'excel template'],
     classifiers=[
         "Development Status :: 3 - Alpha",
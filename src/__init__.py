@@ -1,2 +1,6 @@
 from .in2xl.workbook import Workbook
 from .in2xl.workbook import Workbook as load_workbook
+from .in2xl.render import render_many
+from .in2xl.cache import Template, template_cache
+from .in2xl.stats import Stats
+from .in2xl.aio import aload_workbook, configure_executor
@@ -0,0 +1,158 @@
+# aio.py
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import functools
+import threading
+import weakref
+import os
+
+# asyncio and the executor are imported on first use, they are not needed by `import in2xl`
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+    import asyncio
+
+# the blocking work of all workbooks runs on one shared executor, it is created on first use
+_LIMITS = {'max_workers': min(32, (os.cpu_count() or 1) + 4), 'max_pending': None}
+_EXECUTOR = None
+_GUARD = threading.Lock()
+
+# one semaphore per event loop limits the jobs handed to the executor, one lock per event loop and workbook
+# serializes its jobs (asyncio primitives are bound to a loop), a thread lock per workbook serializes the jobs
+# of different loops
+_SEMAPHORES = weakref.WeakKeyDictionary()
+_WORKBOOKS = weakref.WeakKeyDictionary()
+_MUTEXES = weakref.WeakKeyDictionary()
+
+
+def configure_executor(max_workers: int = None, max_pending: int = None) -> None:
+
+    """
+    Sets the limits of the executor which runs the blocking work of the async API. A running executor is
+    shut down (its pending jobs are completed) and a new one is created on the next call.
+
+    Args:
+        max_workers (int, optional): The number of worker threads. Defaults to min(32, number of CPUs + 4).
+        max_pending (int, optional): The number of jobs which are handed to the executor at once, further
+            jobs wait (without blocking the event loop) until a job is finished. Defaults to `max_workers`.
+
+    """
+
+    global _EXECUTOR
+
+    with _GUARD:
+        if max_workers is not None:
+            _LIMITS['max_workers'] = max(1, int(max_workers))
+        _LIMITS['max_pending'] = None if max_pending is None else max(1, int(max_pending))
+
+        executor, _EXECUTOR = _EXECUTOR, None
+        _SEMAPHORES.clear()
+
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def _executor() -> ThreadPoolExecutor:
+
+    global _EXECUTOR
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with _GUARD:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(_LIMITS['max_workers'], thread_name_prefix='in2xl')
+
+        return _EXECUTOR
+
+
+def _semaphore(loop) -> asyncio.Semaphore:
+
+    import asyncio
+
+    if loop not in _SEMAPHORES:
+        _SEMAPHORES[loop] = asyncio.Semaphore(_LIMITS['max_pending'] or _LIMITS['max_workers'])
+
+    return _SEMAPHORES[loop]
+
+
+def _lock(loop, package) -> asyncio.Lock:
+
+    import asyncio
+
+    if loop not in _WORKBOOKS:
+        _WORKBOOKS[loop] = weakref.WeakKeyDictionary()
+
+    locks = _WORKBOOKS[loop]
+
+    if package not in locks:
+        locks[package] = asyncio.Lock()
+
+    return locks[package]
+
+
+def _locked(package, call):
+
+    with _GUARD:
+        if package not in _MUTEXES:
+            _MUTEXES[package] = threading.Lock()
+        mutex = _MUTEXES[package]
+
+    with mutex:
+        return call()
+
+
+async def run(func, *args, package=None, **kwargs):
+
+    """
+    Runs a blocking function on the executor. At most `max_pending` jobs of an event loop are handed to the
+    executor at once, the jobs of one workbook (identified by its package) are run one after another, also if
+    the workbook is used from several event loops.
+
+    Args:
+        func (callable): The blocking function.
+        *args: The positional arguments of the function.
+        package (Package, optional): The package of the workbook the function works on.
+        **kwargs: The keyword arguments of the function.
+
+    Returns:
+        The result of the function.
+
+    """
+
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+
+    if package is None:
+        async with _semaphore(loop):
+            return await loop.run_in_executor(_executor(), call)
+
+    # the lock of the workbook is taken first, so waiting jobs do not occupy a slot of the executor
+    async with _lock(loop, package):
+        async with _semaphore(loop):
+            return await loop.run_in_executor(_executor(), functools.partial(_locked, package, call))
+
+
+async def aload_workbook(path, **kwargs):
+
+    """
+    Reads an Excel workbook without blocking the event loop, see `Workbook.load_workbook()`.
+
+    Example:
+        wb = await in2xl.aload_workbook(path)
+        await wb[sheetname].ainsert(df, 2, 3)
+        content = await wb.asave_bytes()
+        await wb.aclose()
+
+    Args:
+        path (str, bytes, file or Template): The file path of the Excel workbook, its content, a file object or a compiled template.
+        **kwargs: Keyword arguments of `load_workbook` (e.g. `stream`, `strings` or `cache`).
+
+    Returns:
+        Worksheets: An instance of the Worksheets class.
+
+    """
+
+    from .workbook import Workbook
+
+    return await run(lambda: Workbook().load_workbook(path, **kwargs))
@@ -0,0 +1,160 @@
+# cache.py
+from __future__ import annotations
+from collections import OrderedDict
+import threading
+import zipfile
+import io
+import os
+from .sharedstrings import SharedStrings
+
+
+class Template:
+
+    """
+    The `Template` class is the pre-parsed (compiled) form of an Excel template.
+
+    It holds the content of the archive and the parsed parts which are needed by every load (workbook.xml,
+    sharedStrings.xml), as well as the chart index. Loading a workbook from a template does not read or parse
+    these parts again: the archive is shared until it is modified (`BytesIO` copies it on the first write) and
+    every parsed part is copied on its first access.
+
+    Attributes:
+        data (bytes): The content of the archive.
+        content (list): A list of all files and directories in the zip archive.
+        parts (dict): A dictionary of part names and their parsed form, they are never modified.
+        chart_dict (dict): A dictionary of worksheet names and the corresponding chart filenames.
+        nbytes (int): The estimated memory used by the template.
+
+    Methods:
+        __init__(self, data): Compiles a template from the content of an Excel workbook.
+        fromfile(cls, path) -> Template: Compiles a template from a file.
+
+    """
+
+    def __init__(self, data):
+
+        from .workbook import Workbook
+
+        self.data = bytes(data)
+
+        ws = Workbook().load_workbook(self.data)
+
+        try:
+            ws.package.get('xl/sharedStrings.xml', parser=SharedStrings.fromstring)
+        except KeyError:
+            pass
+
+        self.content = list(ws.package.content)
+        self.parts = dict(ws.package.parts)
+        self.chart_dict = ws.chart_dict
+
+        with zipfile.ZipFile(io.BytesIO(self.data), mode="r") as myzip:
+            # the parsed parts take roughly the memory of their uncompressed content
+            parsed = sum(myzip.getinfo(name).file_size for name in self.parts)
+
+        self.nbytes = len(self.data) + parsed
+
+        ws.close()
+
+    @classmethod
+    def fromfile(cls, path) -> Template:
+
+        """
+        Compiles a template from a file.
+
+        Args:
+            path (str): The path of the Excel workbook.
+
+        Returns:
+            Template: The compiled template.
+
+        """
+
+        with open(path, 'rb') as myfile:
+            return cls(myfile.read())
+
+
+class TemplateCache:
+
+    """
+    The `TemplateCache` class keeps compiled templates in memory. The entries are keyed by the path, the size
+    and the modification time of the file, so a changed file is compiled again. If the estimated memory of all
+    entries exceeds the limit, the least recently used entries are evicted.
+
+    Attributes:
+        max_bytes (int): The memory limit of the cache in bytes, 0 disables the cache.
+        entries (OrderedDict): The compiled templates, the most recently used one is at the end.
+        nbytes (int): The estimated memory used by all entries.
+
+    Methods:
+        __init__(self, max_bytes=256 << 20): Initializes a new instance of the `TemplateCache` class.
+        get(self, path) -> Template: Returns the compiled template of a file.
+        clear(self): Removes all entries.
+
+    """
+
+    def __init__(self, max_bytes=256 << 20):
+
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, path) -> Template:
+
+        """
+        Returns the compiled template of a file, it is compiled if the file is not cached or was changed.
+
+        Args:
+            path (str): The path of the Excel workbook.
+
+        Returns:
+            Template: The compiled template.
+
+        """
+
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        template = Template.fromfile(path)
+
+        with self._lock:
+            # older versions of the file are never used again
+            for old in [k for k in self.entries if k[0] == path]:
+                self.nbytes -= self.entries.pop(old).nbytes
+
+            if template.nbytes <= self.max_bytes:
+                self.entries[key] = template
+                self.nbytes += template.nbytes
+
+            while self.nbytes > self.max_bytes:
+                self.nbytes -= self.entries.popitem(last=False)[1].nbytes
+
+        return template
+
+    def clear(self):
+
+        """
+        Removes all entries.
+
+        """
+
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+        return self
+
+
+# the cache used by `load_workbook(path, cache=True)`
+template_cache = TemplateCache()
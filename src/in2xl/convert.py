@@ -0,0 +1,304 @@
+# convert.py
+from __future__ import annotations
+from datetime import date, datetime, time, timedelta
+import numbers
+import decimal
+import math
+import sys
+
+# numpy and pandas are imported on first use, importing the package only loads lxml
+EPOCH = datetime(1899, 12, 30)
+
+
+def is_frame(data) -> bool:
+
+    """
+    Checks whether an object is a DataFrame without importing pandas.
+
+    Args:
+        data: The object to be checked.
+
+    Returns:
+        bool: True if the object is a `pd.DataFrame`.
+
+    """
+
+    pd = sys.modules.get('pandas')
+
+    return (pd is not None) and isinstance(data, pd.DataFrame)
+
+
+def _from_numpy(value):
+
+    """
+    Converts a NumPy scalar into the corresponding Python value. Dates and durations are returned as
+    days since the Excel epoch, NaT as None.
+
+    """
+
+    import numpy as np
+
+    if isinstance(value, np.datetime64):
+        if np.isnat(value):
+            return None
+        return float((value - np.datetime64(EPOCH)) / np.timedelta64(1, 'D'))
+
+    if isinstance(value, np.timedelta64):
+        if np.isnat(value):
+            return None
+        return float(value / np.timedelta64(1, 'D'))
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return value
+
+
+def cell_value(value, strings=None, count=1) -> tuple:
+
+    """
+    Converts a single value into the type and the text of an Excel cell.
+
+    Args:
+        value: The value to be converted.
+        strings (SharedStrings, optional): The shared string table. Strings are added to the table
+            and referenced by their index. Defaults to None (the text is returned with type 'str').
+        count (int, optional): The number of cells which reference the string. Defaults to 1.
+
+    Returns:
+        tuple: The cell type (`t` attribute, None for numbers) and the text of the `<v>` element.
+
+    """
+
+    if type(value).__module__ == 'numpy':
+        # a NumPy scalar, NumPy is already imported by the caller
+        value = _from_numpy(value)
+
+    if isinstance(value, bool):
+        return 'b', '1' if value else '0'
+
+    if isinstance(value, (datetime, date, timedelta)) and (value != value):
+        # NaT of pandas
+        value = None
+
+    elif isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None)
+        value = (value - EPOCH) / timedelta(days=1)
+
+    elif isinstance(value, date):
+        value = (datetime.combine(value, time()) - EPOCH) / timedelta(days=1)
+
+    elif isinstance(value, timedelta):
+        value = value / timedelta(days=1)
+
+    elif isinstance(value, time):
+        value = (datetime.combine(EPOCH, value) - EPOCH) / timedelta(days=1)
+
+    if isinstance(value, numbers.Integral):
+        return None, str(int(value))
+
+    if isinstance(value, (numbers.Real, decimal.Decimal)):
+        if isinstance(value, decimal.Decimal) and value.is_finite():
+            return None, str(value)
+        if not isinstance(value, decimal.Decimal) and math.isfinite(value):
+            return None, repr(float(value))
+        # nan and inf can not be stored as numbers
+        value = str(value).lower()
+
+    if value is None:
+        value = 'nan'
+
+    value = str(value)
+
+    if strings is None:
+        return 'str', value
+
+    return 's', str(strings.add(value, count))
+
+
+def _missing(ignore_nan, strings, count):
+
+    """
+    Returns the type and the text used for missing values.
+
+    """
+
+    if ignore_nan:
+        return None, None
+
+    return cell_value('nan', strings, count)
+
+
+def _column(values, ignore_nan, strings) -> tuple:
+
+    """
+    Converts the values of one column into the types and the texts of Excel cells.
+    The type of the column is classified once, missing values are masked in bulk and numeric
+    values are formatted in one vectorized pass. All other values are deduplicated with `pd.factorize`,
+    so every distinct value is converted (and looked up in the shared string table) only once.
+
+    Args:
+        values (Series or Index): The values of the column.
+        ignore_nan (bool): True to skip missing values, False to insert them as 'nan'.
+        strings (SharedStrings): The shared string table.
+
+    Returns:
+        tuple: An object array of the cell types and an object array of the texts (None for skipped cells).
+
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    n = len(values)
+    types = np.empty(n, dtype=object)
+    texts = np.empty(n, dtype=object)
+
+    dtype = values.dtype
+    kind = dtype.kind if isinstance(dtype, np.dtype) else 'O'
+
+    if kind in 'iufbMm':
+        arr = np.asarray(values)
+
+        if kind == 'M':
+            mask = np.isnat(arr)
+            arr = (arr - np.datetime64(EPOCH)) / np.timedelta64(1, 'D')
+        elif kind == 'm':
+            mask = np.isnat(arr)
+            arr = arr / np.timedelta64(1, 'D')
+        elif kind == 'f':
+            mask = ~np.isfinite(arr)
+        else:
+            mask = np.zeros(n, dtype=bool)
+
+        valid = ~mask
+
+        if kind == 'b':
+            types[:] = 'b'
+            texts[:] = np.where(arr, '1', '0')
+        elif kind in 'iu':
+            texts[:] = list(map(str, arr.tolist()))
+        else:
+            # repr gives the shortest text which round-trips to the same float
+            texts[valid] = list(map(repr, arr[valid].tolist()))
+
+        if mask.any():
+            nan = np.flatnonzero(mask & np.isnan(arr))
+            if len(nan):
+                types[nan], texts[nan] = _missing(ignore_nan, strings, len(nan))
+
+            # infinite values can not be stored as numbers, they are inserted as text
+            for i in np.flatnonzero(mask & ~np.isnan(arr)):
+                types[i], texts[i] = cell_value(str(arr[i]), strings)
+
+        return types, texts
+
+    codes, uniques = pd.factorize(values)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+    u_types = np.empty(len(uniques) + 1, dtype=object)
+    u_texts = np.empty(len(uniques) + 1, dtype=object)
+
+    for i, value in enumerate(uniques):
+        u_types[i], u_texts[i] = cell_value(value, strings, int(counts[i]))
+
+    missing = int((codes < 0).sum())
+
+    if missing:
+        # the last entry is used for missing values (code -1)
+        u_types[-1], u_texts[-1] = _missing(ignore_nan, strings, missing)
+
+    types[:] = u_types[codes]
+    texts[:] = u_texts[codes]
+
+    return types, texts
+
+
+def _sparse(levels) -> list:
+
+    """
+    Hides repeated labels of a MultiIndex, a label is shown if it or any label of a higher level changed.
+
+    Args:
+        levels (list): The level values of the MultiIndex.
+
+    Returns:
+        list: A boolean array per level, True if the label is shown.
+
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    changed = np.zeros(len(levels[0]), dtype=bool)
+    changed[:1] = True
+    shown = []
+
+    for level in levels:
+        codes = pd.factorize(level)[0]
+        changed = changed | np.concatenate([[True], codes[1:] != codes[:-1]])
+        shown.append(changed)
+
+    return shown
+
+
+def frame_to_cells(data, header=True, index=False, ignore_nan=True, strings=None) -> tuple:
+
+    """
+    Converts a DataFrame into the types and texts of a rectangular block of Excel cells. The layout is
+    the same as the one of `openpyxl.utils.dataframe.dataframe_to_rows`: the column labels on top (one row
+    per level), the index on the left (one column per level) and, if the index is included, a row with the
+    names of the index levels below the column labels.
+
+    Args:
+        data (pd.DataFrame): The DataFrame to be converted.
+        header (bool, optional): True to include the column labels. Defaults to True.
+        index (bool, optional): True to include the index. Defaults to False.
+        ignore_nan (bool, optional): True to skip missing values, False to insert them as 'nan'. Defaults to True.
+        strings (SharedStrings, optional): The shared string table. Defaults to None (texts are returned unchanged).
+
+    Returns:
+        tuple: Two object arrays (rows x columns) with the cell types and the texts (None for skipped cells).
+
+    """
+
+    import numpy as np
+
+    nlevels = data.index.nlevels if index else 0
+    hrows = data.columns.nlevels if header else 0
+    top = hrows + (1 if index else 0)
+
+    shape = (top + len(data), nlevels + data.shape[1])
+    types = np.empty(shape, dtype=object)
+    texts = np.empty(shape, dtype=object)
+
+    def labels(values, shown, row, column):
+        for i, value in enumerate(values):
+            if (value is None) or ((shown is not None) and not shown[i]):
+                continue
+            if isinstance(value, float) and math.isnan(value):
+                continue
+            types[row, column + i], texts[row, column + i] = cell_value(value, strings)
+
+    if header:
+        levels = [data.columns.get_level_values(i) for i in range(hrows)]
+        shown = _sparse(levels) if hrows > 1 else [None]
+        for i, level in enumerate(levels):
+            labels(list(level), shown[i], i, nlevels)
+
+    if index:
+        labels(list(data.index.names), None, hrows, 0)
+
+        levels = [data.index.get_level_values(i) for i in range(nlevels)]
+        shown = _sparse(levels) if nlevels > 1 else [None]
+        for i, level in enumerate(levels):
+            t, v = _column(level, ignore_nan, strings)
+            if shown[i] is not None:
+                v[~shown[i]] = None
+            types[top:, i], texts[top:, i] = t, v
+
+    for i in range(data.shape[1]):
+        types[top:, nlevels + i], texts[top:, nlevels + i] = _column(data.iloc[:, i], ignore_nan, strings)
+
+    return types, texts
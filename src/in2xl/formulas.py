@@ -0,0 +1,398 @@
+# formulas.py
+from __future__ import annotations
+import re
+from .sheetindex import XMAIN
+from .utils import column_index, split_ref, split_range
+
+MAX_ROW, MAX_COLUMN = 1048576, 16384
+
+# functions whose result does not (only) depend on their arguments
+_VOLATILE = {'NOW', 'TODAY', 'RAND', 'RANDBETWEEN', 'RANDARRAY', 'OFFSET', 'INDIRECT', 'CELL', 'INFO'}
+
+# the tokens of a formula which matter for its references, everything else (operators, numbers, ...) is skipped
+_TOKENS = re.compile(r"""
+    (?P<string>"(?:[^"]|"")*")
+  | (?P<error>\#[A-Z0-9/_]+[!?]?)
+  | (?<![\w.$])(?P<ref>
+        (?:(?P<sheet>'(?:[^']|'')+'|[^\s'!(),;:+\-*/^&=<>{}"\#]+)!)?
+        (?:
+            (?P<c1>\$?[A-Z]{1,3})(?P<r1>\$?[0-9]+)(?::(?P<c2>\$?[A-Z]{1,3})(?P<r2>\$?[0-9]+))?
+          | (?P<cc1>\$?[A-Z]{1,3}):(?P<cc2>\$?[A-Z]{1,3})
+          | (?P<rr1>\$?[0-9]+):(?P<rr2>\$?[0-9]+)
+        )
+        (?![\w(\[!])
+    )
+  | (?<![\w.$])(?P<function>[A-Za-z_][\w.]*\()
+  | (?<![\w.$])(?P<name>[A-Za-z_\\][\w.]*)
+""", re.VERBOSE)
+
+# a range whose corner is the result of a function, e.g. A1:INDEX(A:A, 5)
+_DYNAMIC = re.compile(r"\)\s*:|:\s*[A-Za-z_][\w.]*\(")
+
+# references spanning more rows (e.g. whole columns) are compared with every written range, all others are
+# looked up by their first row
+_TALL = 1024
+
+
+def _number(text: str, limit: int) -> int:
+    value = int(text.lstrip('$'))
+    if not 1 <= value <= limit:
+        raise ValueError(text)
+    return value
+
+
+def _column(text: str) -> int:
+    value = column_index(text.lstrip('$'))
+    if value > MAX_COLUMN:
+        raise ValueError(text)
+    return value
+
+
+def formula_refs(formula: str, sheet: str):
+
+    """
+    Returns the ranges of a worksheet a formula depends on. References to other worksheets and other
+    workbooks are skipped. If the dependencies can not be determined from the formula (defined names,
+    structured references, volatile functions like INDIRECT or OFFSET, ...), None is returned.
+
+    Args:
+        formula (str): The formula, e.g. "SUM($B2:D2)*'Data'!A1".
+        sheet (str): The name of the worksheet of the formula.
+
+    Returns:
+        list: Tuples of (row, column, last_row, last_column, fixed), where `fixed` tells which of the four numbers
+            are absolute ($), or None.
+
+    """
+
+    if _DYNAMIC.search(formula):
+        return None
+
+    refs = []
+
+    for m in _TOKENS.finditer(formula):
+        kind = m.lastgroup
+
+        if kind == 'function':
+            name = m.group('function')[:-1].upper()
+            if name.rpartition('.')[2] in _VOLATILE:
+                return None
+            continue
+
+        if kind == 'name':
+            if m.group('name').upper() in ('TRUE', 'FALSE'):
+                continue
+            return None
+
+        if kind != 'ref':
+            continue
+
+        if formula[m.end():m.end() + 1] == '#':
+            # a spilled range, its size is only known after the calculation
+            return None
+
+        name = m.group('sheet')
+
+        if name is not None:
+            name = name[1:-1].replace("''", "'") if name.startswith("'") else name
+            if name.startswith('['):
+                continue
+            if ':' in name:
+                # a 3D reference may include the worksheet
+                return None
+            if name.lower() != sheet.lower():
+                continue
+
+        try:
+            if m.group('c1') is not None:
+                c1, r1 = m.group('c1'), m.group('r1')
+                c2, r2 = (m.group('c2'), m.group('r2')) if m.group('c2') is not None else (c1, r1)
+                ref = (_number(r1, MAX_ROW), _column(c1), _number(r2, MAX_ROW), _column(c2),
+                       (r1[0] == '$', c1[0] == '$', r2[0] == '$', c2[0] == '$'))
+            elif m.group('cc1') is not None:
+                c1, c2 = m.group('cc1'), m.group('cc2')
+                ref = (1, _column(c1), MAX_ROW, _column(c2), (True, c1[0] == '$', True, c2[0] == '$'))
+            else:
+                r1, r2 = m.group('rr1'), m.group('rr2')
+                ref = (_number(r1, MAX_ROW), 1, _number(r2, MAX_ROW), MAX_COLUMN, (r1[0] == '$', True, r2[0] == '$', True))
+        except ValueError:
+            # looks like a reference, but is outside of the worksheet (e.g. a defined name like 'TAX2023')
+            return None
+
+        refs.append(ref)
+
+    return refs
+
+
+def shift_refs(refs, rows: int, columns: int) -> list:
+
+    """
+    Moves the relative parts of references, like Excel does for the cells of a shared formula.
+
+    Args:
+        refs (list): The references of the formula (see `formula_refs()`).
+        rows (int): The number of rows to move.
+        columns (int): The number of columns to move.
+
+    Returns:
+        list: The moved references, clipped to the worksheet.
+
+    """
+
+    moved = []
+
+    for r1, c1, r2, c2, fixed in refs:
+        r1, c1 = (r1 if fixed[0] else r1 + rows), (c1 if fixed[1] else c1 + columns)
+        r2, c2 = (r2 if fixed[2] else r2 + rows), (c2 if fixed[3] else c2 + columns)
+        moved.append((min(max(r1, 1), MAX_ROW), min(max(c1, 1), MAX_COLUMN),
+                      min(max(r2, 1), MAX_ROW), min(max(c2, 1), MAX_COLUMN), fixed))
+
+    return moved
+
+
+class FormulaIndex:
+
+    """
+    The `FormulaIndex` class holds the formulas of a worksheet and the ranges they depend on, so the formulas
+    which are affected by written cells are found without a search over the whole sheet. The index is built
+    with one pass over the formulas of the tree, the references of a shared formula are derived from its
+    master formula. Formulas whose dependencies are unknown are affected by every write.
+
+    The references are sorted by their first row and a running maximum of their last row is kept, so the
+    candidates of a written range are found with `np.searchsorted` and only these are compared. References
+    spanning more than `_TALL` rows (e.g. whole columns) are kept apart and compared with every written range.
+
+    Attributes:
+        cells (list): The `<c>` and `<f>` elements of every formula.
+        outputs (list): The range every formula writes to (its cell, or the range of an array formula).
+        always (list): The indexes of the formulas which are affected by every write.
+        refs (np.ndarray): The ranges of the references spanning at most `_TALL` rows (rows of row, column,
+            last_row, last_column), sorted by their first row.
+        owner (np.ndarray): The index of the formula of every reference of `refs`.
+        reach (np.ndarray): The running maximum of the last rows of `refs`.
+        tall (np.ndarray): The ranges of the references spanning more rows.
+        tall_owner (np.ndarray): The index of the formula of every reference of `tall`.
+
+    Methods:
+        __init__(self, tree, sheet): Initializes a new instance of the `FormulaIndex` class.
+        affected(self, ranges) -> list: Returns the cells of the formulas which depend on written ranges.
+        __candidates(self, ranges) -> list: Returns the formulas with a reference which overlaps one of the ranges.
+
+    """
+
+    def __init__(self, tree, sheet):
+
+        import numpy as np
+
+        self.cells = []
+        self.outputs = []
+
+        always, refs, owner = [], [], []
+        masters, shared = {}, []
+
+        data = tree.find(f'{XMAIN}sheetData')
+
+        for ws_formula in (data.iter(f'{XMAIN}f') if data is not None else ()):
+            ws_column = ws_formula.getparent()
+            ref = ws_column.get('r')
+            t = ws_formula.get('t', 'normal')
+            i = len(self.cells)
+
+            self.cells.append((ws_column, ws_formula))
+
+            if ref is None:
+                # cells without a reference follow their predecessor, such formulas are always recalculated
+                self.outputs.append((1, 1, MAX_ROW, MAX_COLUMN))
+                always.append(True)
+                continue
+
+            row, column = split_ref(ref)
+            self.outputs.append(split_range(ws_formula.get('ref')) if (t == 'array') and ws_formula.get('ref') else (row, column, row, column))
+
+            if (t == 'dataTable') or (ws_formula.get('ca') in ('1', 'true')):
+                always.append(True)
+                continue
+
+            if (t == 'shared') and not ws_formula.text:
+                shared.append((i, row, column, ws_formula.get('si')))
+                always.append(False)
+                continue
+
+            found = formula_refs(ws_formula.text or '', sheet)
+
+            if (t == 'shared') and (ws_formula.get('si') is not None):
+                masters[ws_formula.get('si')] = row, column, found
+
+            always.append(found is None)
+            for r in found or ():
+                refs.append(r[:4])
+                owner.append(i)
+
+        for i, row, column, si in shared:
+            master = masters.get(si)
+
+            if (master is None) or (master[2] is None):
+                always[i] = True
+                continue
+
+            for r in shift_refs(master[2], row - master[0], column - master[1]):
+                refs.append(r[:4])
+                owner.append(i)
+
+        self.always = [i for i, a in enumerate(always) if a]
+
+        refs = np.asarray(refs, dtype=np.int64).reshape(-1, 4)
+        owner = np.asarray(owner, dtype=np.int64)
+        tall = (refs[:, 2] - refs[:, 0]) >= _TALL
+
+        self.tall, self.tall_owner = refs[tall], owner[tall]
+
+        order = np.argsort(refs[~tall, 0], kind='stable')
+        self.refs, self.owner = refs[~tall][order], owner[~tall][order]
+        self.reach = np.maximum.accumulate(self.refs[:, 2]) if len(self.refs) else np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def affected(self, ranges) -> list:
+
+        """
+        Returns the cells of the formulas which depend on written ranges, directly or through other formulas
+        of the worksheet. Formulas which were removed from the worksheet in the meantime are skipped.
+
+        Args:
+            ranges (list): The written ranges as tuples of (row, column, last_row, last_column).
+
+        Returns:
+            list: The `<c>` elements of the affected formulas.
+
+        """
+
+        if not (ranges and self.cells):
+            return []
+
+        hit = set(self.always)
+        new = list(ranges) + [self.outputs[i] for i in self.always]
+
+        while new:
+            found = set()
+
+            for start in range(0, len(new), 256):
+                found.update(self.__candidates(new[start:start + 256]))
+
+            found -= hit
+            hit |= found
+
+            new = [self.outputs[i] for i in found]
+
+        cells = []
+
+        for i in sorted(hit):
+            ws_column, ws_formula = self.cells[i]
+            if (ws_formula.getparent() is ws_column) and (ws_column.getparent() is not None):
+                cells.append(ws_column)
+
+        return cells
+
+    def __candidates(self, ranges) -> list:
+
+        """
+        Returns the formulas with a reference which overlaps one of the ranges.
+
+        Args:
+            ranges (list): The ranges as tuples of (row, column, last_row, last_column).
+
+        Returns:
+            list: The indexes of the formulas.
+
+        """
+
+        import numpy as np
+
+        query = np.asarray(ranges, dtype=np.int64)
+        found = []
+
+        if len(self.refs):
+            # the references starting up to the last row of a range, from the first one which may reach its first row
+            lo = np.searchsorted(self.reach, query[:, 0], side='left')
+            hi = np.searchsorted(self.refs[:, 0], query[:, 2], side='right')
+            lengths = np.maximum(hi - lo, 0)
+
+            if lengths.sum():
+                which = np.repeat(np.arange(len(query)), lengths)
+                index = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(lo, lengths)
+                refs, q = self.refs[index], query[which]
+                match = (refs[:, 2] >= q[:, 0]) & (refs[:, 1] <= q[:, 3]) & (refs[:, 3] >= q[:, 1])
+                found.append(self.owner[index[match]])
+
+        if len(self.tall):
+            t = self.tall
+            match = ((t[None, :, 0] <= query[:, 2:3]) & (t[None, :, 2] >= query[:, 0:1]) &
+                     (t[None, :, 1] <= query[:, 3:4]) & (t[None, :, 3] >= query[:, 1:2])).any(axis=0)
+            found.append(self.tall_owner[match])
+
+        return np.unique(np.concatenate(found)).tolist() if found else []
+
+
+class CalcChain:
+
+    """
+    The `CalcChain` class indexes the cells of the calculation chain (calcChain.xml) by their sheet id and
+    reference, so a cell is found in constant time instead of a search over the whole chain.
+
+    Attributes:
+        root (Element): The XML tree of the calcChain.xml.
+        cells (dict): A dictionary of (sheet id, reference) and the `<c>` elements.
+
+    Methods:
+        __init__(self, root): Initializes a new instance of the `CalcChain` class.
+        remove(self, sheet, ref) -> bool: Removes a cell from the calculation chain.
+
+    """
+
+    def __init__(self, root):
+
+        self.root = root
+        self.cells = {}
+
+        sheet = None
+
+        for c in root.iterchildren(f'{XMAIN}c'):
+            # a cell without sheet id belongs to the sheet of its predecessor
+            sheet = c.get('i', sheet)
+            self.cells[(sheet, c.get('r'))] = c
+
+    def __len__(self):
+        return len(self.cells)
+
+    def remove(self, sheet, ref) -> bool:
+
+        """
+        Removes a cell from the calculation chain. Its sheet id and the start of a new dependency level are
+        passed on to the next cell, if that one relies on them.
+
+        Args:
+            sheet (str): The sheet id of the cell.
+            ref (str): The reference of the cell, e.g. 'B3'.
+
+        Returns:
+            bool: True if the cell was included in the calculation chain.
+
+        """
+
+        c = self.cells.pop((str(sheet), ref), None)
+
+        if c is None:
+            return False
+
+        following = c.getnext()
+
+        if (following is not None) and (following.tag == f'{XMAIN}c'):
+            if ('i' in c.attrib) and ('i' not in following.attrib):
+                following.attrib['i'] = c.attrib['i']
+            if (c.get('l') in ('1', 'true')) and ('l' not in following.attrib):
+                following.attrib['l'] = c.attrib['l']
+
+        c.getparent().remove(c)
+
+        return True
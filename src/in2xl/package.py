@@ -0,0 +1,744 @@
+# package.py
+from __future__ import annotations
+from lxml import etree
+import zipfile
+import copy
+import struct
+import shutil
+import time
+import zlib
+import io
+import os
+from .stats import measure, timed
+
+# members larger than this are recompressed as a stream instead of in memory by the thread pool
+_LARGE = 1 << 26
+
+
+def check_compression(compression, level):
+
+    """
+    Checks the compression method and level of an output archive.
+
+    Args:
+        compression (int): `zipfile.ZIP_DEFLATED` or `zipfile.ZIP_STORED`.
+        level (int): The compression level of deflate (0-9) or None for the default level.
+
+    Raises:
+        ValueError: If the method is not supported by Excel or the level is outside of 0-9.
+
+    """
+
+    if compression not in (zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED):
+        raise ValueError(f'Input is outside of the parameters. (ZIP_DEFLATED or ZIP_STORED expected, {compression!r} received)')
+
+    if (level is not None) and ((not isinstance(level, int)) or not (0 <= level <= 9)):
+        raise ValueError(f'Input is outside of the parameters. (0-9 expected, {level!r} received)')
+
+
+def _compress(data, compression, level) -> tuple:
+
+    """
+    Compresses the content of a member.
+
+    Returns:
+        tuple: The compressed content, its CRC and its uncompressed size.
+
+    """
+
+    if compression == zipfile.ZIP_STORED:
+        return data, zlib.crc32(data), len(data)
+
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, -15)
+
+    return compressor.compress(data) + compressor.flush(), zlib.crc32(data), len(data)
+
+
+def _copy(part):
+
+    """
+    Returns an independent copy of a parsed part.
+
+    """
+
+    return part.copy() if hasattr(part, 'copy') else copy.deepcopy(part)
+
+
+class _RawZip:
+
+    """
+    The `_RawZip` class copies compressed bytes between zip archives without decompressing them. It is the only
+    place which uses private attributes of `zipfile` (the file, the lock and the directory of a `ZipFile`). If one
+    of them is missing (another version or implementation of Python), `supported()` returns False and the members
+    are written the public way with `ZipFile.open()`.
+
+    Methods:
+        supported(*archives) -> bool: Returns True if the compressed bytes of the archives can be accessed.
+        set_level(zinfo, level): Sets the compression level of a member written by `ZipFile.open()`.
+        data_offset(myzip, info) -> int: Returns the position of the compressed content of a member.
+        read(myzip, position, size) -> bytes: Reads compressed bytes of an archive.
+        append(newzip, zinfo, chunks): Appends a member with already compressed content to an archive.
+
+    """
+
+    _ATTRIBUTES = ('_lock', 'fp', 'filelist', 'NameToInfo', 'start_dir')
+
+    @staticmethod
+    def supported(*archives) -> bool:
+        return (all(hasattr(myzip, name) for myzip in archives for name in _RawZip._ATTRIBUTES)
+                and hasattr(zipfile.ZipInfo, 'FileHeader') and hasattr(zipfile, 'sizeFileHeader') and hasattr(zipfile, 'stringFileHeader'))
+
+    @staticmethod
+    def set_level(zinfo, level):
+        # the attribute is public since Python 3.13
+        setattr(zinfo, 'compress_level' if hasattr(zinfo, 'compress_level') else '_compresslevel', level)
+
+    @staticmethod
+    def data_offset(myzip, info) -> int:
+
+        """
+        Returns the position of the compressed content of a member, behind its local file header.
+
+        Raises:
+            BadZipFile: If there is no local file header at the offset of the member.
+
+        """
+
+        header = _RawZip.read(myzip, info.header_offset, zipfile.sizeFileHeader)
+
+        if header[:4] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"Bad magic number for file header of '{info.filename}'")
+
+        return info.header_offset + zipfile.sizeFileHeader + sum(struct.unpack('<HH', header[26:30]))
+
+    @staticmethod
+    def read(myzip, position, size) -> bytes:
+
+        """
+        Reads compressed bytes of an archive. The thread pool may read other members at the same time, every
+        access to the file of the archive seeks to its own position while it holds the lock of the archive.
+
+        """
+
+        with myzip._lock:
+            myzip.fp.seek(position)
+            return myzip.fp.read(size)
+
+    @staticmethod
+    def append(newzip, zinfo, chunks):
+
+        """
+        Appends a member with already compressed content to an archive.
+
+        Args:
+            newzip (ZipFile): The new archive.
+            zinfo (ZipInfo): The member including its CRC and sizes.
+            chunks (iterable): The compressed content.
+
+        """
+
+        with newzip._lock:
+            zinfo.header_offset = newzip.fp.tell()
+            newzip.fp.write(zinfo.FileHeader(zip64=max(zinfo.file_size, zinfo.compress_size) > zipfile.ZIP64_LIMIT))
+
+            for chunk in chunks:
+                newzip.fp.write(chunk)
+
+            newzip.filelist.append(zinfo)
+            newzip.NameToInfo[zinfo.filename] = zinfo
+            newzip.start_dir = newzip.fp.tell()
+
+
+class Package:
+
+    """
+    The `Package` class keeps the parts of the temporary Excel archive in memory.
+
+    Every part is read and parsed at most once. Modified parts are only marked as dirty and are
+    written back to the archive in a single pass by `flush()` or directly into a new archive by `write()`.
+    Unchanged members are copied with their already compressed bytes, they are never decompressed.
+    The temporary archive is either a file or, for workbooks loaded from bytes or file objects, a buffer in memory.
+    Parts are stored uncompressed in the temporary archive, they are compressed when the output is written.
+
+    Attributes:
+        temp (str or BytesIO): The path of the temporary archive or the buffer holding it.
+        content (list): A list of all files and directories in the zip archive.
+        parts (dict): A dictionary of part names and their parsed XML trees (or objects providing `tostring()` or `stream()`).
+        dirty (dict): An insertion ordered dictionary of the part names that have to be written back.
+        cache (dict): A dictionary of part names and objects derived from their trees (e.g. indexes).
+        shared (dict): A dictionary of part names and parsed parts of a compiled template, they are copied on first access.
+        depth (int): The number of currently open edit sessions.
+        snapshots (list): The modified parts and their copies at the start of every open edit session.
+        saved (bool): True if the modified parts were written to an output after their last modification.
+        stats (Stats): The attached `Stats` object which measures the reads and writes of the archive, or None.
+        workers (int): The number of threads which serialize and compress modified parts, None for the number of CPUs.
+        compression (int): The default compression method of the output, `zipfile.ZIP_DEFLATED` or `zipfile.ZIP_STORED`.
+        level (int): The default compression level of deflate (0-9), None for the default level of zlib.
+        rewritten (set): The names of the members which were written uncompressed into the temporary archive.
+
+    Methods:
+        __init__(self, temp, content=None, shared=None): Initializes a new instance of the `Package` class.
+        get(self, name, parser=etree.fromstring): Returns the parsed XML tree of a part.
+        add(self, name, part): Registers a part that is not (yet) included in the archive.
+        set(self, name, part=None): Marks a part as modified.
+        begin(self): Opens an edit session.
+        commit(self): Closes an edit session and writes the modified parts unless they were saved.
+        rollback(self): Closes an edit session and discards the modifications made within it.
+        flush(self): Writes all modified parts to the archive.
+        write(self, path, workers=None, compression=None, level=None): Writes the archive including all modified parts to the specified path in one pass.
+        copy(self, path): Copies the archive without the modifications to the specified path.
+
+    """
+
+    def __init__(self, temp, content=None, shared=None):
+
+        self.temp = temp
+        self.parts = {}
+        self.dirty = {}
+        self.cache = {}
+        self.shared = shared or {}
+        self.depth = 0
+        self.snapshots = []
+        self.saved = False
+        self.stats = None
+        self.workers = None
+        self.compression = zipfile.ZIP_DEFLATED
+        self.level = None
+        self.rewritten = set()
+
+        if content is not None:
+            self.content = list(content)
+            return
+
+        with zipfile.ZipFile(self.temp, mode="r") as myzip:
+            self.content = myzip.namelist()
+
+    def __contains__(self, name):
+        return (name in self.parts) or (name in self.content)
+
+    @property
+    def session(self) -> bool:
+        """
+        Returns True if an edit session is open.
+
+        """
+        return self.depth > 0
+
+    def get(self, name, parser=etree.fromstring):
+
+        """
+        Returns the parsed XML tree of a part. The part is only read from the archive on first access,
+        parts of a compiled template are copied instead of being read and parsed again.
+
+        Args:
+            name (str): The name of the part within the archive.
+            parser (callable, optional): The function which parses the content of the part. Defaults to `etree.fromstring`.
+
+        Returns:
+            Element: The parsed XML tree.
+
+        Raises:
+            KeyError: If the part is not included in the archive.
+
+        """
+
+        if name in self.parts:
+            return self.parts[name]
+
+        if name in self.shared:
+            part = self.shared[name]
+            with measure(self.stats, 'copy'):
+                self.parts[name] = _copy(part)
+            return self.parts[name]
+
+        if name not in self.content:
+            raise KeyError(f"There is no item named '{name}' in the archive")
+
+        with measure(self.stats, 'read'):
+            with zipfile.ZipFile(self.temp, mode="r") as myzip:
+                with myzip.open(name) as myfile:
+                    data = myfile.read()
+                    self.parts[name] = parser(data)
+
+        if self.stats is not None:
+            self.stats.count('parts_read')
+            self.stats.count('bytes_read', len(data))
+
+        return self.parts[name]
+
+    def add(self, name, part):
+
+        """
+        Registers a part that is not (yet) included in the archive without marking it as modified.
+
+        Args:
+            name (str): The name of the part within the archive.
+            part (Element): The XML tree of the part.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        self.parts[name] = part
+
+        return self
+
+    def set(self, name, part=None):
+
+        """
+        Marks a part as modified. It will be written to the archive by the next `flush()`.
+
+        Args:
+            name (str): The name of the part within the archive.
+            part (Element, optional): The new XML tree of the part. Defaults to the cached tree.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        if part is not None:
+            self.parts[name] = part
+
+        self.dirty[name] = True
+        self.saved = False
+
+        return self
+
+    def begin(self):
+
+        """
+        Opens an edit session. Modified parts are kept in memory until the session is committed.
+        The parts modified before are copied, so a rollback of a nested session restores them.
+
+        """
+
+        parts = {}
+
+        if self.dirty:
+            with measure(self.stats, 'copy'):
+                parts = {name: _copy(self.parts[name]) for name in self.dirty if name in self.parts}
+
+        self.snapshots.append((dict(self.dirty), parts))
+
+        self.depth += 1
+
+        return self
+
+    def commit(self):
+
+        """
+        Closes an edit session. Leaving the outermost session writes all modified parts to the archive,
+        unless they were saved after their last modification: then they are kept in memory and written
+        with the next modification outside of a session.
+
+        """
+
+        if self.snapshots:
+            self.snapshots.pop()
+
+        self.depth = max(self.depth - 1, 0)
+
+        if not (self.session or self.saved):
+            self.flush()
+
+        return self
+
+    def rollback(self):
+
+        """
+        Closes an edit session and discards every modification made within it. The modifications of
+        outer sessions are restored and these sessions stay open. Without an open session every
+        modification which has not been written yet is discarded.
+
+        """
+
+        dirty, parts = self.snapshots.pop() if self.snapshots else ({}, {})
+
+        self.depth = max(self.depth - 1, 0)
+        # unmodified parts are read again, the indexes are derived from the discarded trees
+        self.parts.clear()
+        self.parts.update(parts)
+        self.dirty.clear()
+        self.dirty.update(dirty)
+        self.cache.clear()
+        self.saved = False
+
+        return self
+
+    @timed('flush')
+    def flush(self):
+
+        """
+        Writes all modified parts to the archive. The archive is rewritten only once, no matter how
+        many parts were modified.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        if not self.dirty:
+            return self
+
+        if self.stats is not None:
+            self.stats.count('archive_rewrites')
+
+        if isinstance(self.temp, io.BytesIO):
+            buffer = io.BytesIO()
+            self.write(buffer, compression=zipfile.ZIP_STORED)
+            # the buffer object is kept, it is shared by all worksheets of the workbook
+            self.temp.seek(0)
+            self.temp.truncate()
+            self.temp.write(buffer.getbuffer())
+            return self.__flushed()
+
+        temp = f'{self.temp}.tmp'
+
+        try:
+            self.write(temp, compression=zipfile.ZIP_STORED)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+        os.replace(temp, self.temp)
+
+        return self.__flushed()
+
+    def __flushed(self):
+
+        """
+        Updates the state of the package after the modified parts were written to the archive.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        for name in self.dirty:
+            if name not in self.content:
+                self.content.append(name)
+            if hasattr(self.parts.get(name), 'stream'):
+                # the streamed cells are included in the archive now
+                del self.parts[name]
+
+        self.rewritten.update(self.dirty)
+        self.dirty.clear()
+
+        return self
+
+    @timed('write')
+    def write(self, path, workers=None, compression=None, level=None):
+
+        """
+        Writes the archive including all modified parts to the specified path in one sequential pass.
+        The members keep their order, modified parts are serialized at the position of the original member
+        and new parts are appended at the end. All other members are copied without recompression, except
+        the members which were written uncompressed into the temporary archive by a previous `flush()`.
+
+        The modified parts are serialized and compressed on a thread pool in advance (lxml and zlib release
+        the GIL), the archive itself is written sequentially, so its order does not depend on the threads.
+
+        Args:
+            path (str or file): The path of the new archive or a writable binary file object.
+            workers (int, optional): The number of threads which serialize and compress the modified parts.
+                Defaults to `self.workers` (None for the number of CPUs), 1 serializes them one after another.
+            compression (int, optional): The compression method of the serialized parts, `zipfile.ZIP_DEFLATED` or
+                `zipfile.ZIP_STORED` (no compression). Defaults to `self.compression`.
+            level (int, optional): The compression level of deflate, from 0 (none) to 9 (best). Defaults to `self.level`.
+
+        Returns:
+            self: The instance of the class.
+
+        Raises:
+            ValueError: If the compression method or level is not supported.
+
+        """
+
+        compression = self.compression if compression is None else compression
+        level = self.level if level is None else level
+
+        check_compression(compression, level)
+
+        with zipfile.ZipFile(self.temp, mode="r") as myzip, \
+                zipfile.ZipFile(path, mode="w", compression=compression, compresslevel=level) as newzip:
+
+            streams = [self.parts[name] for name in self.dirty if hasattr(self.parts[name], 'stream')]
+            # parts which are modified while a worksheet is streamed are written after all streamed parts
+            after = set().union(*(part.after for part in streams))
+            late = []
+
+            infos = myzip.infolist()
+            recompress = {i.filename for i in infos
+                          if (i.filename in self.rewritten) and (i.filename not in self.dirty) and (i.compress_type != compression)}
+
+            names = [name for name in self.dirty if not hasattr(self.parts[name], 'stream') and name not in after]
+            members = [i for i in infos if (i.filename in recompress) and (i.file_size < _LARGE)]
+
+            executor, ready = self.__prepare(myzip, names, members, self.workers if workers is None else workers, compression, level)
+
+            try:
+                for info in infos:
+                    if info.filename in after and info.filename in self.dirty:
+                        late.append(info)
+                    elif info.filename in self.dirty:
+                        self.__write_part(myzip, newzip, info.filename, info, ready.get(info.filename), compression, level)
+                    elif info.filename in recompress:
+                        self.__recompress_member(myzip, newzip, info, ready.get(info.filename), compression, level)
+                    else:
+                        self.__copy_member(myzip, newzip, info)
+
+                for info in late:
+                    self.__write_part(myzip, newzip, info.filename, info, None, compression, level)
+
+                for name in self.dirty:
+                    if name not in self.content:
+                        self.__write_part(myzip, newzip, name, None, ready.get(name), compression, level)
+            finally:
+                if executor is not None:
+                    for future in ready.values():
+                        future.cancel()
+                    executor.shutdown()
+
+            if self.stats is not None:
+                rewritten = len(self.dirty) + len(recompress)
+                self.stats.count('members_rewritten', rewritten)
+                self.stats.count('members_copied', len(newzip.filelist) - rewritten)
+                self.stats.count('bytes_written', sum(i.compress_size for i in newzip.filelist))
+
+        self.saved = True
+
+        return self
+
+    def copy(self, path):
+
+        """
+        Copies the archive without the modifications which have not been flushed.
+
+        Args:
+            path (str or file): The path of the new archive or a writable binary file object.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        if isinstance(self.temp, io.BytesIO):
+            data = self.temp.getbuffer()
+            if isinstance(path, (str, os.PathLike)):
+                with open(path, 'wb') as myfile:
+                    myfile.write(data)
+            else:
+                path.write(data)
+            data.release()
+            return self
+
+        if isinstance(path, (str, os.PathLike)):
+            shutil.copy(self.temp, path)
+        else:
+            with open(self.temp, 'rb') as myfile:
+                shutil.copyfileobj(myfile, path)
+
+        return self
+
+    def __prepare(self, myzip, names, members, workers, compression, level) -> tuple:
+
+        """
+        Submits the serialization and compression of modified parts and the recompression of members to a thread pool.
+
+        Args:
+            myzip (ZipFile): The original archive.
+            names (list): The names of the modified parts.
+            members (list): The members of the original archive which are recompressed.
+            workers (int): The number of threads, None for the number of CPUs.
+            compression (int): The compression method.
+            level (int): The compression level.
+
+        Returns:
+            tuple: The thread pool (None if the parts are serialized when they are written) and a dictionary of
+                part names and the futures of their compressed content.
+
+        """
+
+        workers = min(len(names) + len(members), workers or os.cpu_count() or 1)
+
+        if workers < 2:
+            return None, {}
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(workers, thread_name_prefix='in2xl-save')
+
+        ready = {name: executor.submit(self.__serialize, name, compression, level) for name in names}
+        ready.update({info.filename: executor.submit(lambda i: _compress(myzip.read(i), compression, level), info) for info in members})
+
+        return executor, ready
+
+    def __serialize(self, name, compression=zipfile.ZIP_DEFLATED, level=None) -> tuple:
+
+        """
+        Serializes and compresses a part.
+
+        Args:
+            name (str): The name of the part.
+            compression (int, optional): The compression method. Defaults to `zipfile.ZIP_DEFLATED`.
+            level (int, optional): The compression level. Defaults to None.
+
+        Returns:
+            tuple: The compressed content, its CRC and its uncompressed size.
+
+        """
+
+        part = self.parts[name]
+
+        return _compress(part.tostring() if hasattr(part, 'tostring') else etree.tostring(part), compression, level)
+
+    @timed('serialize')
+    def __write_part(self, myzip, newzip, name, info=None, ready=None, compression=zipfile.ZIP_DEFLATED, level=None):
+
+        """
+        Serializes a modified part into the new archive. Parts providing `stream()` (e.g. `SheetStream`)
+        are streamed from the original member into the new member, they are never held in memory as a whole.
+
+        Args:
+            myzip (ZipFile): The original archive.
+            newzip (ZipFile): The new archive.
+            name (str): The name of the part.
+            info (ZipInfo, optional): The member of the original archive, its date and attributes are kept.
+            ready (Future, optional): The compressed content of the part, if it was prepared by the thread pool.
+            compression (int, optional): The compression method. Defaults to `zipfile.ZIP_DEFLATED`.
+            level (int, optional): The compression level. Defaults to None.
+
+        """
+
+        part = self.parts[name]
+
+        if info is None:
+            zinfo = zipfile.ZipInfo(name, time.localtime(time.time())[:6])
+            zinfo.external_attr = 0o600 << 16
+        else:
+            zinfo = self.__info(info, compression, level)
+
+        zinfo.compress_type = compression
+        _RawZip.set_level(zinfo, level)
+
+        if hasattr(part, 'stream'):
+            with myzip.open(info) as source, newzip.open(zinfo, mode='w', force_zip64=True) as target:
+                part.stream(source, target)
+            if self.stats is not None:
+                self.stats.count('bytes_read', info.file_size)
+            return
+
+        self.__append_compressed(newzip, zinfo, ready.result() if ready is not None else self.__serialize(name, compression, level))
+
+    def __recompress_member(self, myzip, newzip, info, ready, compression, level):
+
+        """
+        Compresses a member which was written uncompressed into the temporary archive.
+
+        Args:
+            myzip (ZipFile): The original archive.
+            newzip (ZipFile): The new archive.
+            info (ZipInfo): The member of the original archive.
+            ready (Future): The compressed content of the member, if it was prepared by the thread pool.
+            compression (int): The compression method.
+            level (int): The compression level.
+
+        """
+
+        zinfo = self.__info(info, compression, level)
+
+        if ready is not None:
+            self.__append_compressed(newzip, zinfo, ready.result())
+            return
+
+        with myzip.open(info) as source, newzip.open(zinfo, mode='w', force_zip64=True) as target:
+            shutil.copyfileobj(source, target, 1 << 20)
+
+    def __append_compressed(self, newzip, zinfo, compressed):
+
+        """
+        Appends a member whose content was compressed in advance to an archive.
+
+        Args:
+            newzip (ZipFile): The new archive.
+            zinfo (ZipInfo): The member.
+            compressed (tuple): The compressed content, its CRC and its uncompressed size.
+
+        """
+
+        data, zinfo.CRC, zinfo.file_size = compressed
+        zinfo.compress_size = len(data)
+
+        if (max(zinfo.file_size, zinfo.compress_size) >= zipfile.ZIP64_LIMIT) or not _RawZip.supported(newzip):
+            # very large parts take the regular way
+            with newzip.open(zinfo, mode='w', force_zip64=True) as target:
+                target.write(data if zinfo.compress_type == zipfile.ZIP_STORED else zlib.decompress(data, -15))
+            return
+
+        _RawZip.append(newzip, zinfo, (data,))
+
+    def __info(self, info, compression, level) -> zipfile.ZipInfo:
+
+        """
+        Returns a new member with the date and the attributes of a member of the original archive.
+
+        """
+
+        zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+        zinfo.create_system = info.create_system
+        zinfo.external_attr = info.external_attr
+        zinfo.compress_type = compression
+        _RawZip.set_level(zinfo, level)
+
+        return zinfo
+
+    def __copy_member(self, myzip, newzip, info):
+
+        """
+        Copies a member with its compressed bytes from one archive to another.
+
+        Args:
+            myzip (ZipFile): The original archive.
+            newzip (ZipFile): The new archive.
+            info (ZipInfo): The member of the original archive.
+
+        """
+
+        if info.flag_bits & 0x01:
+            # encrypted members take the regular way
+            newzip.writestr(info, myzip.read(info), compress_type=info.compress_type)
+            return
+
+        if (max(info.file_size, info.compress_size) >= zipfile.ZIP64_LIMIT) or not _RawZip.supported(myzip, newzip):
+            # very large members are decompressed and compressed again, as all members if the compressed bytes
+            # of the archives can not be accessed
+            with myzip.open(info) as source, newzip.open(self.__info(info, info.compress_type, None), mode='w', force_zip64=True) as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            return
+
+        # skip the local file header of the original member
+        start = _RawZip.data_offset(myzip, info)
+
+        zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+        zinfo.compress_type = info.compress_type
+        zinfo.create_system = info.create_system
+        zinfo.external_attr = info.external_attr
+        zinfo.flag_bits = info.flag_bits & ~0x08  # sizes and CRC are known, no data descriptor is needed
+        zinfo.CRC = info.CRC
+        zinfo.compress_size = info.compress_size
+        zinfo.file_size = info.file_size
+
+        def chunks():
+            position, remaining = start, info.compress_size
+            while remaining > 0:
+                chunk = _RawZip.read(myzip, position, min(remaining, 1 << 20))
+                if not chunk:
+                    raise zipfile.BadZipFile(f"Truncated member '{info.filename}'")
+                yield chunk
+                position += len(chunk)
+                remaining -= len(chunk)
+
+        _RawZip.append(newzip, zinfo, chunks())
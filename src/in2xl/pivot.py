@@ -0,0 +1,250 @@
+# pivot.py
+from __future__ import annotations
+from lxml import etree
+from .sheetindex import XMAIN
+from .utils import check_text
+
+_RECORDS = b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+
+def _escape(text: str) -> str:
+
+    """
+    Escapes a text for an attribute value.
+
+    """
+
+    check_text(text)
+
+    return (text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+            .replace('\n', '&#10;').replace('\r', '&#13;').replace('\t', '&#9;'))
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class PivotRecords:
+
+    """
+    The `PivotRecords` class writes the records of a pivot cache (pivotCacheRecords.xml) from the columns of a
+    DataFrame. Every field is held as an array (the codes of its shared items or its values) and the records are
+    serialized in chunks while the part is written, so the records never exist as a tree and the memory needed
+    does not depend on the number of records.
+
+    Attributes:
+        fields (list): The fields of a record, tuples of (kind, array, tokens): kind 'x' for the codes of shared
+            items (tokens holds the `<x>` element of every code), 'i' for whole numbers, 'n' for other numbers
+            and 'd' for dates.
+        count (int): The number of records.
+        after (set): The names of the parts that are modified while the records are written (none).
+        chunk (int): The number of records serialized at once.
+
+    Methods:
+        __init__(self, fields, count, chunk=8192): Initializes a new instance of the `PivotRecords` class.
+        copy(self) -> PivotRecords: Returns a copy of the instance.
+        stream(self, source, target): Writes the records to `target`, the original part is not read.
+        tostring(self) -> bytes: Serializes all records.
+
+    """
+
+    def __init__(self, fields, count, chunk=8192):
+
+        self.fields = fields
+        self.count = count
+        self.after = set()
+        self.chunk = chunk
+
+    def __tokens(self, field, start, stop) -> list:
+
+        """
+        Returns the elements of one field for a chunk of records.
+
+        """
+
+        import numpy as np
+
+        kind, values, tokens = field
+        values = values[start:stop]
+
+        if kind == 'x':
+            return tokens[values].tolist()
+
+        if kind == 'd':
+            texts = np.datetime_as_string(values, unit='s').tolist()
+            return ['<m/>' if v == 'NaT' else f'<d v="{v}"/>' for v in texts]
+
+        missing = np.isnan(values)
+
+        if kind == 'i':
+            texts = np.where(missing, 0, values).astype(np.int64).astype(str).tolist()
+        else:
+            texts = [_number(v) for v in values.tolist()]
+
+        return ['<m/>' if m else f'<n v="{v}"/>' for v, m in zip(texts, missing.tolist())]
+
+    def copy(self) -> PivotRecords:
+
+        """
+        Returns a copy of the instance. The arrays of the fields are shared, they are never modified.
+
+        Returns:
+            PivotRecords: The copy of the instance.
+
+        """
+
+        return PivotRecords(list(self.fields), self.count, self.chunk)
+
+    def stream(self, source, target):
+
+        """
+        Writes the records chunk by chunk.
+
+        Args:
+            source (file): The original part, it is not read.
+            target (file): A writable binary file object for the new part.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        target.write(_RECORDS + f'<pivotCacheRecords xmlns="{XMAIN[1:-1]}" count="{self.count}">'.encode())
+
+        for start in range(0, self.count, self.chunk):
+            stop = min(start + self.chunk, self.count)
+            columns = [self.__tokens(field, start, stop) for field in self.fields]
+            target.write(''.join(['<r>' + ''.join(record) + '</r>' for record in zip(*columns)]).encode())
+
+        target.write(b'</pivotCacheRecords>')
+
+        return self
+
+    def tostring(self) -> bytes:
+
+        """
+        Serializes all records.
+
+        Returns:
+            bytes: The content of the pivotCacheRecords.xml.
+
+        """
+
+        import io
+
+        buffer = io.BytesIO()
+        self.stream(None, buffer)
+
+        return buffer.getvalue()
+
+
+def refresh_cache(definition, data, axis=()) -> PivotRecords:
+
+    """
+    Rewrites the cache fields of a pivot cache definition from the columns of a DataFrame and returns the
+    records. The columns are matched by the names of the cache fields. Text, boolean and axis fields get
+    shared items (in the order of their first occurrence, built with `pd.factorize`), other numeric and date
+    fields only their range.
+
+    Args:
+        definition (Element): The XML tree of the pivotCacheDefinition.xml.
+        data (pd.DataFrame): The source data of the pivot cache.
+        axis (set, optional): The indexes of the cache fields which are used as row, column or page fields
+            and need shared items. Defaults to ().
+
+    Returns:
+        PivotRecords: The records of the pivot cache.
+
+    Raises:
+        ValueError: If a cache field is missing in the DataFrame or uses grouping.
+
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    fields = []
+    cache_fields = definition.find(f'{XMAIN}cacheFields')
+
+    for i, field in enumerate(cache_fields.iterchildren(f'{XMAIN}cacheField')):
+        # calculated fields are not part of the records
+        if ('formula' in field.attrib) or (field.attrib.get('databaseField') == '0'):
+            continue
+
+        name = field.attrib['name']
+
+        if name not in data.columns:
+            raise ValueError(f'the field [{name}] of the pivot cache is missing, received columns: {list(data.columns)}')
+
+        if field.find(f'{XMAIN}fieldGroup') is not None:
+            raise ValueError(f'the field [{name}] of the pivot cache is grouped, grouped fields can not be refreshed')
+
+        items = field.find(f'{XMAIN}sharedItems')
+
+        if items is None:
+            items = etree.SubElement(field, f'{XMAIN}sharedItems')
+
+        shared = (i in axis) or (len(items) > 0)
+
+        items.attrib.clear()
+        for child in list(items):
+            items.remove(child)
+
+        column = data[name]
+        kind = column.dtype.kind
+        attrib = {}
+
+        if kind in 'iuf':
+            values = column.to_numpy(dtype=float, na_value=np.nan)
+            valid = values[~np.isnan(values)]
+            attrib = {'containsSemiMixedTypes': '0', 'containsString': '0', 'containsNumber': '1'}
+            if len(valid) and (np.mod(valid, 1) == 0).all():
+                attrib['containsInteger'] = '1'
+            if len(valid):
+                attrib['minValue'], attrib['maxValue'] = _number(float(valid.min())), _number(float(valid.max()))
+            token, text = 'n', lambda v: _number(float(v))
+
+        elif kind == 'M':
+            stamps = column.dt.tz_localize(None) if getattr(column.dt, 'tz', None) is not None else column
+            values = stamps.to_numpy(dtype='datetime64[s]')
+            valid = values[~np.isnat(values)]
+            attrib = {'containsSemiMixedTypes': '0', 'containsNonDate': '0', 'containsDate': '1', 'containsString': '0'}
+            if len(valid):
+                attrib['minDate'], attrib['maxDate'] = np.datetime_as_string(np.array([valid.min(), valid.max()]), unit='s')
+            token, text = 'd', lambda v: np.datetime_as_string(np.datetime64(v, 's'), unit='s')
+
+        elif kind == 'b':
+            shared = True
+            values = column.to_numpy()
+            token, text = 'b', lambda v: '1' if v else '0'
+
+        else:
+            shared = True
+            values = column.to_numpy(dtype=object)
+            token, text = 's', lambda v: _escape(str(v))
+
+        if shared:
+            codes, uniques = pd.factorize(values, use_na_sentinel=True)
+            tokens = [f'<{token} v="{text(v)}"/>' for v in uniques.tolist()]
+
+            if (codes < 0).any():
+                # missing values are a shared item of their own
+                codes = np.where(codes < 0, len(tokens), codes)
+                tokens.append('<m/>')
+                attrib['containsBlank'] = '1'
+
+            attrib['count'] = str(len(tokens))
+            items.extend(etree.fromstring(f'<i xmlns="{XMAIN[1:-1]}">{"".join(tokens)}</i>'))
+
+            fields.append(('x', codes, np.array([f'<x v="{j}"/>' for j in range(len(tokens))], dtype=object)))
+
+        else:
+            if len(valid) < len(values):
+                attrib['containsBlank'] = '1'
+            if attrib.get('containsInteger'):
+                token = 'i'
+            fields.append((token, values, None))
+
+        items.attrib.update(attrib)
+
+    return PivotRecords(fields, len(data))
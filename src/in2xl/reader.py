@@ -0,0 +1,264 @@
+# reader.py
+from __future__ import annotations
+from lxml import etree
+import re
+from .sheetindex import XMAIN
+from .convert import EPOCH
+from .utils import column_index
+
+# built-in number formats of dates and times (including the localized ones of East Asian versions)
+_DATE_FORMATS = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | set(range(50, 59))
+
+# quoted texts, escaped characters and sections like [Red] or [$-409] do not make a format a date format
+_LITERALS = re.compile(r'"[^"]*"|\\.|\[[^\]]*\]')
+_DATE_CODES = re.compile(r'[dmyhs]')
+
+
+def date_styles(styles) -> list:
+
+    """
+    Returns which cell formats (`<cellXfs>` of the styles.xml) display numbers as dates or times.
+
+    Args:
+        styles (Element): The XML tree of the styles.xml or None.
+
+    Returns:
+        list: A boolean per cell format, True for date and time formats.
+
+    """
+
+    if styles is None:
+        return []
+
+    custom = {}
+
+    for fmt in styles.iterfind(f'{XMAIN}numFmts/{XMAIN}numFmt'):
+        code = _LITERALS.sub('', fmt.attrib.get('formatCode', '')).lower()
+        custom[int(fmt.attrib['numFmtId'])] = bool(_DATE_CODES.search(code))
+
+    dates = []
+
+    for xf in styles.iterfind(f'{XMAIN}cellXfs/{XMAIN}xf'):
+        fmt = int(xf.attrib.get('numFmtId', 0))
+        dates.append(custom.get(fmt, fmt in _DATE_FORMATS))
+
+    return dates
+
+
+def iter_rows(source):
+
+    """
+    Yields the `<row>` elements of a worksheet from a readable binary file object. The worksheet is parsed
+    with `etree.iterparse`, every row is released after it was processed, so no tree of the worksheet is built.
+
+    Args:
+        source (file): A readable binary file object of the worksheet.
+
+    Yields:
+        Element: The element of a row.
+
+    """
+
+    for _, el in etree.iterparse(source, tag=f'{XMAIN}row', huge_tree=True):
+        yield el
+
+        el.clear(keep_tail=False)
+        parent = el.getparent()
+        while el.getprevious() is not None:
+            del parent[0]
+
+
+def rows_to_frame(rows, strings=None, dates=(), bounds=None, header=True):
+
+    """
+    Builds a DataFrame from the rows of a worksheet. The values are collected per type in flat lists and
+    the columns are assembled as NumPy arrays at the end: numeric columns become float (or int, if they hold
+    whole numbers only), columns whose numbers all have a date format become datetime, all other columns object.
+
+    Args:
+        rows (iterable): The `<row>` elements of the worksheet in the order of the sheet.
+        strings (SharedStrings, optional): The shared string table. Defaults to None.
+        dates (list, optional): A boolean per cell format, True for date formats (see `date_styles()`). Defaults to ().
+        bounds (tuple, optional): The first row, first column, last row and last column to read. Defaults to None
+            (the range of all cells with a value).
+        header (bool, optional): True to use the first row of the range as column labels. Defaults to True.
+
+    Returns:
+        pd.DataFrame: The values of the range.
+
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    row0, col0, row1, col1 = bounds if bounds is not None else (1, 1, None, None)
+
+    # numbers as texts of their <v> element, all other values as Python objects
+    n_rows, n_cols, n_texts, n_dates = [], [], [], []
+    o_rows, o_cols, o_values = [], [], []
+
+    shared = strings.strings if strings is not None else []
+    rich = {}
+
+    c_tag, v_tag, is_tag, t_tag = f'{XMAIN}c', f'{XMAIN}v', f'{XMAIN}is', f'{XMAIN}t'
+    runs = f'{XMAIN}r/{XMAIN}t'
+    digits = '$0123456789'
+    # column letters of the cell references and their numbers
+    names = {}
+    last = 0
+
+    for ws_row in rows:
+        r = ws_row.get('r')
+        r = int(r) if r is not None else last + 1
+        last = r
+
+        if r < row0:
+            continue
+        if (row1 is not None) and (r > row1):
+            break
+
+        column = 0
+
+        for c in ws_row:
+            if c.tag != c_tag:
+                continue
+
+            ref = c.get('r')
+
+            if ref is None:
+                column += 1
+            else:
+                name = ref.rstrip(digits)
+                column = names.get(name)
+                if column is None:
+                    column = names[name] = column_index(name.lstrip('$'))
+
+            if (column < col0) or ((col1 is not None) and (column > col1)):
+                continue
+
+            t = c.get('t', 'n')
+
+            if t == 'inlineStr':
+                node = c.find(is_tag)
+                if node is None:
+                    continue
+                o_rows.append(r)
+                o_cols.append(column)
+                # plain text or rich text runs, phonetic runs are skipped
+                o_values.append(''.join(i.text or '' for path in (t_tag, runs) for i in node.iterfind(path)))
+                continue
+
+            # the children are walked directly, `findtext()` takes a detour through ElementPath
+            v = None
+            for child in c:
+                if child.tag == v_tag:
+                    v = child.text
+
+            if not v:
+                continue
+
+            if t == 'n':
+                s = int(c.get('s', 0))
+                n_rows.append(r)
+                n_cols.append(column)
+                n_texts.append(v)
+                n_dates.append((s < len(dates)) and dates[s])
+                continue
+
+            if t == 's':
+                idx = int(v)
+                value = shared[idx]
+                if not isinstance(value, str):
+                    if idx not in rich:
+                        rich[idx] = strings.text(idx)
+                    value = rich[idx]
+            elif t == 'b':
+                value = v == '1'
+            elif t == 'd':
+                value = pd.Timestamp(v)
+            else:
+                # formula strings ('str') and errors ('e')
+                value = v
+
+            o_rows.append(r)
+            o_cols.append(column)
+            o_values.append(value)
+
+    if bounds is None:
+        if not (n_rows or o_rows):
+            return pd.DataFrame()
+        row0, col0 = min(n_rows + o_rows), min(n_cols + o_cols)
+        row1, col1 = max(n_rows + o_rows), max(n_cols + o_cols)
+
+    height, width = row1 - row0 + 1, col1 - col0 + 1
+
+    n_r = np.asarray(n_rows, dtype=np.int64) - row0
+    n_c = np.asarray(n_cols, dtype=np.int64) - col0
+    n_v = np.array(n_texts, dtype=float)
+    n_d = np.asarray(n_dates, dtype=bool)
+
+    o_r = np.asarray(o_rows, dtype=np.int64) - row0
+    o_c = np.asarray(o_cols, dtype=np.int64) - col0
+    o_v = np.empty(len(o_values), dtype=object)
+    o_v[:] = o_values
+
+    first = 1 if header else 0
+    labels = [None] * width
+
+    if header:
+        for j, value in zip(n_c[n_r == 0].tolist(), n_v[n_r == 0].tolist()):
+            labels[j] = int(value) if value.is_integer() else value
+        for j, value in zip(o_c[o_r == 0].tolist(), o_v[o_r == 0].tolist()):
+            labels[j] = value
+
+    labels = [f'Unnamed: {j}' if label is None else label for j, label in enumerate(labels)]
+
+    n_sel, o_sel = n_r >= first, o_r >= first
+    n_r, n_c, n_v, n_d = n_r[n_sel] - first, n_c[n_sel], n_v[n_sel], n_d[n_sel]
+    o_r, o_c, o_v = o_r[o_sel] - first, o_c[o_sel], o_v[o_sel]
+
+    size = height - first
+
+    # the cells are grouped by column once, every column is then filled by slices
+    n_order, o_order = np.argsort(n_c, kind='stable'), np.argsort(o_c, kind='stable')
+    n_cuts = np.searchsorted(n_c[n_order], np.arange(width + 1))
+    o_cuts = np.searchsorted(o_c[o_order], np.arange(width + 1))
+
+    columns = {}
+
+    for j in range(width):
+        n_j = n_order[n_cuts[j]:n_cuts[j + 1]]
+        o_j = o_order[o_cuts[j]:o_cuts[j + 1]]
+        rows_j, values_j = n_r[n_j], n_v[n_j]
+
+        if len(n_j) and n_d[n_j].all():
+            values_j = np.datetime64(EPOCH, 'ms') + np.round(values_j * 86400000).astype('timedelta64[ms]')
+            column = np.full(size, np.datetime64('NaT'), dtype='datetime64[ms]')
+        else:
+            column = np.full(size, np.nan)
+
+        column[rows_j] = values_j
+
+        if len(o_j):
+            values = o_v[o_j]
+
+            if (not len(n_j)) and (len(o_j) == size) and all(isinstance(i, bool) for i in values):
+                column = values.astype(bool)
+            else:
+                missing = np.ones(size, dtype=bool)
+                missing[rows_j] = False
+                missing[o_r[o_j]] = False
+
+                column = column.astype(object)
+                column[o_r[o_j]] = values
+                column[missing] = np.nan
+
+        elif (column.dtype.kind == 'f') and size and (len(n_j) == size) and (np.mod(column, 1) == 0).all():
+            column = column.astype(np.int64)
+
+        columns[j] = column
+
+    frame = pd.DataFrame(columns, index=pd.RangeIndex(size))
+    frame.columns = labels
+
+    return frame
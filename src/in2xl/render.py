@@ -0,0 +1,117 @@
+# render.py
+from __future__ import annotations
+import os
+from .workbook import Workbook
+from .cache import Template
+
+# the template of a worker process, it is transferred once per process by the initializer
+_TEMPLATE = None
+
+
+def _render(template, output, inserts, options):
+
+    """
+    Renders one output of a template. All inserts are applied in one edit session and the output is
+    written in a single pass, the temporary archive itself is never rewritten.
+
+    Args:
+        template (Template): The compiled template.
+        output (str or file): The path or the file object of the output, None to return its content.
+        inserts (list): The inserts as tuples of (sheet, anchor, data) or (sheet, anchor, data, options).
+        options (dict): The keyword arguments of `load_workbook`.
+
+    Returns:
+        The path or the file object of the output, or its content as bytes.
+
+    """
+
+    wb = Workbook().load_workbook(template, **options)
+
+    wb.package.begin()
+
+    try:
+        wb.insert_many(inserts)
+
+        if output is None:
+            return wb.save_bytes()
+
+        return wb.save(output)
+
+    finally:
+        # the modifications are only needed for the output
+        wb.package.rollback()
+        wb.close()
+
+
+def _init(template, options):
+
+    """
+    Compiles the template once in the worker process.
+
+    """
+
+    global _TEMPLATE
+
+    _TEMPLATE = Template(template), options
+
+
+def _job(job):
+
+    """
+    Renders one job within a worker process.
+
+    """
+
+    template, options = _TEMPLATE
+    output, inserts = job
+
+    return _render(template, output, inserts, options)
+
+
+def render_many(template, jobs, processes: int = None, chunksize: int = 1, **options) -> list:
+
+    """
+    Renders one template into many outputs. The template is read once and transferred once to every
+    worker process, where it is compiled once. Each job is loaded from the compiled template (no temporary files)
+    and written with a single pass save.
+
+    Example:
+        jobs = [(f'{name}.xlsx', [('Data', 'B3', df), ('Data', (1, 1), name)]) for name, df in customers.items()]
+        in2xl.render_many('template.xlsx', jobs, processes=4)
+
+    Args:
+        template (str, bytes or file): The path of the template, its content or a readable binary file object.
+        jobs (iterable): The jobs as tuples of (output, inserts).
+            `output` is the path of the output (a file object only if the jobs are rendered in the current process),
+            None to return its content as bytes.
+            `inserts` is a list of tuples of (sheet, anchor, data) or (sheet, anchor, data, options), where `anchor` is
+            a cell reference like 'B3' or a tuple of (row, column) and `options` a dictionary of keyword arguments of `insert()`.
+        processes (int, optional): The number of worker processes. Defaults to the number of CPUs,
+            0 or 1 renders all jobs in the current process.
+        chunksize (int, optional): The number of jobs which are sent to a worker process at once. Defaults to 1.
+        **options: Keyword arguments of `load_workbook` (e.g. `stream` or `strings`).
+
+    Returns:
+        list: The results of the jobs in their order, the path or file object of the output, or its content as bytes.
+
+    """
+
+    if isinstance(template, (str, os.PathLike)):
+        with open(template, 'rb') as myfile:
+            template = myfile.read()
+    elif hasattr(template, 'read'):
+        template = template.read()
+
+    template = bytes(template)
+    jobs = list(jobs)
+
+    processes = os.cpu_count() if processes is None else processes
+
+    if (processes <= 1) or (len(jobs) <= 1):
+        compiled = Template(template)
+        return [_render(compiled, output, inserts, options) for output, inserts in jobs]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(min(processes, len(jobs)), initializer=_init, initargs=(template, options)) as executor:
+        return list(executor.map(_job, jobs, chunksize=chunksize))
@@ -0,0 +1,273 @@
+# sharedstrings.py
+from __future__ import annotations
+from lxml import etree
+import copy
+from .utils import check_text
+
+XMAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+class SharedStrings:
+
+    """
+    The `SharedStrings` class represents the shared string table (xl/sharedStrings.xml) of an Excel workbook.
+
+    The table is held as a list of entries and a dictionary which maps every plain string to its index,
+    so looking up and adding a string takes constant time. Entries with rich text or phonetic runs are kept
+    verbatim as serialized XML and are never matched against plain strings.
+
+    Attributes:
+        strings (list): The entries of the table, `str` for plain strings and `bytes` for rich text entries.
+        index (dict): A dictionary of plain strings and their index within the table.
+        count (int): The total number of references to the table (`count` attribute).
+        changed (bool): True if the table was modified since it was last marked to be written.
+
+    Methods:
+        fromstring(cls, xml) -> SharedStrings: Parses the content of a sharedStrings.xml.
+        add(self, value, count=1) -> int: Returns the index of a string and adds it to the table if necessary.
+        compact(self, counts) -> list: Removes unreferenced and duplicate entries and sets the count of references.
+        text(self, idx) -> str: Returns the text of an entry.
+        copy(self) -> SharedStrings: Returns an independent copy of the table.
+        tostring(self) -> bytes: Serializes the table.
+
+    """
+
+    def __init__(self, root=None):
+
+        if root is None:
+            root = etree.Element(f'{XMAIN}sst', nsmap={None: XMAIN.strip('{}')})
+
+        self.strings = []
+        self.index = {}
+        self.count = int(root.attrib.get('count', 0))
+        self.changed = False
+
+        ns = etree.QName(root).namespace
+        self._si = etree.QName(ns, 'si').text
+        self._t = etree.QName(ns, 't').text
+        self._rph = etree.QName(ns, 'rPh').text
+
+        for si in root.iterchildren(self._si):
+            if (len(si) == 1) and (si[0].tag == self._t):
+                value = si[0].text or ''
+                self.index.setdefault(value, len(self.strings))
+                self.strings.append(value)
+            else:
+                self.strings.append(etree.tostring(si))
+
+        # keep everything except the entries (attributes, namespaces, extLst) for serialization
+        self._tail = [etree.tostring(e) for e in root if e.tag != self._si]
+        for e in list(root):
+            root.remove(e)
+        root.text = None
+        self._root = root
+
+        prefix = f'{root.prefix}:' if root.prefix else ''
+        self._open = f'<{prefix}si><{prefix}t>'.encode()
+        self._open_space = f'<{prefix}si><{prefix}t xml:space="preserve">'.encode()
+        self._close = f'</{prefix}t></{prefix}si>'.encode()
+
+    @classmethod
+    def fromstring(cls, xml) -> SharedStrings:
+
+        """
+        Parses the content of a sharedStrings.xml.
+
+        Args:
+            xml (bytes): The content of the sharedStrings.xml.
+
+        Returns:
+            SharedStrings: The shared string table.
+
+        """
+
+        return cls(etree.fromstring(xml))
+
+    def __len__(self):
+        return len(self.strings)
+
+    def add(self, value, count=1) -> int:
+
+        """
+        Returns the index of a string within the table. If the string is not included, it is appended.
+
+        Args:
+            value (str): The string.
+            count (int, optional): The number of new references to the string. Defaults to 1.
+
+        Returns:
+            int: The index number of the string within the table.
+
+        Raises:
+            ValueError: If the string contains characters which are not allowed in XML.
+
+        """
+
+        self.count += count
+        self.changed = True
+
+        idx = self.index.get(value)
+
+        if idx is None:
+            check_text(value)
+            idx = self.index[value] = len(self.strings)
+            self.strings.append(value)
+
+        return idx
+
+    def compact(self, counts) -> list:
+
+        """
+        Removes the entries which are not referenced anymore, merges plain strings which are included several
+        times and sets `count` to the number of references.
+
+        Args:
+            counts (sequence): The number of references of every entry, by index.
+
+        Returns:
+            list: The new index of every entry, None for removed entries.
+
+        """
+
+        mapping = [None] * len(self.strings)
+        strings = []
+        index = {}
+
+        for idx, value in enumerate(self.strings):
+            if (idx >= len(counts)) or not counts[idx]:
+                continue
+
+            if isinstance(value, str):
+                if value in index:
+                    mapping[idx] = index[value]
+                    continue
+                index[value] = len(strings)
+
+            mapping[idx] = len(strings)
+            strings.append(value)
+
+        self.strings = strings
+        self.index = index
+        self.count = int(sum(counts))
+        self.changed = True
+
+        return mapping
+
+    def copy(self) -> SharedStrings:
+
+        """
+        Returns an independent copy of the table.
+
+        Returns:
+            SharedStrings: The copy of the table.
+
+        """
+
+        new = copy.copy(self)
+        new.strings = list(self.strings)
+        new.index = dict(self.index)
+        new._tail = list(self._tail)
+        new._root = copy.deepcopy(self._root)
+
+        return new
+
+    def text(self, idx) -> str:
+
+        """
+        Returns the text of an entry, the runs of rich text entries are concatenated.
+
+        Args:
+            idx (int): The index number of the entry.
+
+        Returns:
+            str: The text of the entry.
+
+        """
+
+        value = self.strings[idx]
+
+        if isinstance(value, str):
+            return value
+
+        si = etree.fromstring(value)
+
+        return ''.join(t.text or '' for t in si.iter(self._t) if t.getparent().tag != self._rph)
+
+    def tostring(self) -> bytes:
+
+        """
+        Serializes the table.
+
+        Returns:
+            bytes: The content of the sharedStrings.xml.
+
+        """
+
+        self._root.attrib['count'] = str(max(self.count, len(self.strings)))
+        self._root.attrib['uniqueCount'] = str(len(self.strings))
+        self._root.text = 'SPLIT'
+        head, foot = etree.tostring(self._root).rsplit(b'SPLIT', 1)
+        self._root.text = None
+
+        body = []
+        for value in self.strings:
+            if not isinstance(value, str):
+                body.append(value)
+                continue
+
+            text = value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('\r', '&#13;').encode()
+
+            if value[:1].isspace() or value[-1:].isspace():
+                body += [self._open_space, text, self._close]
+            else:
+                body += [self._open, text, self._close]
+
+        return b''.join([head] + body + self._tail + [foot])
+
+
+def string_refs(rows) -> list:
+
+    """
+    Returns the shared string indexes referenced by the cells (`t="s"`) of worksheet rows.
+
+    Args:
+        rows (iterable): The `<row>` elements.
+
+    Returns:
+        list: The index of every reference.
+
+    """
+
+    c_tag, v_tag = f'{XMAIN}c', f'{XMAIN}v'
+    refs = []
+
+    for ws_row in rows:
+        for c in ws_row:
+            if (c.tag != c_tag) or (c.get('t') != 's'):
+                continue
+            for child in c:
+                if (child.tag == v_tag) and child.text:
+                    refs.append(int(child.text))
+
+    return refs
+
+
+def remap_refs(ws_row, mapping):
+
+    """
+    Renumbers the shared string references of the cells of a row.
+
+    Args:
+        ws_row (Element): The element of the row.
+        mapping (list): The new index of every entry (see `SharedStrings.compact()`).
+
+    """
+
+    c_tag, v_tag = f'{XMAIN}c', f'{XMAIN}v'
+
+    for c in ws_row:
+        if (c.tag != c_tag) or (c.get('t') != 's'):
+            continue
+        for child in c:
+            if (child.tag == v_tag) and child.text and (int(child.text) < len(mapping)):
+                child.text = str(mapping[int(child.text)])
@@ -0,0 +1,524 @@
+# sheetindex.py
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from lxml import etree
+from .utils import column_name, split_ref
+
+XMAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+XDSGN = "http://schemas.microsoft.com/office/spreadsheetml/2009/9/ac"
+XSPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+
+def set_cell(ws_column, t, text) -> bool:
+
+    """
+    Writes a value into the element of a cell. An inline string of the cell is replaced and a formula is
+    removed, since its result is overwritten by the value.
+
+    Args:
+        ws_column (Element): The element of the cell.
+        t (str): The type of the cell ('s' for shared strings, 'inlineStr' for inline strings, 'b' for booleans),
+            None for numbers.
+        text (str): The text of the `<v>` element (of the `<is><t>` element for inline strings).
+
+    Returns:
+        bool: True if a formula was removed from the cell.
+
+    """
+
+    if t is not None:
+        ws_column.attrib['t'] = t
+    elif 't' in ws_column.attrib:
+        ws_column.attrib.pop('t')
+
+    ws_value = ws_formula = None
+
+    for child in list(ws_column):
+        if child.tag == f'{XMAIN}v':
+            ws_value = child
+        elif child.tag == f'{XMAIN}f':
+            ws_formula = child
+        elif child.tag == f'{XMAIN}is':
+            ws_column.remove(child)
+
+    if t == 'inlineStr':
+        if ws_value is not None:
+            ws_column.remove(ws_value)
+
+        ws_text = etree.SubElement(etree.SubElement(ws_column, f'{XMAIN}is'), f'{XMAIN}t')
+        ws_text.text = text
+
+        if text[:1].isspace() or text[-1:].isspace():
+            ws_text.attrib[XSPACE] = 'preserve'
+
+    else:
+        if ws_value is None:
+            ws_value = etree.SubElement(ws_column, f'{XMAIN}v')
+
+        ws_value.text = text
+
+    if ws_formula is None:
+        return False
+
+    ws_column.remove(ws_formula)
+
+    return True
+
+
+def clear_cell(ws_column) -> bool:
+
+    """
+    Removes the value, the inline string and the formula of a cell, its style is kept.
+
+    Args:
+        ws_column (Element): The element of the cell.
+
+    Returns:
+        bool: True if a formula was removed from the cell.
+
+    """
+
+    for name in ('t', 'cm', 'vm'):
+        ws_column.attrib.pop(name, None)
+
+    formula = False
+
+    for child in list(ws_column):
+        if child.tag in (f'{XMAIN}v', f'{XMAIN}f', f'{XMAIN}is'):
+            formula = formula or (child.tag == f'{XMAIN}f')
+            ws_column.remove(child)
+
+    return formula
+
+
+class SheetIndex:
+
+    """
+    The `SheetIndex` class is a sorted index of the rows and cells within the `<sheetData>` element of a worksheet.
+
+    The row index is built on first access, the index of the cells of a row when the row is touched for the
+    first time. Both are kept up to date when rows or cells are created, so locating or creating a cell
+    takes O(log n) instead of a search over the whole sheet.
+
+    Attributes:
+        tree (Element): The XML tree of the worksheet.
+        data (Element): The `<sheetData>` element of the worksheet.
+        created (int): The number of cells created since the index was built.
+        formulas (FormulaIndex): The index of the formulas of the worksheet, built on first use, or None.
+
+    Methods:
+        __init__(self, tree): Initializes a new instance of the `SheetIndex` class.
+        row(self, row, create=True) -> tuple: Returns the element of a row.
+        cell(self, row, column, create=True) -> tuple: Returns the element of a cell.
+        rows(self, targets) -> list: Returns the elements of several rows, missing rows are created in one pass.
+        cells(self, row, targets) -> list: Returns the elements of several cells of a row, missing cells are created in one pass.
+        clear(self, row, column, last_row, last_column, keep_styles=True) -> list: Clears the cells of a rectangular range.
+        bounds(self) -> tuple: Returns the range of all cells of the worksheet.
+
+    """
+
+    def __init__(self, tree):
+
+        self.tree = tree
+        self.data = tree.find(f'{XMAIN}sheetData')
+
+        self._numbers = None
+        self._rows = None
+        self._cells = {}
+
+        self.created = 0
+        self.formulas = None
+
+    def __len__(self):
+        return len(self.__numbers())
+
+    def __numbers(self):
+
+        """
+        Builds the row index on first access.
+
+        Returns:
+            list: The sorted list of row numbers.
+
+        """
+
+        if self._numbers is not None:
+            return self._numbers
+
+        numbers = []
+        rows = {}
+        last = 0
+
+        for row in self.data.iterchildren(f'{XMAIN}row'):
+            if 'r' in row.attrib:
+                last = int(row.attrib['r'])
+            else:
+                # rows without reference follow their predecessor
+                last += 1
+                row.attrib['r'] = str(last)
+            numbers.append(last)
+            rows[last] = row
+
+        numbers.sort()
+
+        self._numbers = numbers
+        self._rows = rows
+
+        return self._numbers
+
+    def __columns(self, row, ws_row):
+
+        """
+        Builds the index of the cells of a row on first access.
+
+        Args:
+            row (int): The row number.
+            ws_row (Element): The element of the row.
+
+        Returns:
+            tuple: The sorted list of column numbers and a dictionary of column numbers and cell elements.
+
+        """
+
+        if row in self._cells:
+            return self._cells[row]
+
+        columns = []
+        cells = {}
+        last = 0
+
+        for c in ws_row.iterchildren(f'{XMAIN}c'):
+            if 'r' in c.attrib:
+                last = split_ref(c.attrib['r'])[1]
+            else:
+                last += 1
+                c.attrib['r'] = f'{column_name(last)}{row}'
+            columns.append(last)
+            cells[last] = c
+
+        columns.sort()
+
+        self._cells[row] = columns, cells
+
+        return self._cells[row]
+
+    def row(self, row, create=True) -> tuple:
+
+        """
+        Returns the element of a row. A missing row is created at its sorted position and takes over the
+        attributes of its nearest neighbour.
+
+        Args:
+            row (int): The row number.
+            create (bool, optional): True to create the row if it does not exist. Defaults to True.
+
+        Returns:
+            tuple: The element of the row (None if it does not exist and is not created) and True if it was created.
+
+        """
+
+        numbers = self.__numbers()
+
+        if row in self._rows:
+            return self._rows[row], False
+
+        if not create:
+            return None, False
+
+        i = bisect_left(numbers, row)
+
+        below = numbers[i - 1] if i > 0 else None
+        above = numbers[i] if i < len(numbers) else None
+
+        new_row = self.__new_row(row, below, above)
+
+        if below is not None:
+            self._rows[below].addnext(new_row)
+        elif above is not None:
+            self._rows[above].addprevious(new_row)
+        else:
+            self.data.append(new_row)
+
+        numbers.insert(i, row)
+        self._rows[row] = new_row
+        self._cells[row] = [], {}
+
+        return new_row, True
+
+    def __new_row(self, row, below, above):
+
+        """
+        Creates the element of a new row, it takes over the attributes of its nearest neighbour.
+
+        Args:
+            row (int): The row number.
+            below (int): The number of the next existing row above in the sheet (lower number) or None.
+            above (int): The number of the next existing row below in the sheet (higher number) or None.
+
+        Returns:
+            Element: The element of the new row.
+
+        """
+
+        if (below is None) and (above is None):
+            return etree.Element(f'{XMAIN}row', {'r': str(row),
+                                                 'spans': '1:1',
+                                                 etree.QName(XDSGN, 'dyDescent'): '0.25'
+                                                 }
+                                 )
+
+        # the nearest existing row, the lower one wins a tie
+        if (above is None) or ((below is not None) and (row - below <= above - row)):
+            attrib = dict(self._rows[below].attrib)
+        else:
+            attrib = dict(self._rows[above].attrib)
+
+        attrib['r'] = str(row)
+
+        return etree.Element(f'{XMAIN}row', attrib)
+
+    def rows(self, targets) -> list:
+
+        """
+        Returns the elements of several rows. The existing rows within the span of the targets are walked
+        once and missing rows are created at their sorted position on the way.
+
+        Args:
+            targets (list): The sorted row numbers.
+
+        Returns:
+            list: The elements of the rows in the order of the targets.
+
+        """
+
+        numbers = self.__numbers()
+
+        if not targets:
+            return []
+
+        i = bisect_left(numbers, targets[0])
+        j = bisect_right(numbers, targets[-1])
+
+        existing = numbers[i:j]
+        below = numbers[i - 1] if i > 0 else None
+        above = numbers[j] if j < len(numbers) else None
+
+        prev = self._rows[below] if below is not None else None
+        elements = []
+        k = 0
+
+        for row in targets:
+            while (k < len(existing)) and (existing[k] < row):
+                prev = self._rows[existing[k]]
+                k += 1
+
+            if (k < len(existing)) and (existing[k] == row):
+                ws_row = self._rows[row]
+                k += 1
+            else:
+                nxt = existing[k] if k < len(existing) else above
+                ws_row = self.__new_row(row, existing[k - 1] if k > 0 else below, nxt)
+
+                if prev is not None:
+                    prev.addnext(ws_row)
+                elif nxt is not None:
+                    self._rows[nxt].addprevious(ws_row)
+                else:
+                    self.data.append(ws_row)
+
+                self._cells[row] = [], {}
+
+            prev = ws_row
+            elements.append(ws_row)
+
+        for row, ws_row in zip(targets, elements):
+            self._rows[row] = ws_row
+
+        numbers[i:j] = sorted(set(existing).union(targets))
+
+        return elements
+
+    def cells(self, row, targets) -> list:
+
+        """
+        Returns the elements of several cells of an existing row. The cells within the span of the targets
+        are walked once and missing cells are created at their sorted position on the way.
+
+        Args:
+            row (int): The row number.
+            targets (list): The sorted column numbers.
+
+        Returns:
+            list: The elements of the cells in the order of the targets.
+
+        """
+
+        ws_row = self._rows[row]
+        columns, cells = self.__columns(row, ws_row)
+
+        if not targets:
+            return []
+
+        i = bisect_left(columns, targets[0])
+        j = bisect_right(columns, targets[-1])
+
+        existing = columns[i:j]
+        prev = cells[columns[i - 1]] if i > 0 else None
+        elements = []
+        k = 0
+
+        for column in targets:
+            while (k < len(existing)) and (existing[k] < column):
+                prev = cells[existing[k]]
+                k += 1
+
+            if (k < len(existing)) and (existing[k] == column):
+                ws_column = cells[column]
+                k += 1
+            else:
+                ws_column = etree.Element(f'{XMAIN}c')
+                ws_column.attrib['r'] = f'{column_name(column)}{row}'
+
+                if prev is not None:
+                    prev.addnext(ws_column)
+                elif existing or (j < len(columns)):
+                    cells[existing[0] if existing else columns[j]].addprevious(ws_column)
+                else:
+                    ws_row.insert(0, ws_column)
+
+                cells[column] = ws_column
+                self.created += 1
+
+            prev = ws_column
+            elements.append(ws_column)
+
+        columns[i:j] = sorted(set(existing).union(targets))
+
+        return elements
+
+    def cell(self, row, column, create=True) -> tuple:
+
+        """
+        Returns the element of a cell. A missing cell (and row) is created at its sorted position.
+
+        Args:
+            row (int): The row number.
+            column (int): The column number, starting with 1 for column 'A'.
+            create (bool, optional): True to create the cell if it does not exist. Defaults to True.
+
+        Returns:
+            tuple: The element of the cell (None if it does not exist and is not created) and True if it was created.
+
+        """
+
+        ws_row, _ = self.row(row, create)
+
+        if ws_row is None:
+            return None, False
+
+        columns, cells = self.__columns(row, ws_row)
+
+        if column in cells:
+            return cells[column], False
+
+        if not create:
+            return None, False
+
+        new_c = etree.Element(f'{XMAIN}c')
+        new_c.attrib['r'] = f'{column_name(column)}{row}'
+
+        i = bisect_left(columns, column)
+
+        if i < len(columns):
+            cells[columns[i]].addprevious(new_c)
+        elif columns:
+            cells[columns[-1]].addnext(new_c)
+        else:
+            ws_row.insert(0, new_c)
+
+        columns.insert(i, column)
+        cells[column] = new_c
+        self.created += 1
+
+        return new_c, True
+
+    def clear(self, row, column, last_row, last_column, keep_styles=True) -> list:
+
+        """
+        Clears the cells of a rectangular range. The existing rows of the range are walked once, missing rows
+        and cells are not created.
+
+        Args:
+            row (int): The first row number of the range.
+            column (int): The first column number of the range.
+            last_row (int): The last row number of the range.
+            last_column (int): The last column number of the range.
+            keep_styles (bool, optional): True to keep the (empty) cells with their style, False to remove them. Defaults to True.
+
+        Returns:
+            list: The references of the cells whose formula was removed.
+
+        """
+
+        numbers = self.__numbers()
+        removed = []
+
+        for number in numbers[bisect_left(numbers, row):bisect_right(numbers, last_row)]:
+            ws_row = self._rows[number]
+            columns, cells = self.__columns(number, ws_row)
+
+            i = bisect_left(columns, column)
+            j = bisect_right(columns, last_column)
+
+            for c in columns[i:j]:
+                ws_column = cells[c]
+
+                if clear_cell(ws_column):
+                    removed.append(f'{column_name(c)}{number}')
+
+                if not keep_styles:
+                    ws_row.remove(ws_column)
+                    del cells[c]
+
+            if not keep_styles:
+                del columns[i:j]
+
+        return removed
+
+    def bounds(self) -> tuple:
+
+        """
+        Returns the range of all cells of the worksheet. The cells of a row are sorted, so only the first and
+        the last cell of every row are read.
+
+        Returns:
+            tuple: The first row, first column, last row and last column, None if the worksheet has no cells.
+
+        """
+
+        rows = []
+        first = last = None
+
+        for number in self.__numbers():
+            ws_row = self._rows[number]
+
+            if number in self._cells:
+                columns = self._cells[number][0]
+            else:
+                cells = ws_row.findall(f'{XMAIN}c')
+                if cells and ('r' in cells[0].attrib) and ('r' in cells[-1].attrib):
+                    columns = [split_ref(cells[0].attrib['r'])[1], split_ref(cells[-1].attrib['r'])[1]]
+                else:
+                    columns = self.__columns(number, ws_row)[0]
+
+            if not columns:
+                continue
+
+            rows.append(number)
+            first = columns[0] if first is None else min(first, columns[0])
+            last = columns[-1] if last is None else max(last, columns[-1])
+
+        if not rows:
+            return None
+
+        return rows[0], first, rows[-1], last
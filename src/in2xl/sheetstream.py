@@ -0,0 +1,677 @@
+# sheetstream.py
+from __future__ import annotations
+from bisect import bisect_left
+from lxml import etree
+import copy
+import re
+from .sheetindex import XMAIN, XDSGN, set_cell, clear_cell
+from .formulas import FormulaIndex
+from .sharedstrings import remap_refs
+from .utils import column_name, split_ref
+
+# namespace declarations within a serialized start tag
+_XMLNS = re.compile(rb'\s+xmlns(?::([\w.-]+))?="([^"]*)"')
+
+_DECLARATION = b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# the start tag of a formula (with any namespace prefix)
+_FORMULA = re.compile(rb'<(?:[\w.-]+:)?f[\s/>]')
+
+
+def _has_formula(source) -> bool:
+
+    """
+    Scans the bytes of a worksheet for a formula, without parsing it.
+
+    Args:
+        source (file): A readable binary file object of the worksheet.
+
+    Returns:
+        bool: True if the worksheet may include a formula.
+
+    """
+
+    tail = b''
+
+    while True:
+        chunk = source.read(1 << 20)
+
+        if not chunk:
+            return False
+
+        if _FORMULA.search(tail + chunk):
+            return True
+
+        tail = chunk[-64:]
+
+
+class SheetStream:
+
+    """
+    The `SheetStream` class collects the cells inserted into a worksheet and splices them into the worksheet
+    while it is copied from one archive to another, without building the tree of the whole worksheet.
+
+    The worksheet is read with `etree.iterparse` and written element by element: every `<row>` is merged with
+    the pending cells of its row number, written and released before the next row is parsed. Pending rows
+    which do not exist yet are written at their sorted position. So the memory needed depends on the inserted
+    data only, not on the size of the worksheet.
+
+    The cached values of the formulas which depend on the written ranges are removed. Their dependencies are
+    looked up in a `FormulaIndex`, which is built by a first pass over the worksheet that only keeps the
+    cells with a formula, the pass is made once when the worksheet is streamed the first time.
+
+    Attributes:
+        cells (dict): A dictionary of row numbers and the pending cells of the row ({column: (t, text)}).
+        bounds (list): The first row, first column, last row and last column of the pending cells or None.
+        cleared (list): The ranges whose existing cells are cleared, as tuples of (row, column, last_row, last_column, keep_styles).
+        on_formula (callable): A function called with the reference of every cell whose formula was removed.
+        after (set): The names of the parts that are modified while the worksheet is streamed.
+        clean (bool): True to remove the cached values of the formulas which depend on the written ranges.
+        remap (list): The new shared string index of every old index for the existing cells or None (see `renumber()`).
+        sheet (str): The name of the worksheet, the references of its formulas to it are resolved by it.
+        written (list): The written ranges as tuples of (row, column, last_row, last_column).
+        formulas (FormulaIndex): The formulas of the existing worksheet, None until it was streamed the first time.
+
+    Methods:
+        __init__(self, on_formula=None, after=(), clean=True, remap=None, sheet=None): Initializes a new instance of the `SheetStream` class.
+        update(self, row, columns, types, texts): Adds cells of a row to the pending cells.
+        clear(self, row, column, last_row, last_column, keep_styles=True): Clears the cells of a rectangular range.
+        copy(self) -> SheetStream: Returns an independent copy of the pending cells.
+        renumber(self, mapping): Renumbers the shared string references of the pending and the existing cells.
+        stream(self, source, target): Copies the worksheet from `source` to `target` including the pending cells.
+
+    """
+
+    def __init__(self, on_formula=None, after=(), clean=True, remap=None, sheet=None):
+
+        self.cells = {}
+        self.bounds = None
+        self.cleared = []
+        self.on_formula = on_formula
+        self.after = set(after)
+        self.clean = clean
+        self.remap = remap
+        self.sheet = sheet
+        self.written = []
+        self.formulas = None
+
+        # formulas already reported, the worksheet may be streamed several times (save and flush)
+        self._removed = set()
+
+    def __len__(self):
+        return len(self.cells)
+
+    def update(self, row, columns, types, texts):
+
+        """
+        Adds cells of a row to the pending cells, cells inserted before at the same position are replaced.
+
+        Args:
+            row (int): The row number.
+            columns (list): The column numbers of the cells.
+            types (list): The cell types ('s' for shared strings, 'b' for booleans, None for numbers).
+            texts (list): The texts of the `<v>` elements.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        if not columns:
+            return self
+
+        self.cells.setdefault(row, {}).update(zip(columns, zip(types, texts)))
+
+        first, last = min(columns), max(columns)
+
+        if self.bounds is None:
+            self.bounds = [row, first, row, last]
+        else:
+            b = self.bounds
+            self.bounds = [min(b[0], row), min(b[1], first), max(b[2], row), max(b[3], last)]
+
+        return self
+
+    def clear(self, row, column, last_row, last_column, keep_styles=True):
+
+        """
+        Clears the cells of a rectangular range. Pending cells within the range are discarded, the existing
+        cells are cleared while the worksheet is streamed (before cells inserted afterwards are merged).
+
+        Args:
+            row (int): The first row number of the range.
+            column (int): The first column number of the range.
+            last_row (int): The last row number of the range.
+            last_column (int): The last column number of the range.
+            keep_styles (bool, optional): True to keep the (empty) cells with their style, False to remove them. Defaults to True.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        for number in [r for r in self.cells if row <= r <= last_row]:
+            cells = self.cells[number]
+            for c in [c for c in cells if column <= c <= last_column]:
+                del cells[c]
+            if not cells:
+                del self.cells[number]
+
+        self.cleared.append((row, column, last_row, last_column, keep_styles))
+
+        return self
+
+    def copy(self) -> SheetStream:
+
+        """
+        Returns an independent copy of the pending cells and cleared ranges, the callback is shared.
+
+        Returns:
+            SheetStream: The copy of the instance.
+
+        """
+
+        new = copy.copy(self)
+        new.cells = {row: dict(cells) for row, cells in self.cells.items()}
+        new.bounds = None if self.bounds is None else list(self.bounds)
+        new.cleared = list(self.cleared)
+        new.written = list(self.written)
+        new.after = set(self.after)
+        new._removed = set(self._removed)
+
+        return new
+
+    def renumber(self, mapping):
+
+        """
+        Renumbers the shared string references after the shared string table was compacted. The pending cells
+        are renumbered at once, the existing cells while the worksheet is streamed.
+
+        Args:
+            mapping (list): The new index of every old index (see `SharedStrings.compact()`).
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        for cells in self.cells.values():
+            for column, (t, text) in cells.items():
+                if (t == 's') and (int(text) < len(mapping)):
+                    cells[column] = (t, str(mapping[int(text)]))
+
+        # the existing cells still refer to the indexes of the original table
+        self.remap = mapping if self.remap is None else [None if i is None else mapping[i] for i in self.remap]
+
+        return self
+
+    def stream(self, source, target):
+
+        """
+        Copies the worksheet from `source` to `target` and splices the pending cells into its rows.
+        The `<dimension>` is extended by the range of the pending cells.
+
+        Args:
+            source (file): A readable binary file object of the original worksheet.
+            target (file): A writable binary file object for the new worksheet.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        self._pending = sorted(self.cells)
+        self._next = 0
+        self._attrib = None
+        self._held = None
+        self._stale = self.__stale(source) if (self.clean and self.written) else {}
+
+        root = data = None
+
+        # events are only reported for these elements, all other elements are handled as part of their parent
+        tags = (f'{XMAIN}worksheet', f'{XMAIN}sheetData', f'{XMAIN}row')
+
+        for event, el in etree.iterparse(source, events=('start', 'end'), tag=tags, huge_tree=True, remove_blank_text=True):
+
+            if el.tag == f'{XMAIN}row':
+                if (event == 'end') and (data is not None) and (el.getparent() is data):
+                    self.__unhold(target)
+                    self.__row(target, el)
+                    self.__release(el, data)
+
+            elif el.tag == f'{XMAIN}sheetData':
+                if event == 'start':
+                    data = el
+                    # the elements in front of the sheetData are complete now
+                    self.__children(target, list(el.itersiblings(preceding=True))[::-1])
+                    self._data_tag = self.__start(el)
+                    self.__write(target, self._data_tag[0])
+                elif el is data:
+                    self.__unhold(target, empty=True)
+                    self.__rows(target, None)
+                    target.write(self._data_tag[1])
+                    el.clear(keep_tail=False)
+
+            elif event == 'start' and root is None:
+                root = el
+                self._nsmap = dict(root.nsmap)
+                self._declared = {((k or '').encode(), v.encode()) for k, v in root.nsmap.items()}
+                self._root_tag = self.__start(root, declare=True)
+                target.write(_DECLARATION + self._root_tag[0])
+
+            elif event == 'end' and el is root:
+                children = list(root)
+                self.__children(target, children[children.index(data) + 1:] if data is not None else children)
+                self.__unhold(target)
+                target.write(self._root_tag[1])
+
+        return self
+
+    def __stale(self, source) -> dict:
+
+        """
+        Returns the cells of the formulas which depend on the written ranges. The formulas are indexed on first use,
+        afterwards the source is read again from its start.
+
+        Args:
+            source (file): A readable and seekable binary file object of the original worksheet.
+
+        Returns:
+            dict: A dictionary of row numbers and the column numbers of their affected formulas.
+
+        """
+
+        if self.formulas is None:
+            self.formulas = self.__index(source)
+            source.seek(0)
+
+        stale = {}
+
+        for ws_column in self.formulas.affected(self.written):
+            row, column = split_ref(ws_column.attrib['r'])
+            stale.setdefault(row, set()).add(column)
+
+        return stale
+
+    def __index(self, source) -> FormulaIndex:
+
+        """
+        Reads the formulas of the original worksheet into a tree which only holds their cells (with the reference
+        of every cell) and indexes them. The rows are released while they are read. Worksheets without any
+        formula are only scanned, they are not parsed.
+
+        Args:
+            source (file): A readable binary file object of the original worksheet.
+
+        Returns:
+            FormulaIndex: The index of the formulas.
+
+        """
+
+        root = etree.Element(f'{XMAIN}worksheet')
+        data = etree.SubElement(root, f'{XMAIN}sheetData')
+
+        if not _has_formula(source):
+            return FormulaIndex(root, self.sheet or '')
+
+        source.seek(0)
+        number = 0
+
+        # only rows and formulas are reported, the cells without a formula are skipped in C
+        for _, el in etree.iterparse(source, tag=(f'{XMAIN}row', f'{XMAIN}f'), huge_tree=True):
+            if el.tag == f'{XMAIN}row':
+                number = int(el.attrib['r']) if 'r' in el.attrib else number + 1
+                self.__release(el, el.getparent())
+                continue
+
+            ws_column = el.getparent()
+            ref = ws_column.get('r')
+
+            if ref is None:
+                ws_row = ws_column.getparent()
+                row = int(ws_row.attrib['r']) if 'r' in ws_row.attrib else number + 1
+                ref = f'{column_name(self.__position(ws_column))}{row}'
+
+            etree.SubElement(data, f'{XMAIN}c', r=ref).append(copy.deepcopy(el))
+
+        return FormulaIndex(root, self.sheet or '')
+
+    @staticmethod
+    def __position(ws_column) -> int:
+
+        """
+        Returns the column number of a cell without a reference, it follows its predecessor.
+
+        """
+
+        offset = 1
+
+        for c in ws_column.itersiblings(f'{XMAIN}c', preceding=True):
+            if 'r' in c.attrib:
+                return split_ref(c.attrib['r'])[1] + offset
+            offset += 1
+
+        return offset
+
+    def __children(self, target, children):
+
+        """
+        Writes complete child elements of the root and removes them from the tree. A `<dimension>` is held back
+        (together with the elements following it) until the first row shows whether the worksheet was empty.
+
+        Args:
+            target (file): The new worksheet.
+            children (list): The child elements.
+
+        """
+
+        for el in children:
+            if (el.tag == f'{XMAIN}dimension') and (self.bounds is not None) and ('ref' in el.attrib):
+                self._held = [el]
+                continue
+
+            self.__write(target, self.__tostring(el))
+            el.getparent().remove(el)
+
+    def __start(self, el, declare=False) -> tuple:
+
+        """
+        Serializes the start and the end tag of an element.
+
+        Args:
+            el (Element): The element.
+            declare (bool, optional): True to keep the namespace declarations. Defaults to False.
+
+        Returns:
+            tuple: The start tag and the end tag.
+
+        """
+
+        shallow = etree.Element(el.tag, dict(el.attrib), nsmap=self._nsmap)
+        shallow.text = 'SPLIT'
+
+        head, foot = etree.tostring(shallow).rsplit(b'SPLIT', 1)
+
+        if not declare:
+            head = _XMLNS.sub(self.__strip, head)
+
+        return head, foot
+
+    def __strip(self, match):
+        return b'' if ((match.group(1) or b''), match.group(2)) in self._declared else match.group(0)
+
+    def __tostring(self, el) -> bytes:
+
+        """
+        Serializes an element without the namespace declarations that are already made by the root element.
+
+        Args:
+            el (Element): The element.
+
+        Returns:
+            bytes: The serialized element.
+
+        """
+
+        xml = etree.tostring(el, with_tail=False)
+        end = xml.index(b'>')
+
+        return _XMLNS.sub(self.__strip, xml[:end]) + xml[end:]
+
+    def __release(self, el, parent):
+
+        """
+        Frees the memory of a row that was written and of its predecessors.
+
+        """
+
+        el.clear(keep_tail=False)
+
+        while el.getprevious() is not None:
+            del parent[0]
+
+    def __write(self, target, data):
+
+        """
+        Writes serialized data, while the `<dimension>` is held back the data is held back as well.
+
+        """
+
+        if self._held is not None:
+            self._held.append(data)
+        else:
+            target.write(data)
+
+    def __unhold(self, target, empty=False):
+
+        """
+        Writes the held back `<dimension>` and the data following it.
+
+        Args:
+            target (file): The new worksheet.
+            empty (bool, optional): True if the worksheet has no rows, the dimension is replaced instead of being extended.
+
+        """
+
+        if self._held is None:
+            return
+
+        held, self._held = self._held, None
+
+        self.__dimension(held[0], empty)
+        target.write(self.__tostring(held[0]))
+        held[0].getparent().remove(held[0])
+
+        for data in held[1:]:
+            target.write(data)
+
+    def __dimension(self, el, reset=False):
+
+        """
+        Extends the range of the `<dimension>` element by the range of the pending cells.
+
+        """
+
+        row, column, last_row, last_column = self.bounds
+
+        if not reset:
+            first, _, last = el.attrib['ref'].partition(':')
+            fn, fl = split_ref(first)
+            sn, sl = split_ref(last or first)
+
+            row, column = min(fn, row), min(fl, column)
+            last_row, last_column = max(sn, last_row), max(sl, last_column)
+
+        el.attrib['ref'] = f'{column_name(column)}{row}:{column_name(last_column)}{last_row}'
+
+    def __rows(self, target, row, above=None):
+
+        """
+        Writes all pending rows with a lower number than `row` (all remaining rows if `row` is None).
+
+        Args:
+            target (file): The new worksheet.
+            row (int): The number of the next existing row or None.
+            above (dict, optional): The attributes of the next existing row.
+
+        """
+
+        while self._next < len(self._pending):
+            number = self._pending[self._next]
+
+            if (row is not None) and (number >= row):
+                break
+
+            self._next += 1
+
+            ws_row = etree.Element(f'{XMAIN}row', self.__attrib(number, row, above), nsmap=self._nsmap)
+            self.__merge(ws_row, number, self.cells[number])
+
+            target.write(self.__tostring(ws_row))
+
+    def __attrib(self, number, row, above) -> dict:
+
+        """
+        Returns the attributes of a new row, it takes over the attributes of its nearest neighbour.
+
+        """
+
+        below = self._attrib
+
+        if (below is None) and (above is None):
+            return {'r': str(number), 'spans': '1:1', etree.QName(XDSGN, 'dyDescent').text: '0.25'}
+
+        # the nearest existing row, the lower one wins a tie
+        if (above is None) or ((below is not None) and (number - int(below['r']) <= row - number)):
+            attrib = dict(below)
+        else:
+            attrib = dict(above)
+
+        attrib['r'] = str(number)
+
+        return attrib
+
+    def __row(self, target, ws_row):
+
+        """
+        Writes an existing row after the pending rows in front of it, merged with its pending cells.
+
+        """
+
+        if 'r' in ws_row.attrib:
+            number = int(ws_row.attrib['r'])
+        else:
+            # rows without reference follow their predecessor
+            number = int(self._attrib['r']) + 1 if self._attrib is not None else 1
+            ws_row.attrib['r'] = str(number)
+
+        self.__rows(target, number, dict(ws_row.attrib))
+
+        if self.cleared:
+            self.__clear(ws_row, number)
+
+        if self.remap is not None:
+            remap_refs(ws_row, self.remap)
+
+        if (self._next < len(self._pending)) and (self._pending[self._next] == number):
+            self._next += 1
+            self.__merge(ws_row, number, self.cells[number])
+
+        if number in self._stale:
+            self.__clean(ws_row, self._stale[number])
+
+        self._attrib = dict(ws_row.attrib)
+
+        target.write(self.__tostring(ws_row))
+
+    def __clear(self, ws_row, row):
+
+        """
+        Clears the existing cells of a row which are within a cleared range.
+
+        Args:
+            ws_row (Element): The element of the row.
+            row (int): The row number.
+
+        """
+
+        ranges = [r for r in self.cleared if r[0] <= row <= r[2]]
+
+        if not ranges:
+            return
+
+        last = 0
+
+        for c in list(ws_row.iterchildren(f'{XMAIN}c')):
+            last = split_ref(c.attrib['r'])[1] if 'r' in c.attrib else last + 1
+
+            for _, column, _, last_column, keep_styles in ranges:
+                if not (column <= last <= last_column):
+                    continue
+
+                if clear_cell(c):
+                    self.__removed(f'{column_name(last)}{row}')
+
+                if not keep_styles:
+                    ws_row.remove(c)
+                    break
+
+    def __clean(self, ws_row, columns):
+
+        """
+        Removes the cached values of the affected formulas of a row.
+
+        Args:
+            ws_row (Element): The element of the row.
+            columns (set): The column numbers of the affected formulas.
+
+        """
+
+        last = 0
+
+        for c in ws_row.iterchildren(f'{XMAIN}c'):
+            last = split_ref(c.attrib['r'])[1] if 'r' in c.attrib else last + 1
+
+            if (last in columns) and (c.find(f'{XMAIN}f') is not None):
+                for ws_value in c.findall(f'{XMAIN}v'):
+                    c.remove(ws_value)
+
+    def __removed(self, ref):
+
+        """
+        Reports the reference of a cell whose formula was removed, every cell is reported once.
+
+        """
+
+        if (self.on_formula is not None) and (ref not in self._removed):
+            self._removed.add(ref)
+            self.on_formula(ref)
+
+    def __merge(self, ws_row, row, cells):
+
+        """
+        Merges pending cells into the element of a row, missing cells are created at their sorted position.
+
+        Args:
+            ws_row (Element): The element of the row.
+            row (int): The row number.
+            cells (dict): The pending cells of the row.
+
+        """
+
+        present = {}
+        last = 0
+
+        for c in ws_row.iterchildren(f'{XMAIN}c'):
+            if 'r' in c.attrib:
+                last = split_ref(c.attrib['r'])[1]
+            else:
+                last += 1
+                c.attrib['r'] = f'{column_name(last)}{row}'
+            present[last] = c
+
+        columns = sorted(present)
+
+        for column in sorted(cells):
+            ws_column = present.get(column)
+
+            if ws_column is None:
+                ws_column = etree.Element(f'{XMAIN}c')
+                ws_column.attrib['r'] = f'{column_name(column)}{row}'
+
+                i = bisect_left(columns, column)
+
+                if i < len(columns):
+                    present[columns[i]].addprevious(ws_column)
+                elif columns:
+                    present[columns[-1]].addnext(ws_column)
+                else:
+                    ws_row.insert(0, ws_column)
+
+                columns.insert(i, column)
+                present[column] = ws_column
+
+            t, text = cells[column]
+
+            if set_cell(ws_column, t, text):
+                self.__removed(f'{column_name(column)}{row}')
@@ -0,0 +1,160 @@
+# stats.py
+from __future__ import annotations
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+import functools
+
+
+class Stats:
+
+    """
+    The `Stats` class collects the cumulative timings of the phases of a workbook (parsing, inserting,
+    serializing, rewriting the archive, ...) and counters of its operations. It is opt-in: a workbook only
+    measures anything while a `Stats` object is attached to it (`load_workbook(path, stats=Stats())` or `wb.profile()`).
+
+    Phases may be nested (e.g. 'flush' contains 'write', which contains 'serialize'), so the timings are inclusive.
+
+    Attributes:
+        timings (dict): A dictionary of phase names and their cumulative time in seconds.
+        calls (dict): A dictionary of phase names and the number of times they were entered.
+        counters (dict): A dictionary of counter names and their values.
+        callback (callable): A function called as `callback(kind, name, value)` for every finished phase
+            (`kind` 'phase', `value` the elapsed seconds) and every counter increment (`kind` 'counter').
+
+    Methods:
+        __init__(self, callback=None): Initializes a new instance of the `Stats` class.
+        phase(self, name): A context manager measuring the time of a phase.
+        count(self, name, value=1): Increments a counter.
+        reset(self): Resets all timings and counters.
+        as_dict(self) -> dict: Returns the timings, calls and counters as a dictionary.
+
+    """
+
+    def __init__(self, callback=None):
+
+        self.timings = {}
+        self.calls = {}
+        self.counters = {}
+        self.callback = callback
+
+    def __repr__(self):
+        timings = ', '.join(f'{k}={v * 1e3:.1f}ms' for k, v in self.timings.items())
+        counters = ', '.join(f'{k}={v}' for k, v in self.counters.items())
+        return f'Stats(timings: {timings or "-"} | counters: {counters or "-"})'
+
+    @contextmanager
+    def phase(self, name):
+
+        """
+        Measures the time of a phase and adds it to the cumulative timing of the phase.
+
+        Args:
+            name (str): The name of the phase.
+
+        """
+
+        start = perf_counter()
+
+        try:
+            yield self
+        finally:
+            elapsed = perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+            if self.callback is not None:
+                self.callback('phase', name, elapsed)
+
+    def count(self, name, value=1):
+
+        """
+        Increments a counter.
+
+        Args:
+            name (str): The name of the counter.
+            value (int, optional): The increment. Defaults to 1.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        if not value:
+            return self
+
+        self.counters[name] = self.counters.get(name, 0) + value
+
+        if self.callback is not None:
+            self.callback('counter', name, value)
+
+        return self
+
+    def reset(self):
+
+        """
+        Resets all timings and counters.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        self.timings.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+        return self
+
+    def as_dict(self) -> dict:
+
+        """
+        Returns the timings, calls and counters as a dictionary, e.g. to export them to a metrics system.
+
+        Returns:
+            dict: A dictionary with the keys 'timings', 'calls' and 'counters'.
+
+        """
+
+        return {'timings': dict(self.timings), 'calls': dict(self.calls), 'counters': dict(self.counters)}
+
+
+def measure(stats, name):
+
+    """
+    Returns a context manager measuring a phase, it does nothing if no `Stats` object is attached.
+
+    Args:
+        stats (Stats): The attached `Stats` object or None.
+        name (str): The name of the phase.
+
+    """
+
+    return nullcontext() if stats is None else stats.phase(name)
+
+
+def timed(name):
+
+    """
+    Decorates a method whose calls are measured as a phase, if a `Stats` object is attached to its
+    instance (`self.stats`).
+
+    Args:
+        name (str): The name of the phase.
+
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            stats = self.stats
+
+            if stats is None:
+                return func(self, *args, **kwargs)
+
+            with stats.phase(name):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,170 @@
+# utils.py
+from __future__ import annotations
+from functools import lru_cache
+import re
+
+_REF = re.compile(r'\$?([A-Za-z]{1,3})\$?(\d+)$')
+
+# sheet names in front of a '!' within a formula, quoted names escape quotes by doubling them
+_SHEET = re.compile(r"(?:'((?:[^']|'')+)'|([^\s'!(),;:+\-*/^&=<>{}]+))!")
+
+# characters which are not allowed in XML 1.0 documents
+_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+@lru_cache(maxsize=None)
+def column_index(name: str) -> int:
+
+    """
+    Converts a column name into its number.
+
+    Args:
+        name (str): The column name, e.g. 'AB'.
+
+    Returns:
+        int: The column number, starting with 1 for column 'A'.
+
+    """
+
+    idx = 0
+    for char in name.upper():
+        idx = idx * 26 + ord(char) - 64
+
+    return idx
+
+
+@lru_cache(maxsize=None)
+def column_name(idx: int) -> str:
+
+    """
+    Converts a column number into its name.
+
+    Args:
+        idx (int): The column number, starting with 1 for column 'A'.
+
+    Returns:
+        str: The column name, e.g. 'AB'.
+
+    """
+
+    name = ''
+    while idx > 0:
+        idx, rest = divmod(idx - 1, 26)
+        name = chr(65 + rest) + name
+
+    return name
+
+
+def split_ref(ref: str) -> tuple:
+
+    """
+    Splits a cell reference into its row and column number.
+
+    Args:
+        ref (str): The cell reference, e.g. 'B3' or '$B$3'.
+
+    Returns:
+        tuple: The row and the column number, e.g. (3, 2).
+
+    Raises:
+        ValueError: If the reference is not a valid cell reference.
+
+    """
+
+    match = _REF.match(ref)
+
+    if match is None:
+        raise ValueError(f'{ref!r} is not a valid cell reference')
+
+    return int(match.group(2)), column_index(match.group(1))
+
+
+def split_range(ref: str) -> tuple:
+
+    """
+    Splits a cell range into the row and column numbers of its corners.
+
+    Args:
+        ref (str): The cell range, e.g. 'B3:D10', or a single cell reference.
+
+    Returns:
+        tuple: The first row, first column, last row and last column, e.g. (3, 2, 10, 4).
+
+    Raises:
+        ValueError: If the range is not a valid cell range.
+
+    """
+
+    first, _, last = ref.partition(':')
+
+    row, column = split_ref(first)
+    last_row, last_column = split_ref(last) if last else (row, column)
+
+    return min(row, last_row), min(column, last_column), max(row, last_row), max(column, last_column)
+
+
+def split_anchor(anchor) -> tuple:
+
+    """
+    Converts the anchor of an insert into its row and column number.
+
+    Args:
+        anchor (str or tuple): A cell reference, e.g. 'B3', or a tuple of the row and the column number.
+
+    Returns:
+        tuple: The row and the column number.
+
+    """
+
+    if isinstance(anchor, str):
+        return split_ref(anchor)
+
+    row, column = anchor
+
+    return int(row), int(column)
+
+
+def check_text(value: str) -> str:
+
+    """
+    Checks that a string can be written into an XML document.
+
+    Args:
+        value (str): The string.
+
+    Returns:
+        str: The unchanged string.
+
+    Raises:
+        ValueError: If the string contains characters which are not allowed in XML.
+
+    """
+
+    if _INVALID.search(value):
+        raise ValueError(f'All strings must be XML compatible, received: {value!r}')
+
+    return value
+
+
+def formula_sheets(formula: str) -> set:
+
+    """
+    Returns the names of the worksheets referenced by a formula, e.g. the series of a chart.
+    References to other workbooks (e.g. '[1]Sheet1'!A1) are ignored.
+
+    Args:
+        formula (str): The formula, e.g. "'Other''s'!$A$1:$A$5,Data!$B$2".
+
+    Returns:
+        set: The names of the referenced worksheets.
+
+    """
+
+    sheets = set()
+
+    for quoted, plain in _SHEET.findall(formula or ''):
+        name = quoted.replace("''", "'") if quoted else plain
+        if not name.startswith('['):
+            sheets.add(name)
+
+    return sheets
@@ -1,17 +1,32 @@
 # in2xl.py
 from __future__ import annotations
-from openpyxl.utils.dataframe import dataframe_to_rows
-from xlsxwriter.utility import xl_col_to_name as xl_name
-import ruamel.std.zipfile as zipfile
 from lxml import etree
+import zipfile
 from datetime import datetime
-from typing import Union
+from typing import Union, BinaryIO, TYPE_CHECKING
+from contextlib import contextmanager
+from .package import Package, check_compression
+from .sharedstrings import SharedStrings, string_refs, remap_refs
+from .sheetindex import SheetIndex, set_cell
+from .sheetstream import SheetStream
+from .cache import Template, template_cache
+from .utils import column_name, split_ref, split_range, split_anchor, check_text, formula_sheets
+from .convert import cell_value, frame_to_cells, is_frame
+from .reader import date_styles, iter_rows, rows_to_frame
+from .pivot import refresh_cache
+from .formulas import FormulaIndex, CalcChain
+from .stats import Stats, measure, timed
+from .aio import run
 import shutil
+import tempfile
+import posixpath
+import io
 import numbers
 import decimal
-import pandas as pd
 import os
-import re
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 XMAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
 XREL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
@@ -29,27 +44,35 @@ class Workbook:
         xrel (str): A string representing the relationship namespace.
         xchart (str): A string representing the chart namespace.
         xdsgn (str): A string representing the drawing namespace.
-        temp (str): A string representing the temporary path where the Excel workbook is copied.
+        temp (str or BytesIO): The temporary path where the Excel workbook is copied, or the buffer holding it in memory.
+        package (Package): The in-memory representation of the parts of the temporary Excel workbook.
         wb (Element): An Element object representing the workbook.xml file.
         wb_dict (dict): A dictionary of worksheet names and their corresponding filenames.
         sheetnames (list):  A list of the names of all sheetnames in the Excel workbook.
         wb_id_dict (dict): A dictionary of worksheet names and their corresponding sheet Ids.
         content (list): A list of all files and directories in the zip archive.
-        chart_dict (dict): A dictionary of worksheet names and the corresponding chart filenames.
+        chart_dict (dict): A dictionary of worksheet names and the corresponding chart filenames, built on first access.
         wb_state (dict): A dictionary of worksheet names and their corresponding states (visible, hidden, etc.).
+        stream (bool): True if the worksheets are streamed instead of being parsed into memory.
+        strings (str): The default mode of writing strings, 'shared' or 'inline'.
+        full_calc (bool): True to let Excel recalculate all formulas on load instead of removing cached values.
+        stats (Stats): The attached `Stats` object or None.
 
     Methods:
         __init__(self): Initializes a new instance of the `Workbook` class.
         __worksheets(self): Extracts worksheet information from a given Excel file.
-        load_workbook(self, path: str = None) -> Worksheets: Reads an Excel workbook from the specified file path and returns an instance of Worksheets.
+        __charts(self) -> dict: Maps the worksheets to the charts which reference them.
+        load_workbook(self, path, stream=False, strings='shared', cache=False, stats=None, compression=ZIP_DEFLATED, level=None, full_calc=False) -> Worksheets: Reads an Excel workbook.
 
     """
-    def __new__(cls, path=None):
+    def __new__(cls, path=None, stream=False, strings='shared', cache=False, stats=None, compression=zipfile.ZIP_DEFLATED, level=None,
+                full_calc=False):
 
         if path is not None:
             cls.__init__(cls)
 
-            return object.__new__(cls).load_workbook(path)
+            return object.__new__(cls).load_workbook(path, stream=stream, strings=strings, cache=cache, stats=stats,
+                                                     compression=compression, level=level, full_calc=full_calc)
 
         return object.__new__(cls)
 
@@ -61,13 +84,18 @@ class Workbook:
         self.xdsgn = XDSGN
 
         self.temp = self._base = None
+        self.package = None
         self.wb = None
-        self.wb_dict = self.wb_id_dict = self.wb = self.content = self.chart_dict = self.wb_state = None
+        self.wb_dict = self.wb_id_dict = self.wb = self.content = self._chart_dict = self.wb_state = None
+        self.stream = False
+        self.strings = 'shared'
+        self.full_calc = False
 
     def __worksheets(self):
 
         """
         This method extracts worksheet information from a given Excel file.
+        Only the workbook.xml is read, the charts are mapped on first access of `chart_dict`.
 
         Parameters:
             None
@@ -77,20 +105,16 @@ class Workbook:
             wb_id_dict (dict): A dictionary of worksheet names and their corresponding sheet Ids.
             wb (Element): An Element object representing the workbook.xml file.
             content (list): A list of all files and directories in the zip archive.
-            chart_dict (dict): A dictionary of worksheet names and the corresponding chart filenames.
             wb_state (dict): A dictionary of worksheet names and their corresponding states (visible, hidden, etc.).
 
         """
 
-        with zipfile.ZipFile(self.temp, mode="r") as myzip:
-            with myzip.open('xl/workbook.xml') as myfile:
-                wb = etree.fromstring(myfile.read())
-                content = myzip.namelist()
+        wb = self.package.get('xl/workbook.xml')
+        content = self.package.content
 
         wb_dict = {}
         wb_id_dict = {}
         wb_state = {}
-        chart_dict = {}
 
         # Extract information from the workbook.xml file
 
@@ -103,66 +127,156 @@ class Workbook:
                 else:
                     wb_state[i.attrib['name']] = 'visible'
 
-        # Check for charts
-        charts = [i for i in content if i.startswith('xl/charts/chart')]
+        self.sheetnames = list(wb_dict)
 
-        if charts:
-            # Extract chart information
-            for c in charts:
-                with zipfile.ZipFile(self.temp, mode="r") as myzip:
-                    with myzip.open(c) as myfile:
-                        chart = etree.fromstring(myfile.read())
+        return wb_dict, wb_id_dict, wb, content, wb_state
 
-                __a__ = []
-                for items in chart.iter(f'{self.xchart}f'):
-                    __a__.append(items.text)
+    @property
+    def stats(self) -> Stats:
+        """
+        Returns the attached `Stats` object or None.
 
-                for i in wb_dict.keys():
-                    if i.__contains__("'"):
-                        j = i.replace("'", "''")
-                    else:
-                        j = i
-                    if any(j in word for word in __a__):
-                        if i in chart_dict.keys():
-                            chart_dict[i] += [c]
-                        else:
-                            chart_dict[i] = [c]
+        """
+        return self.package.stats if self.package is not None else None
 
-        self.sheetnames = list(wb_dict)
+    @property
+    def chart_dict(self) -> dict:
+        """
+        Returns a dictionary of worksheet names and the charts referencing them. It is built on first access.
+
+        Returns:
+            dict: A dictionary of worksheet names and the corresponding chart filenames.
+        """
+
+        if self._chart_dict is None:
+            self._chart_dict = self.__charts()
 
-        return wb_dict, wb_id_dict, wb, content, chart_dict, wb_state
+        return self._chart_dict
 
-    def load_workbook(self, path: str = None) -> Worksheets:
+    @timed('charts')
+    def __charts(self) -> dict:
+
+        """
+        Maps the worksheets to the charts which reference them. All charts are read in a single pass over
+        the archive and the sheet names are parsed from the formulas (`<c:f>`) of their series.
+
+        Returns:
+            dict: A dictionary of worksheet names and the corresponding chart filenames.
+
+        """
+
+        charts = [i for i in self.package.content if i.startswith('xl/charts/chart') and i.endswith('.xml')]
+
+        chart_dict = {}
+
+        if not charts:
+            return chart_dict
+
+        with zipfile.ZipFile(self.temp, mode="r") as myzip:
+            for c in charts:
+                sheets = set()
+                with myzip.open(c) as myfile:
+                    for _, items in etree.iterparse(myfile, tag=f'{self.xchart}f'):
+                        sheets |= formula_sheets(items.text)
+
+                for i in self.wb_dict:
+                    if i in sheets:
+                        chart_dict.setdefault(i, []).append(c)
+
+        return chart_dict
+
+    def load_workbook(self, path: Union[str, bytes, BinaryIO, Template] = None, stream: bool = False, strings: str = 'shared',
+                      cache: bool = False, stats: Stats = None, compression: int = zipfile.ZIP_DEFLATED, level: int = None,
+                      full_calc: bool = False) -> Worksheets:
 
         """
         Reads an Excel workbook from the specified file path and returns an instance of Worksheets.
+        If the workbook is passed as bytes, as a readable binary file object (e.g. `BytesIO`) or as a compiled
+        `Template`, it is kept in memory and no temporary file is created.
 
         Args:
-            path (str): The file path of the Excel workbook to read.
+            path (str, bytes, file or Template): The file path of the Excel workbook to read, its content, a file object
+                or a compiled template.
+            stream (bool, optional): True to stream the worksheets instead of parsing them into memory.
+                The memory needed by `insert()` then depends on the inserted data only, not on the size of the worksheet.
+                Defaults to False.
+            strings (str, optional): The default mode of writing strings. 'shared' to reference them in the shared
+                string table (sharedStrings.xml), 'inline' to write them into the cells (`t="inlineStr"`). Defaults to 'shared'.
+            cache (bool, optional): True to load the file from the template cache (`in2xl.template_cache`). The file is
+                compiled once and every further load gets a copy-on-write view of it, kept in memory. Defaults to False.
+            stats (Stats, optional): A `Stats` object which measures the phases and counts the operations of the workbook,
+                see `Worksheets.profile()`. Defaults to None (nothing is measured).
+            compression (int, optional): The default compression method of `Worksheets.save()`, `zipfile.ZIP_DEFLATED`
+                or `zipfile.ZIP_STORED` (no compression, the fastest mode). Defaults to `zipfile.ZIP_DEFLATED`.
+            level (int, optional): The default compression level of deflate, from 0 (none) to 9 (best).
+                Defaults to None (the default level of zlib).
+            full_calc (bool, optional): True to set `fullCalcOnLoad` in the workbook, so Excel recalculates all formulas
+                when the file is opened, and to keep the cached values of the formulas. False to remove the cached values
+                of the formulas which depend on the written cells only. Defaults to False.
 
         Returns:
             Worksheets: An instance of the Worksheets class that contains the data extracted from the workbook.
 
         Raises:
-            ValueError: If the `path` argument is None.
+            ValueError: If the `path` argument is None, the `strings` argument is not 'shared' or 'inline' or the
+                compression method or level is not supported.
 
         """
 
         if path is None:
             raise ValueError('Templatepath is missing')
 
-        tpath = os.path.dirname(path)
-        dtime = datetime.now().strftime("%Y%m%d")
-        tfile = f"~{dtime}_{os.path.basename(path)}.zip"
-        self._base = os.path.basename(path)
+        if strings not in ('shared', 'inline'):
+            raise ValueError(f"Input is outside of the parameters. ('shared' or 'inline' expected, {strings!r} received)")
+
+        check_compression(compression, level)
+
+        self.stream = stream
+        self.strings = strings
+        self.full_calc = full_calc
+        self.package = self._chart_dict = self._base = None
+
+        with measure(stats, 'load'):
+            if cache and isinstance(path, (str, os.PathLike)):
+                self._base = os.path.basename(path)
+                path = template_cache.get(path)
 
-        self.temp = os.path.join(tpath, tfile)
+            if isinstance(path, Template):
+                self._base = self._base or 'in-memory'
+                # the archive is shared with the template until it is modified
+                self.temp = io.BytesIO(path.data)
+                self.package = Package(self.temp, content=path.content, shared=path.parts)
+                self._chart_dict = {k: list(v) for k, v in path.chart_dict.items()}
+
+            elif isinstance(path, (bytes, bytearray, memoryview)):
+                self._base = 'in-memory'
+                self.temp = io.BytesIO(path)
+
+            elif hasattr(path, 'read'):
+                self._base = os.path.basename(getattr(path, 'name', None) or 'in-memory')
+                self.temp = io.BytesIO(path.read())
+
+            else:
+                tpath = os.path.dirname(path)
+                dtime = datetime.now().strftime("%Y%m%d")
+                self._base = os.path.basename(path)
 
-        shutil.copy(path, self.temp)
+                # a unique name, the same template may be opened several times at once
+                fd, self.temp = tempfile.mkstemp(prefix=f"~{dtime}_{self._base}.", suffix='.zip', dir=tpath or os.curdir)
+                os.close(fd)
 
-        self.wb_dict, self.wb_id_dict, self.wb, self.content, self.chart_dict, self.wb_state = self.__worksheets()
+                shutil.copy(path, self.temp)
 
-        return Worksheets(parent=self)
+            if self.package is None:
+                self.package = Package(self.temp)
+
+            self.package.stats = stats
+            self.package.compression = compression
+            self.package.level = level
+
+            self.wb_dict, self.wb_id_dict, self.wb, self.content, self.wb_state = self.__worksheets()
+
+            return Worksheets(parent=self)
 
 
 class Worksheets():
@@ -176,6 +290,7 @@ class Worksheets():
 
     Attributes:
         temp (str): The path of the temporary file created to hold the Excel workbook data.
+        package (Package): The in-memory representation of the parts of the temporary Excel workbook.
         xmain (str): The XML namespace for main XML elements.
         xdsgn (str): The XML namespace for design XML elements.
         wb_dict (dict): A dictionary mapping worksheet names to their corresponding XML file names.
@@ -183,45 +298,74 @@ class Worksheets():
         wb_id_dict (dict): A dictionary mapping worksheet names to their corresponding IDs.
         wb (etree._Element): The XML tree representing the workbook.
         wb_state (dict): A dictionary mapping worksheet names to their corresponding visibility states.
+        chart_dict (dict): A dictionary mapping worksheet names to the charts which reference them (cached by the workbook).
         content (list): A list of the names of all files in the Excel workbook.
-        stree (None): A reference to the worksheet XML tree.
+        stree (SharedStrings): A reference to the shared string table of the workbook.
         key (str): The name of the current worksheet.
         _state (str): The visibility state of the current worksheet.
         sheet (str): The name of the XML file that represents the current worksheet.
         tree (None): A reference to the XML tree for the current worksheet.
+        index (SheetIndex): A sorted index of the rows and cells of the current worksheet.
+        stream (bool): True if the worksheets are streamed instead of being parsed into memory.
+        strings (str): The default mode of writing strings, 'shared' or 'inline'.
+        full_calc (bool): True to let Excel recalculate all formulas on load instead of removing cached values.
+        calc (CalcChain): The index of the calculation chain of the workbook or None.
+        written (list): The ranges written since the cached values of the formulas were last removed.
         never (bool): A flag that indicates whether the current worksheet has never been accessed.
         check (tuple): A tuple of numeric types to check against for float values.
+        stats (Stats): The `Stats` object attached to the workbook or None.
 
     Methods:
         __init__(self, parent=None, key=None): Initializes a new instance of the Worksheets class.
         __getitem__(self, key): Retrieves a worksheet by name from the Excel workbook.
         state(self) -> str:  Returns/Sets the state of the worksheets object.
+        profile(self, callback=None, stats=None) -> Stats: Attaches a `Stats` object which measures the phases and counts the operations of the workbook.
         __change_dim(self, xml, row, column): Changes the dimensions of the specified cell range.
-        __change_xml(self, xml, row, column, value): Insert data into an XML sheet.
+        __change_xml(self, xml, row, column, value, inline=False): Insert data into an XML sheet.
+        __change_block(self, xml, row, column, types, texts, axis=0): Insert a rectangular block of data into an XML sheet.
+        __change_cell(self, ws_column, row, column, t, text): Writes a value into the element of a cell.
+        __clear_block(self, xml, row, column, last_row, last_column, keep_styles=True): Clears a rectangular range of an XML sheet.
         __change_strxml(self, value): Find, add or changes the value of a specified XML tag within the string table element
         __create_SubEl(self, main, tag, attrib={}, text=None): Creates a new sub-element with the given tag and attributes under the specified main element.
-        __clean_formula(self): Removes any child elements with tag 'v' under each 'f' element in the XML tree of the class instance.
+        __clean_formula(self): Removes the cached values of the formulas affected by the written ranges.
+        __full_calc(self): Sets `fullCalcOnLoad` in the workbook.xml.
         __get_strxml(self): Retrieves and parses the XML content from the 'xl/sharedStrings.xml' file in the Excel workbook.
         __get_xml(self): Reads the XML data for the current worksheet from the temporary file and stores it in `self.tree`.
+        __relations(self, part, kind) -> list: Returns the parts which are referenced by a part through relationships of a type.
+        __get_table(self, name) -> tuple: Returns the name and the XML tree of a table (ListObject) of the current worksheet.
+        __compact_strings(self): Removes unreferenced entries of the shared string table and renumbers the cells.
         __write_state(self, value): Update the state attribute of a sheet in the workbook.
         __write_xml(self): This method writes the current XML tree to the corresponding worksheet file within the Excel workbook file.
         __write_strxml(self): Write the shared strings XML to the temporary zip file.
         close(self) -> None: Close the workbook by removing the temporary file.
-        insert(self, data: Union(str, int, float, pd.DataFrame), row: int = 1, column: int = 1, axis: int = 0, header: bool = True, index: bool = False ) -> None: Insert data into the worksheet. Convert the input data into an array and pass it to the XML converter.
-        save(self, path: str = None) -> None: Saves the converted Excel file to the specified path
+        edit(self) -> Worksheets: Opens an edit session which keeps all modifications in memory until it is left or the workbook is saved.
+        insert(self, data: Union[str, int, float, pd.DataFrame], row: int = 1, column: int = 1, axis: int = 0, header: bool = True, index: bool = False, ignore_nan: bool = True, strings: str = None) -> None: Insert data into the worksheet. Convert the input data into an array and pass it to the XML converter.
+        insert_many(self, plan) -> Worksheets: Applies a write plan of (sheet, anchor, data, options) to several worksheets in one edit session.
+        replace_table(self, name, data, index=False, ignore_nan=True, strings=None) -> Worksheets: Replaces the body of a table and resizes it.
+        clear(self, range, keep_styles=True) -> Worksheets: Clears the values and formulas of a rectangular range.
+        read(self, range=None, header=True) -> pd.DataFrame: Reads the values of a range into a DataFrame.
+        refresh_pivot(self, name, data, refresh_on_load=True) -> Worksheets: Rewrites the pivot cache of a pivot table from a DataFrame.
+        save(self, path=None, workers=None, compression=None, level=None, compact_strings=False) -> None: Saves the converted Excel file to the specified path or file object.
+        save_bytes(self, **kwargs) -> bytes: Returns the content of the converted Excel file.
+        ainsert, ainsert_many, asave, asave_bytes, aclose: Coroutines of the methods above, the work is run on an executor.
 
     """
 
     def __init__(self, parent=None, key=None):
         self.temp = parent.temp
+        self.package = parent.package
         self.xmain = parent.xmain
         self.xdsgn = parent.xdsgn
         self.wb_dict = parent.wb_dict
         self.wb_id_dict = parent.wb_id_dict
         self.wb = parent.wb
         self.wb_state = parent.wb_state
+        self._workbook = getattr(parent, '_workbook', parent)
         self.content = parent.content
         self.sheetnames = parent.sheetnames
+        self.stream = parent.stream
+        self.strings = parent.strings
+        self.full_calc = parent.full_calc
         self.stree = None
         self.key = key
         self._base = parent._base
@@ -230,7 +374,8 @@ class Worksheets():
             self._state = self.wb_state[self.key]
             self.sheet = self.wb_dict[self.key]
             self._repr = f"Workbook: {self._base} | Sheet: {key}"
-        self.tree = None
+        self.tree = self.chtree = self.calc = self.index = None
+        self.written = []
         self.never = False
         self.check = (numbers.Real, decimal.Decimal)
 
@@ -247,6 +392,54 @@ class Worksheets():
     def __repr__(self):
         return self._repr
 
+    @property
+    def chart_dict(self) -> dict:
+        """
+        Returns a dictionary of worksheet names and the charts referencing them, see `Workbook.chart_dict`.
+
+        Returns:
+            dict: A dictionary of worksheet names and the corresponding chart filenames.
+        """
+        return self._workbook.chart_dict
+
+    @property
+    def stats(self) -> Stats:
+        """
+        Returns the `Stats` object attached to the workbook or None.
+
+        """
+        return self.package.stats
+
+    def profile(self, callback=None, stats: Stats = None) -> Stats:
+        """
+        Attaches a `Stats` object to the workbook (shared by all of its worksheets). From now on the cumulative
+        time of every phase (reading and parsing parts, inserting, converting DataFrames, serializing, rewriting
+        the archive, saving) and counters of the operations (archive rewrites, bytes read and written, cells
+        created and updated, shared string hits and misses, ...) are collected.
+
+        Example:
+            stats = wb.profile(callback=lambda kind, name, value: metrics.record(f'in2xl.{name}', value))
+            wb[sheetname].insert(df, 2, 3)
+            print(stats.timings, stats.counters)
+
+        Args:
+            callback (callable, optional): A function called as `callback(kind, name, value)` for every finished phase
+                (`kind` 'phase', `value` the elapsed seconds) and every counter increment (`kind` 'counter').
+            stats (Stats, optional): The `Stats` object to attach. Defaults to a new one.
+
+        Returns:
+            Stats: The attached `Stats` object.
+        """
+
+        if stats is None:
+            stats = Stats(callback)
+        elif callback is not None:
+            stats.callback = callback
+
+        self.package.stats = stats
+
+        return stats
+
     @property
     def state(self) -> str:
         """
@@ -255,7 +448,7 @@ class Worksheets():
         Returns:
             str: The current state of the worksheets object.
         """
-        return self._state
+        return self.wb_state[self.key]
 
     @state.setter
     def state(self, value: int) -> Worksheets:
@@ -286,231 +479,245 @@ class Worksheets():
 
         return self
 
-    def __change_dim(self, xml, row, column):
+    def __change_dim(self, xml, row, column, last_row=None, last_column=None, reset=False):
 
         """
         Changes the dimensions of the specified cell range.
 
         Args:
             xml (Element): The XML element to modify.
-            row (int): The row number of the cell range.
-            column (str): The column letter of the cell range.
+            row (int): The (first) row number of the cell range.
+            column (int): The (first) column number of the cell range.
+            last_row (int, optional): The last row number of the cell range. Defaults to `row`.
+            last_column (int, optional): The last column number of the cell range. Defaults to `column`.
+            reset (bool, optional): True to replace the current dimension instead of extending it. Defaults to False.
 
         Returns:
             Worksheets: The updated Worksheets object.
         """
 
-        dimnav = xml.find(".//x:dimension", namespaces={'x': f'{self.xmain}'.strip('{}')})
-        match = re.match(r"([A-Z]+)(\d+)\:{1}([A-Z]+)(\d+)", dimnav.attrib['ref'], re.I)
-        fl = sum([(ord(match.groups()[0].upper()[-i-1])-64)*26**i for i in range(len(match.groups()[0]))])
-        fn = int(match.groups()[1])
-        sl = sum([(ord(match.groups()[2].upper()[-i-1])-64)*26**i for i in range(len(match.groups()[2]))])
-        sn = int(match.groups()[3])
+        dimnav = xml.find(f"./{self.xmain}dimension")
 
-        cl = sum([(ord(column.upper()[-i-1])-64)*26**i for i in range(len(column))])
+        if dimnav is None:
+            return self
 
-        if fl < cl:
-            pass
-        elif fl == cl:
-            if fn <= row:
-                pass
-            else:
-                fn = row
-        else:
-            fl = cl
+        last_row = row if last_row is None else last_row
+        last_column = column if last_column is None else last_column
 
-        if sl > cl:
-            pass
-        elif sl == cl:
-            if sn >= row:
-                pass
-            else:
-                sn = row
-        else:
-            sl = cl
+        if not reset:
+            first, _, last = dimnav.attrib['ref'].partition(':')
+            fn, fl = split_ref(first)
+            sn, sl = split_ref(last or first)
 
-        att = f'{xl_name(fl-1)}{fn}:{xl_name(sl-1)}{sn}'
+            row, column = min(fn, row), min(fl, column)
+            last_row, last_column = max(sn, last_row), max(sl, last_column)
+
+        att = f'{column_name(column)}{row}:{column_name(last_column)}{last_row}'
 
         dimnav.attrib['ref'] = att
 
         return self
 
-    def __change_xml(self, xml, row, column, value):
+    @timed('change_xml')
+    def __change_xml(self, xml, row, column, value, inline=False):
         """
         Insert data into an XML sheet.
 
         Parameters:
             xml (ElementTree.Element): The XML sheet to be modified.
             row (int): The row number where the value will be inserted.
-            column (str): The column letter where the value will be inserted.
+            column (int): The column number where the value will be inserted.
             value (str or int): The value to be inserted.
+            inline (bool, optional): True to write a string into the cell instead of the shared string table. Defaults to False.
 
         Returns:
             self: The modified XML sheet.
         """
 
-        ws_row = xml.find(f"./{self.xmain}sheetData/{self.xmain}row/[@r='{row}']")
+        t, text = cell_value(value)
 
-        if ws_row is None:
+        if t == 'str' and inline:
+            t = 'inlineStr'
+            check_text(text)
+        elif t == 'str':
+            t, text = 's', str(self.__change_strxml(text))
 
-            a_row = xml.findall(".//x:row", namespaces={'x': f'{self.xmain}'.strip('{}')})
+        if self.stats is not None:
+            self.stats.count('cells_written')
 
-            if not a_row:
+        self.written.append((row, column, row, column))
 
-                ws_main = xml.find(f"./{self.xmain}sheetData")
-                self.__create_SubEl(ws_main, f'{self.xmain}row', attrib={'r': str(row),
-                                                                         'spans': '1:1',
-                                                                         etree.QName(self.xdsgn, 'dyDescent'): '0.25'
-                                                                         }
-                                    )
-                dimnav = xml.find(".//x:dimension", namespaces={'x': f'{self.xmain}'.strip('{}')})
-                dimnav.attrib['ref'] = f'{column}{row}:{column}{row}'
+        if self.stream:
+            self.never = self.never and (t != 's')
+            xml.update(row, [column], [t], [text])
+            return self
 
-                self.__change_xml(xml, row, column, value)
+        empty = not len(self.index)
 
-                return self
+        ws_column, created = self.index.cell(row, column)
 
-            srlist = [int(x.attrib['r']) for x in a_row]
-            min_n = min(srlist, key=lambda x: (abs(x - row), x))
-            add_row = xml.find(f".//x:row[@r='{min_n}']", namespaces={'x': f'{self.xmain}'.strip('{}')})
-            new_row = etree.Element(f'{self.xmain}row')
-            for i in add_row.attrib.keys():
-                new_row.attrib[i] = add_row.attrib[i]
-            new_row.attrib['r'] = str(row)
-            if min_n > row:
-                add_row.addprevious(new_row)
-            else:
-                add_row.addnext(new_row)
+        if created:
+            self.__change_dim(xml, row, column, reset=empty)
 
-            self.__change_dim(xml, row, column)
+        if self.stats is not None:
+            self.stats.count('cells_created' if created else 'cells_updated')
 
-            self.__change_xml(xml, row, column, value)
+        return self.__change_cell(ws_column, row, column, t, text)
 
-            return self
+    @timed('change_block')
+    def __change_block(self, xml, row, column, types, texts, axis=0):
+        """
+        Insert a rectangular block of data into an XML sheet. The existing rows of the block are walked once,
+        the cells of each row are merged with the existing cells in one pass (existing cells keep their style)
+        and the dimension is updated once at the end.
+
+        Parameters:
+            xml (ElementTree.Element): The XML sheet to be modified.
+            row (int): The row number of the upper left corner of the block.
+            column (int): The column number of the upper left corner of the block.
+            types (np.ndarray): The cell types of the block (rows x columns).
+            texts (np.ndarray): The texts of the block (rows x columns), None for cells which are skipped.
+            axis (int, optional): 0 to insert the rows of the block as rows, 1 to insert them as columns. Defaults to 0.
 
-        ws_column = ws_row.find(f"./{self.xmain}c/[@r='{column}{row}']")
+        Returns:
+            self: The modified XML sheet.
+        """
 
-        if ws_column is None:
+        import numpy as np
 
-            oc = sum([(ord(column.upper()[-i-1])-64)*26**i for i in range(len(column))])
-            a_row = xml.findall(".//x:row", namespaces={'x': f'{self.xmain}'.strip('{}')})
-            rownav = xml.find(f".//x:row[@r='{row}']", namespaces={'x': f'{self.xmain}'.strip('{}')})
-            allrow = rownav.findall(".//x:c", namespaces={'x': f'{self.xmain}'.strip('{}')})
+        if axis == 1:
+            types, texts = types.T, texts.T
 
-            if not allrow:
+        valid = texts != None  # noqa: E711 (elementwise comparison)
 
-                istext = ''
+        r_offsets = np.flatnonzero(valid.any(axis=1))
+        c_offsets = np.flatnonzero(valid.any(axis=0))
 
-                if isinstance(value, str) or (str(value).lower() == "nan"):
-                    value = self.__change_strxml(str(value))
-                    istext = ' t="s"'
-                    self.never = False
+        if not len(r_offsets):
+            return self
 
-                ws_row.append(etree.XML(f'<c r="{column}{row}"{istext}><v>{value}</v></c>'))
+        self.written.append((row + int(r_offsets[0]), column + int(c_offsets[0]), row + int(r_offsets[-1]), column + int(c_offsets[-1])))
 
-                return self
+        targets = (r_offsets + row).tolist()
 
-            c_vault = []
+        if self.stats is not None:
+            self.stats.count('cells_written', int(valid.sum()))
 
-            for i in allrow:
-                match = re.match(r"(^[A-Z]+)", i.attrib['r'], re.I)
-                c_vault.append(sum([(ord(match.group().upper()[-i-1])-64)*26**i for i in range(len(match.group()))]))
+        if self.stream:
+            self.never = self.never and not (types == 's').any()
+            for j, r_idx in zip(r_offsets.tolist(), targets):
+                offsets = np.flatnonzero(valid[j])
+                xml.update(r_idx, (offsets + column).tolist(), types[j][offsets].tolist(), texts[j][offsets].tolist())
+            return self
 
-            c_min = min(c_vault, key=lambda x: (abs(x - oc), x))
+        empty = not len(self.index)
+        created = self.index.created
 
-            add_c = rownav.find(f".//x:c[@r='{xl_name(c_min-1)}{row}']", namespaces={'x': f'{self.xmain}'.strip('{}')})
-            new_c = etree.Element(f'{self.xmain}c')
-            new_c.attrib['r'] = f'{xl_name(oc-1)}{row}'
+        for j, r_idx, ws_row in zip(r_offsets.tolist(), targets, self.index.rows(targets)):
+            offsets = np.flatnonzero(valid[j])
+            t_row, v_row = types[j], texts[j]
+            for c, ws_column in zip(offsets.tolist(), self.index.cells(r_idx, (offsets + column).tolist())):
+                self.__change_cell(ws_column, r_idx, column + c, t_row[c], v_row[c])
 
-            if c_min > oc:
-                add_c.addprevious(new_c)
-            else:
-                add_c.addnext(new_c)
+        self.__change_dim(xml, targets[0], column + int(c_offsets[0]), targets[-1], column + int(c_offsets[-1]), reset=empty)
 
-            self.__change_dim(xml, row, column)
+        if self.stats is not None:
+            created = self.index.created - created
+            self.stats.count('cells_created', created)
+            self.stats.count('cells_updated', int(valid.sum()) - created)
 
-            self.__change_xml(xml, row, column, value)
+        return self
 
-            return self
+    def __change_cell(self, ws_column, row, column, t, text):
+        """
+        Writes a value into the element of a cell.
+
+        Parameters:
+            ws_column (ElementTree.Element): The element of the cell.
+            row (int): The row number of the cell.
+            column (int): The column number of the cell.
+            t (str): The type of the cell ('s' for shared strings, 'inlineStr' for inline strings, 'b' for booleans), None for numbers.
+            text (str): The text of the `<v>` element (of the `<is><t>` element for inline strings).
 
-        istext = ''
+        Returns:
+            self: The modified XML sheet.
+        """
 
-        if isinstance(value, str) or (str(value).lower() == "nan"):
-            value = self.__change_strxml(str(value))
-            istext = ' t="s"'
+        if t == 's':
             self.never = False
 
-        ws_value = ws_column.find(f"./{self.xmain}v")
+        if set_cell(ws_column, t, text):
+            self.__change_cchxml(f'{column_name(column)}{row}')
 
-        if (istext != '') and ('t' not in ws_column.attrib):
-            ws_column.set('t', "s")
-        elif (istext == '') and ('t' in ws_column.attrib):
-            ws_column.attrib.pop('t')
+        return self
+
+    @timed('clear_block')
+    def __clear_block(self, xml, row, column, last_row, last_column, keep_styles=True):
+        """
+        Clears a rectangular range of an XML sheet. The existing rows of the range are walked once and the
+        formulas of cleared cells are removed from the calcChain.xml. The dimension is not changed.
 
-        if ws_value is None:
-            ws_column.append(etree.XML(f'<v>{value}</v>'))
-        elif ws_value is not None:
-            ws_value.text = str(value)
+        Parameters:
+            xml (ElementTree.Element): The XML sheet to be modified.
+            row (int): The first row number of the range.
+            column (int): The first column number of the range.
+            last_row (int): The last row number of the range.
+            last_column (int): The last column number of the range.
+            keep_styles (bool, optional): True to keep the cells with their style, False to remove them. Defaults to True.
 
-        if ws_column.find(f"./{self.xmain}f") is not None:
-            self.__change_cchxml(f'{column}{row}')
-            fremove = ws_column.find(f"./{self.xmain}f")
-            fremove.getparent().remove(fremove)
+        Returns:
+            self: The modified XML sheet.
+        """
+
+        self.written.append((row, column, last_row, last_column))
+
+        if self.stream:
+            xml.clear(row, column, last_row, last_column, keep_styles=keep_styles)
+            return self
+
+        for ref in self.index.clear(row, column, last_row, last_column, keep_styles=keep_styles):
+            self.__change_cchxml(ref)
 
         return self
 
+    @timed('change_cchxml')
     def __change_cchxml(self, id):
         """
-        Find, add or changes the value of a specified XML tag within the calcChain.xml.
+        Removes the cell of a removed formula from the calcChain.xml. The cell is looked up in the index of the
+        calculation chain, cells which are not included in the chain are skipped.
 
         Args:
-            id (str): The value to change the XML tag to.
+            id (str): The reference of the cell, e.g. 'B3'.
 
         Returns:
-            self: The modified calcChain.xml
+            self: The instance of the class.
 
         """
 
-        if self.chtree is None:
-            return self
+        if self.stats is not None:
+            self.stats.count('formulas_removed')
 
-        cremove = self.chtree.xpath(f".//x:c[@i='{self.wb_id_dict[self.key]}' and @r='{id}']", namespaces={'x': f'{self.xmain}'.strip('{}')})[0]
+        if self.calc is None:
+            return self
 
-        cremove.getparent().remove(cremove)
+        self.calc.remove(self.wb_id_dict[self.key], id)
 
         return self
 
+    @timed('change_strxml')
     def __change_strxml(self, value):
         """
-        Find, add or changes the value of a specified XML tag within the string table element.
+        Find or add a string within the shared string table. The lookup takes constant time.
 
         Args:
-            value (str): The value to change the XML tag to.
+            value (str): The string to be referenced.
 
         Returns:
-            int: The index number of the updated XML tag within the string table element.
+            int: The index number of the string within the shared string table.
 
         """
 
-        if self.stree.xpath(f'.//x:t[text()="{value}"]', namespaces={'x': f'{self.xmain}'.strip('{}')}):
-            _full_list = self.stree.xpath('.//x:t', namespaces={'x': f'{self.xmain}'.strip('{}')})
-            _count = 0
-            for _data in _full_list:
-                if _data.text == value:
-                    _number = _count
-                    self.stree.attrib['count'] = str(int(self.stree.attrib['count']) + 1)
-                else:
-                    _count = _count + 1
-        else:
-            root = self.stree.getroottree().getroot()
-            self.__create_SubEl(root, f'{self.xmain}si')
-            sub_si = self.stree.xpath(".//x:si", namespaces={'x': f'{self.xmain}'.strip('{}')})[-1]
-            self.__create_SubEl(sub_si, f'{self.xmain}t', text=value)
-            self.stree.attrib['count'] = str(int(self.stree.attrib['count']) + 1)
-            self.stree.attrib['uniqueCount'] = str(int(self.stree.attrib['uniqueCount']) + 1)
-            _number = int(self.stree.attrib['uniqueCount']) - 1
-
-        return _number
+        return self.stree.add(value)
 
     def __create_SubEl(self, main, tag, attrib={}, text=None):
 
@@ -533,20 +740,74 @@ class Worksheets():
 
         return self
 
+    @timed('clean_formula')
     def __clean_formula(self):
 
         """
-        Removes any child elements with tag 'v' under each 'f' element in the XML tree of the class instance.
+        Removes the cached values (`<v>`) of the formulas which depend on the ranges written since the last call,
+        directly or through other formulas of the worksheet. The formulas are looked up in the `FormulaIndex` of the
+        worksheet, which is built on first use, so the cost depends on the written ranges and not on the size of
+        the worksheet. In `full_calc` mode the cached values are kept and Excel recalculates all formulas on load.
+        Streamed worksheets are cleaned while they are written, the written ranges are handed over to their `SheetStream`.
 
         """
 
-        form_clean = self.tree.findall('.//x:f', namespaces={'x': f'{self.xmain}'.strip('{}')})
-        for e in form_clean:
-            parent = e.getparent()
-            for c in parent.getchildren():
-                if c.tag == '{s}v'.format(s=self.xmain):
-                    parent.remove(c)
+        written, self.written = self.written, []
+
+        if self.full_calc:
+            return self.__full_calc()
+
+        if not written:
+            return self
+
+        if self.stream:
+            self.tree.written.extend(written)
+            return self
+
+        if self.index.formulas is None:
+            self.index.formulas = FormulaIndex(self.tree, self.key)
+
+        affected = self.index.formulas.affected(written)
+
+        for ws_column in affected:
+            for ws_value in ws_column.findall(f'{self.xmain}v'):
+                ws_column.remove(ws_value)
+
+        if self.stats is not None:
+            self.stats.count('formulas_cleaned', len(affected))
+
+        return self
+
+    def __full_calc(self):
 
+        """
+        Sets `fullCalcOnLoad` in the `<calcPr>` element of the workbook.xml, so Excel recalculates all formulas
+        when the file is opened.
+
+        Returns:
+            self: The instance of the class.
+
+        """
+
+        self.wb = self.package.get('xl/workbook.xml')
+
+        calc = self.wb.find(f'{self.xmain}calcPr')
+
+        if calc is None:
+            calc = etree.Element(f'{self.xmain}calcPr')
+            # the calcPr follows the sheets and the defined names
+            previous = [el for el in self.wb if etree.QName(el).localname in ('sheets', 'functionGroups', 'externalReferences', 'definedNames')]
+            previous[-1].addnext(calc)
+
+        elif calc.get('fullCalcOnLoad') in ('1', 'true'):
+            return self
+
+        calc.attrib['fullCalcOnLoad'] = '1'
+        self.package.set('xl/workbook.xml')
+
+        return self
+
+    @timed('get_cchxml')
     def __get_cchxml(self):
 
         """
@@ -561,19 +822,22 @@ class Worksheets():
         """
 
         try:
-            with zipfile.ZipFile(self.temp, mode="r") as myzip:
-                with myzip.open('xl/calcChain.xml') as myfile:
-                    self.chtree = etree.fromstring(myfile.read())
-
-            zipfile.delete_from_zip_file(self.temp, file_names='xl/calcChain.xml')
+            self.chtree = self.package.get('xl/calcChain.xml')
 
         except KeyError:
             # if not exists this information is not needed
-            self.chtree = None
-            pass
+            self.chtree = self.calc = None
+            return self
+
+        # the cells of the chain are indexed once by (sheet id, reference)
+        if 'xl/calcChain.xml' not in self.package.cache:
+            self.package.cache['xl/calcChain.xml'] = CalcChain(self.chtree)
+
+        self.calc = self.package.cache['xl/calcChain.xml']
 
         return self
 
+    @timed('get_strxml')
     def __get_strxml(self):
 
         """
@@ -588,82 +852,198 @@ class Worksheets():
         """
 
         try:
-            with zipfile.ZipFile(self.temp, mode="r") as myzip:
-                with myzip.open('xl/sharedStrings.xml') as myfile:
-                    self.stree = etree.fromstring(myfile.read())
-
-            zipfile.delete_from_zip_file(self.temp, file_names='xl/sharedStrings.xml')
+            self.stree = self.package.get('xl/sharedStrings.xml', parser=SharedStrings.fromstring)
 
         except KeyError:
-            self.stree = etree.fromstring(b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="0" uniqueCount="0"/>')
-            self.never = True
+            self.stree = SharedStrings()
+            self.package.add('xl/sharedStrings.xml', self.stree)
 
-            with zipfile.ZipFile(self.temp, mode="r") as myzip:
-                with myzip.open('[Content_Types].xml') as myfile:
-                    cttree = etree.fromstring(myfile.read())
+        # The part is registered in the workbook by `__write_strxml` as soon as the first string is added
+        self.never = ('xl/sharedStrings.xml' not in self.package.content) and ('xl/sharedStrings.xml' not in self.package.dirty)
 
-            xct = '{http://schemas.openxmlformats.org/package/2006/content-types}'
+        return self
 
-            ct_check = cttree.find(f"./{xct}Override/[@PartName='/xl/sharedStrings.xml']")
-            if ct_check is None:
-                zipfile.delete_from_zip_file(self.temp, file_names='[Content_Types].xml')
+    @timed('get_xml')
+    def __get_xml(self):
 
-                pre_ct = cttree.find(f"./{xct}Override/[@PartName='/xl/styles.xml']")
-                new_ct = etree.Element(f'{xct}Override')
-                new_ct.attrib['ContentType'] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
-                new_ct.attrib['PartName'] = "/xl/sharedStrings.xml"
+        """
+        Reads the XML data for the current worksheet from the temporary file and stores it in `self.tree`,
+        the index of its rows and cells is stored in `self.index`.
+        The worksheet is only parsed on first access, afterwards the parsed tree and its index are reused.
+        In streaming mode `self.tree` is the `SheetStream` which collects the inserted cells, the worksheet is not read.
 
-                pre_ct.addnext(new_ct)
+        Returns:
+            self : Returns the instance of the `Excel` class after reading and storing the worksheet XML data.
 
-                with zipfile.ZipFile(self.temp, mode="a") as myzip:
-                    with myzip.open('[Content_Types].xml', 'w') as myfile:
-                        myfile.write(etree.tostring(cttree))
+        """
 
-            with zipfile.ZipFile(self.temp, mode="r") as myzip:
-                with myzip.open('xl/_rels/workbook.xml.rels') as myfile:
-                    retree = etree.fromstring(myfile.read())
+        if self.stream:
+            if f'xl/worksheets/{self.sheet}' not in self.package.parts:
+                self.package.add(f'xl/worksheets/{self.sheet}',
+                                 SheetStream(on_formula=self.__change_cchxml, after={'xl/calcChain.xml'}, clean=not self.full_calc, sheet=self.key))
 
-            xre = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+            self.tree = self.package.parts[f'xl/worksheets/{self.sheet}']
 
-            re_check = retree.find(f"./{xre}Relationship/[@Target='sharedStrings.xml']")
-            if re_check is None:
+            if self.tree.on_formula is None:
+                # the worksheet was only renumbered by `__compact_strings`, inserts need the full treatment
+                self.tree.on_formula, self.tree.clean, self.tree.sheet = self.__change_cchxml, not self.full_calc, self.key
+                self.tree.after.add('xl/calcChain.xml')
 
-                zipfile.delete_from_zip_file(self.temp, file_names='xl/_rels/workbook.xml.rels')
+            return self
 
-                all_re = retree.findall('.//x:Relationship', namespaces={'x': f'{xre}'.strip('{}')})
+        self.tree = self.package.get(f'xl/worksheets/{self.sheet}')
 
-                self.__create_SubEl(retree, f'{xre}Relationship',
-                                    attrib={'Target': "sharedStrings.xml",
-                                            'Type': "http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings",
-                                            'Id': f"rId{len(all_re)+1}"
-                                            }
-                                    )
+        if f'xl/worksheets/{self.sheet}' not in self.package.cache:
+            self.package.cache[f'xl/worksheets/{self.sheet}'] = SheetIndex(self.tree)
 
-                with zipfile.ZipFile(self.temp, mode="a") as myzip:
-                    with myzip.open('xl/_rels/workbook.xml.rels', 'w') as myfile:
-                        myfile.write(etree.tostring(retree))
+        self.index = self.package.cache[f'xl/worksheets/{self.sheet}']
 
         return self
 
-    def __get_xml(self):
+    def __relations(self, part, kind) -> list:
 
         """
-        Reads the XML data for the current worksheet from the temporary file and stores it in `self.tree`.
-        Then, it deletes the worksheet file from the temporary ZIP archive.
+        Returns the parts which are referenced by a part through relationships of a type.
+
+        Args:
+            part (str): The name of the part, e.g. 'xl/worksheets/sheet1.xml'.
+            kind (str): The last segment of the relationship type, e.g. 'table'.
 
         Returns:
-            self : Returns the instance of the `Excel` class after reading and storing the worksheet XML data.
+            list: The names of the referenced parts.
 
         """
 
-        with zipfile.ZipFile(self.temp, mode="r") as myzip:
-            with myzip.open(f'xl/worksheets/{self.sheet}') as myfile:
-                self.tree = etree.fromstring(myfile.read())
+        folder, base = posixpath.split(part)
+
+        try:
+            retree = self.package.get(f'{folder}/_rels/{base}.rels')
+        except KeyError:
+            return []
+
+        xre = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+        parts = []
+
+        for rel in retree:
+            if rel.tag != f'{xre}Relationship' or not rel.attrib.get('Type', '').endswith(f'/{kind}'):
+                continue
+
+            target = rel.attrib['Target']
+            parts.append(target[1:] if target.startswith('/') else posixpath.normpath(posixpath.join(folder, target)))
+
+        return parts
+
+    def __get_table(self, name):
+
+        """
+        Finds a table (ListObject) of the current worksheet by its name through the relationships of the worksheet.
+
+        Args:
+            name (str): The name (`displayName`) of the table, case-insensitive like in Excel.
+
+        Returns:
+            tuple: The name of the table part and its XML tree.
+
+        Raises:
+            KeyError: If the worksheet has no table with this name.
+
+        """
+
+        tables = {}
+
+        for part in self.__relations(f'xl/worksheets/{self.sheet}', 'table'):
+            table = self.package.get(part)
+            tables[table.attrib.get('displayName', table.attrib.get('name'))] = part, table
+
+        for key, value in tables.items():
+            if key.lower() == name.lower():
+                return value
+
+        raise KeyError(f"the table [{name}] seems to be not included in the sheet [{self.key}], possible tables: {list(tables)}")
+
+    @timed('compact_strings')
+    def __compact_strings(self):
+
+        """
+        Removes the entries of the shared string table which are not referenced by any worksheet anymore and
+        repairs its `count` and `uniqueCount`. The references of all worksheets are collected first (parsed
+        worksheets from their tree, all others row by row from the temporary file), then the table is compacted
+        and the `t="s"` cells of the worksheets whose references changed are renumbered in one sweep.
+        The worksheets are taken from the relationships of the workbook.xml and from the members of the package,
+        whatever their names. If a worksheet of the relationships is missing, the table is left as it is.
+
+        Returns:
+            self: The instance of the class.
+
+        """
 
-        zipfile.delete_from_zip_file(self.temp, file_names=f'xl/worksheets/{self.sheet}')
+        import numpy as np
+
+        self.__get_strxml()
+
+        if self.never:
+            return self
+
+        refs = {}
+
+        sheets = dict.fromkeys(self.__relations('xl/workbook.xml', 'worksheet'))
+        sheets.update(dict.fromkeys(i for i in [*self.package.content, *self.package.parts]
+                                    if i.startswith('xl/worksheets/') and i.endswith('.xml') and ('/_rels/' not in i)))
+
+        if any(name not in self.package for name in sheets):
+            # an unreferenced string could still be used by the missing worksheet
+            return self
+
+        for name in sheets:
+            part = self.package.parts.get(name)
+
+            if (part is not None) and not hasattr(part, 'stream'):
+                found = string_refs(part.find(f'{self.xmain}sheetData').iterchildren(f'{self.xmain}row'))
+            else:
+                with zipfile.ZipFile(self.temp, mode="r") as myzip, myzip.open(name) as source:
+                    if part is None:
+                        found = string_refs(iter_rows(source))
+                    else:
+                        # the pending cells of a streamed worksheet are counted as they will be written
+                        with tempfile.SpooledTemporaryFile(max_size=64 << 20) as buffer:
+                            part.stream(source, buffer)
+                            buffer.seek(0)
+                            found = string_refs(iter_rows(buffer))
+
+            found = np.asarray(found, dtype=np.int64)
+            refs[name] = found[(found >= 0) & (found < len(self.stree))]
+
+        counts = np.zeros(len(self.stree), dtype=np.int64)
+
+        for found in refs.values():
+            counts += np.bincount(found, minlength=len(counts))
+
+        mapping = self.stree.compact(counts)
+        self.package.set('xl/sharedStrings.xml')
+        self.stree.changed = False
+
+        moved = np.array([i != j for i, j in enumerate(mapping)], dtype=bool)
+
+        for name, found in refs.items():
+            if not moved[found].any():
+                continue
+
+            part = self.package.parts.get(name)
+
+            if hasattr(part, 'stream'):
+                part.renumber(mapping)
+            elif (part is None) and self.stream:
+                part = SheetStream(clean=False, remap=mapping)
+            else:
+                part = self.package.get(name)
+                for ws_row in part.find(f'{self.xmain}sheetData').iterchildren(f'{self.xmain}row'):
+                    remap_refs(ws_row, mapping)
+
+            self.package.set(name, part)
 
         return self
 
+    @timed('write_state')
     def __write_state(self, value):
 
         """
@@ -684,8 +1064,7 @@ class Worksheets():
         if self.wb_state[self.key] == value:
             return self
 
-        # Delete the workbook.xml file from the zip file.
-        zipfile.delete_from_zip_file(self.temp, file_names='xl/workbook.xml')
+        self.wb = self.package.get('xl/workbook.xml')
 
         # Find the sheet node in the workbook with the given name.
         snode = self.wb.xpath(f'.//x:sheet[@name="{self.key}"]', namespaces={'x': f'{self.xmain}'.strip('{}')})[0]
@@ -695,28 +1074,41 @@ class Worksheets():
         else:
             snode.attrib['state'] = value
 
-        # Write the updated workbook xml to the zip file.
-        with zipfile.ZipFile(self.temp, mode="a") as myzip:
-            with myzip.open('xl/workbook.xml', 'w') as myfile:
-                myfile.write(etree.tostring(self.wb))
+        # Mark the updated workbook xml to be written to the zip file.
+        self.package.set('xl/workbook.xml')
 
-        with zipfile.ZipFile(self.temp, mode="r") as myzip:
-            with myzip.open('xl/workbook.xml') as myfile:
-                self.wb = etree.fromstring(myfile.read())
+        self.__read_state()
 
-        wb_state = {}
+        if not self.package.session:
+            self.package.flush()
+
+        return self
+
+    def __read_state(self):
+
+        """
+        Reads the states of all sheets from the workbook.xml into the (shared) state dictionary.
+
+        Returns:
+            self: The updated instance of the class.
+
+        """
+
+        self.wb = self.package.get('xl/workbook.xml')
 
         for sheets in self.wb.iter(f'{self.xmain}sheets'):
             for i in sheets:
                 if 'state' in i.attrib:
-                    wb_state[i.attrib['name']] = i.attrib['state']
+                    self.wb_state[i.attrib['name']] = i.attrib['state']
                 else:
-                    wb_state[i.attrib['name']] = 'visible'
+                    self.wb_state[i.attrib['name']] = 'visible'
 
-        self.wb_state = wb_state
+        if self.key is not None:
+            self._state = self.wb_state[self.key]
 
         return self
 
+    @timed('write_cchxml')
     def __write_cchxml(self):
 
         """
@@ -729,12 +1121,11 @@ class Worksheets():
         if self.chtree is None:
             return self
 
-        with zipfile.ZipFile(self.temp, mode="a") as myzip:
-            with myzip.open('xl/calcChain.xml', 'w') as myfile:
-                myfile.write(etree.tostring(self.chtree))
+        self.package.set('xl/calcChain.xml')
 
         return self
 
+    @timed('write_xml')
     def __write_xml(self):
 
         """
@@ -745,12 +1136,11 @@ class Worksheets():
 
         """
 
-        with zipfile.ZipFile(self.temp, mode="a") as myzip:
-            with myzip.open(f'xl/worksheets/{self.sheet}', 'w') as myfile:
-                myfile.write(etree.tostring(self.tree))
+        self.package.set(f'xl/worksheets/{self.sheet}')
 
         return self
 
+    @timed('write_strxml')
     def __write_strxml(self):
 
         """
@@ -761,31 +1151,113 @@ class Worksheets():
 
         """
 
-        if self.never:
+        if self.never or not self.stree.changed:
             return self
 
-        with zipfile.ZipFile(self.temp, mode="a") as myzip:
-            with myzip.open('xl/sharedStrings.xml', 'w') as myfile:
-                myfile.write(etree.tostring(self.stree))
+        if 'xl/sharedStrings.xml' not in self.package.content:
+            self.__register_strxml()
+
+        self.package.set('xl/sharedStrings.xml')
+        self.stree.changed = False
+
+        return self
+
+    def __register_strxml(self):
+
+        """
+        Registers a new 'xl/sharedStrings.xml' in the content types and the relationships of the workbook.
+
+        Returns:
+            Workbook: instance of the Workbook class.
+
+        """
+
+        cttree = self.package.get('[Content_Types].xml')
+
+        xct = '{http://schemas.openxmlformats.org/package/2006/content-types}'
+
+        ct_check = cttree.find(f"./{xct}Override/[@PartName='/xl/sharedStrings.xml']")
+        if ct_check is None:
+
+            pre_ct = cttree.find(f"./{xct}Override/[@PartName='/xl/styles.xml']")
+            new_ct = etree.Element(f'{xct}Override')
+            new_ct.attrib['ContentType'] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
+            new_ct.attrib['PartName'] = "/xl/sharedStrings.xml"
+
+            pre_ct.addnext(new_ct)
+
+            self.package.set('[Content_Types].xml')
+
+        retree = self.package.get('xl/_rels/workbook.xml.rels')
+
+        xre = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+        re_check = retree.find(f"./{xre}Relationship/[@Target='sharedStrings.xml']")
+        if re_check is None:
+
+            all_re = retree.findall('.//x:Relationship', namespaces={'x': f'{xre}'.strip('{}')})
+
+            self.__create_SubEl(retree, f'{xre}Relationship',
+                                attrib={'Target': "sharedStrings.xml",
+                                        'Type': "http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings",
+                                        'Id': f"rId{len(all_re)+1}"
+                                        }
+                                )
+
+            self.package.set('xl/_rels/workbook.xml.rels')
 
         return self
 
     def close(self) -> None:
         """
-        Close the workbook by removing the temporary file.
+        Close the workbook by removing the temporary file (or releasing the buffer of an in-memory workbook).
 
         """
 
+        if isinstance(self.temp, io.BytesIO):
+            return self.temp.close()
+
         return os.remove(self.temp)
 
+    @contextmanager
+    def edit(self) -> Worksheets:
+        """
+        Opens an edit session. Within the session every worksheet, the sharedStrings.xml and the calcChain.xml
+        are parsed at most once and all inserts are applied to the in-memory trees. The temporary Excel file
+        is written a single time when the session is left, it is not written at all if the workbook was saved
+        within the session and not modified afterwards (the modifications stay in memory).
+        If an exception is raised within the session, all modifications which have not been saved are discarded.
+
+        Example:
+            with wb.edit() as session:
+                session[sheetname].insert(df, 2, 3)
+                session.save(path)
+
+        Returns:
+            Worksheets: The current instance, all worksheets opened from it share the session.
+        """
+
+        self.package.begin()
+
+        try:
+            yield self
+        except BaseException:
+            self.package.rollback()
+            self.__read_state()
+            raise
+
+        self.package.commit()
+
+    @timed('insert')
     def insert(self,
-               data: Union(str, int, float, pd.DataFrame),
+               data: Union[str, int, float, pd.DataFrame],
                row: int = 1,
                column: int = 1,
                axis: int = 0,
                header: bool = True,
                index: bool = False,
-               ignore_nan: bool = True
+               ignore_nan: bool = True,
+               strings: str = None
                ) -> None:
         """
         Insert data into the worksheet. Convert the input data into an array and pass it to the XML converter.
@@ -798,58 +1270,617 @@ class Worksheets():
             header (bool, optional): True to include headers in the data, False otherwise. Defaults to True.
             index (bool, optional): True to include index in the data, False otherwise. Defaults to False.
             ignore_nan (bool, optional): True to include nan-values in the data, False otherwise. Defaults to True.
+            strings (str, optional): 'shared' to reference strings in the shared string table, 'inline' to write them
+                into the cells. Defaults to the mode of the workbook.
+
+        Raises:
+            ValueError: If the `strings` argument is not 'shared' or 'inline'.
         """
 
-        column = column - 1
+        strings = self.strings if strings is None else strings
+
+        if strings not in ('shared', 'inline'):
+            raise ValueError(f"Input is outside of the parameters. ('shared' or 'inline' expected, {strings!r} received)")
+
+        inline = strings == 'inline'
 
         self.__get_xml()
-        self.__get_strxml()
+        if not inline:
+            self.__get_strxml()
         self.__get_cchxml()
 
-        if isinstance(data, pd.core.frame.DataFrame):
+        if (self.stats is not None) and not inline:
+            # references and size of the string table, every new reference is a hit unless it added a string
+            before = self.stree.count, len(self.stree)
 
-            dfr = dataframe_to_rows(data, header=header, index=index)
+        if is_frame(data):
 
-            if axis == 1:
-                for c_idx, _column in enumerate(dfr, column):  # (Startcolumn)
-                    for r_idx, value in enumerate(_column, row):  # (Startrow)
-                        if (value is not None) and (str(value) != "nan") and (ignore_nan):
-                            self.__change_xml(self.tree, r_idx, xl_name(c_idx), value)
-                        elif not ignore_nan:
-                            self.__change_xml(self.tree, r_idx, xl_name(c_idx), value)
-                        else:
-                            pass
-            else:
-                for r_idx, _row in enumerate(dfr, row):  # (Startrow)
-                    for c_idx, value in enumerate(_row, column):  # (Startcolumn)
-                        if (value is not None) and (str(value) != "nan") and (ignore_nan):
-                            self.__change_xml(self.tree, r_idx, xl_name(c_idx), value)
-                        elif not ignore_nan:
-                            self.__change_xml(self.tree, r_idx, xl_name(c_idx), value)
-                        else:
-                            pass
+            with measure(self.stats, 'convert'):
+                types, texts = frame_to_cells(data, header=header, index=index, ignore_nan=ignore_nan,
+                                              strings=None if inline else self.stree)
+
+            if inline:
+                text_cells = types == 'str'
+                types[text_cells] = 'inlineStr'
+                for text in texts[text_cells]:
+                    check_text(text)
+
+            self.__change_block(self.tree, row, column, types, texts, axis=axis)
 
         elif isinstance(data, self.check) or isinstance(data, str):
-            self.__change_xml(self.tree, row, xl_name(column), data)
+            self.__change_xml(self.tree, row, column, data, inline=inline)
+
+        if (self.stats is not None) and not inline:
+            misses = len(self.stree) - before[1]
+            self.stats.count('string_misses', misses)
+            self.stats.count('string_hits', self.stree.count - before[0] - misses)
+
+        self.__clean_formula()
+        self.__write_xml()
+        if not inline:
+            self.__write_strxml()
+        self.__write_cchxml()
+
+        if not self.package.session:
+            self.package.flush()
+
+    @timed('insert_many')
+    def insert_many(self, plan) -> Worksheets:
+        """
+        Applies a whole write plan to the workbook. The writes are grouped by worksheet and sorted by row and
+        column (writes with the same anchor keep their order), so every worksheet is parsed and indexed once
+        (streamed worksheets collect all cells for a single pass) and the temporary Excel file is written once.
+        If a write fails, all writes of the plan are discarded.
+
+        Example:
+            wb.insert_many([('KPI', 'B2', revenue), ('KPI', (3, 2), 'Revenue'), ('Data', 'A5', df, {'header': False})])
+
+        Args:
+            plan (iterable): The writes as tuples of (sheet, anchor, data) or (sheet, anchor, data, options), where `anchor`
+                is a cell reference like 'B3' or a tuple of (row, column) and `options` a dictionary of keyword arguments of `insert()`.
+
+        Returns:
+            Worksheets: The current instance.
+
+        Raises:
+            KeyError: If a worksheet of the plan is not included in the workbook.
+        """
+
+        sheets = {}
+
+        for i, item in enumerate(plan):
+            sheet, anchor, data = item[:3]
+            options = item[3] if len(item) > 3 else {}
+
+            if sheet not in self.wb_dict:
+                raise KeyError(f"the sheet [{sheet}] seems to be not included in this Excel workbook, possible sheets: {list(self.wb_dict)}")
+
+            row, column = split_anchor(anchor)
+            sheets.setdefault(sheet, []).append((row, column, i, data, options))
+
+        with self.edit():
+            for sheet, writes in sheets.items():
+                ws = self[sheet]
+                for row, column, _, data, options in sorted(writes, key=lambda w: w[:3]):
+                    ws.insert(data, row, column, **options)
+
+        return self
+
+    @timed('read_range')
+    def read(self, range: str = None, header: bool = True) -> pd.DataFrame:
+        """
+        Reads the values of a range into a DataFrame, e.g. a lookup table or the numbers of the previous period.
+        The worksheet is parsed with `iterparse` straight from the temporary Excel file, no tree of the worksheet
+        is built (a worksheet which is already parsed for inserts is read from its tree). Shared strings are
+        resolved through the table of the workbook, which is read once, and the columns are built as NumPy arrays.
+
+        Numbers with a date format are returned as datetimes, whole numbers as integers. Formulas are read as their
+        cached values, formulas without a cached value (e.g. after an insert) are empty.
+
+        Example:
+            rates = wb['Rates'].read('A1:C40')
+            ws.insert(df.merge(rates, on='currency'), 2, 2)
+
+        Args:
+            range (str, optional): The cell range, e.g. 'A1:C40'. Defaults to None (the range of all cells with a value).
+            header (bool, optional): True to use the first row of the range as column labels. Defaults to True.
+
+        Returns:
+            pd.DataFrame: The values of the range, missing values are NaN (NaT in datetime columns).
+
+        Raises:
+            ValueError: If the range is not a valid cell range.
+        """
+
+        bounds = split_range(range) if range is not None else None
+
+        self.__get_strxml()
+
+        try:
+            dates = date_styles(self.package.get('xl/styles.xml'))
+        except KeyError:
+            dates = []
+
+        name = f'xl/worksheets/{self.sheet}'
+        part = self.package.parts.get(name)
+
+        if (part is not None) and not hasattr(part, 'stream'):
+            rows = part.find(f'{self.xmain}sheetData').iterchildren(f'{self.xmain}row')
+            return rows_to_frame(rows, self.stree, dates, bounds, header)
+
+        with zipfile.ZipFile(self.temp, mode="r") as myzip, myzip.open(name) as source:
+            if part is None:
+                return rows_to_frame(iter_rows(source), self.stree, dates, bounds, header)
+
+            # the pending cells of a streamed worksheet are spliced in first
+            with tempfile.SpooledTemporaryFile(max_size=64 << 20) as buffer:
+                part.stream(source, buffer)
+                buffer.seek(0)
+                return rows_to_frame(iter_rows(buffer), self.stree, dates, bounds, header)
+
+    @timed('clear')
+    def clear(self, range: str, keep_styles: bool = True) -> Worksheets:
+        """
+        Clears the values and formulas of all cells of a rectangular range, e.g. the rows of last week's data
+        below a shorter DataFrame. The affected rows are walked once, the formulas of the cleared cells are
+        removed from the calcChain.xml and the dimension of the worksheet is recomputed once (in streaming mode
+        the dimension is kept, it may be larger than the used range).
+
+        Example:
+            ws.clear('B2:H5000')
+            ws.insert(df, 2, 2)
+
+        Args:
+            range (str): The cell range, e.g. 'B2:H5000', or a single cell reference.
+            keep_styles (bool, optional): True to keep the empty cells with their style (number format, borders, ...),
+                False to remove the cells. Defaults to True.
+
+        Returns:
+            Worksheets: The current instance.
+
+        Raises:
+            ValueError: If the range is not a valid cell range.
+        """
+
+        row, column, last_row, last_column = split_range(range)
+
+        self.__get_xml()
+        self.__get_cchxml()
+
+        self.__clear_block(self.tree, row, column, last_row, last_column, keep_styles=keep_styles)
+
+        if not (keep_styles or self.stream):
+            # removed cells may shrink the used range, styled empty cells still count for Excel
+            bounds = self.index.bounds()
+            self.__change_dim(self.tree, *(bounds or (1, 1)), reset=True)
+
+        self.__clean_formula()
+        self.__write_xml()
+        self.__write_cchxml()
+
+        if not self.package.session:
+            self.package.flush()
+
+        return self
+
+    @timed('replace_table')
+    def replace_table(self, name: str, data: pd.DataFrame, index: bool = False, ignore_nan: bool = True, strings: str = None) -> Worksheets:
+        """
+        Replaces the body of a table (ListObject) with a DataFrame and resizes the table to it. The header row
+        gets the column labels, the body is written as one block at the upper left corner of the table and rows
+        or columns of the old body which are not covered by the new one are cleared (the cells keep their style).
+        The `ref` of the table and its autoFilter as well as the table columns are updated in the same pass.
+
+        Example:
+            wb['Data'].replace_table('Sales', df)
+
+        Args:
+            name (str): The name of the table, as shown by Excel (`displayName`).
+            data (pd.DataFrame): The new content of the table. Column labels are converted to unique, non-empty strings.
+            index (bool, optional): True to include the index as the first column(s). Defaults to False.
+            ignore_nan (bool, optional): True to leave the cells of missing values empty, False to insert them as 'nan'. Defaults to True.
+            strings (str, optional): 'shared' to reference strings in the shared string table, 'inline' to write them
+                into the cells. Defaults to the mode of the workbook.
+
+        Returns:
+            Worksheets: The current instance.
+
+        Raises:
+            KeyError: If the worksheet has no table with this name.
+            ValueError: If the data is not a DataFrame, the `strings` argument is not 'shared' or 'inline', or
+                the number of rows of a table with a totals row changes.
+        """
+
+        import numpy as np
+
+        strings = self.strings if strings is None else strings
+
+        if strings not in ('shared', 'inline'):
+            raise ValueError(f"Input is outside of the parameters. ('shared' or 'inline' expected, {strings!r} received)")
+
+        if not is_frame(data):
+            raise ValueError(f'Input is outside of the parameters. (DataFrame expected, {type(data).__name__} received)')
+
+        inline = strings == 'inline'
+
+        part, table = self.__get_table(name)
+
+        row, column, last_row, last_column = split_range(table.attrib['ref'])
+        header = int(table.attrib.get('headerRowCount', '1'))
+        totals = int(table.attrib.get('totalsRowCount', '0'))
+
+        data = data.reset_index() if index else data
+        labels = self.__table_labels(data.columns)
+
+        # a table keeps at least one (empty) row in its body
+        new_last_row = row + header + max(len(data), 1) - 1 + totals
+        new_last_column = column + len(labels) - 1
+
+        if totals and (new_last_row != last_row):
+            raise ValueError(f'the table [{name}] has a totals row, the number of its rows can not be changed')
+
+        if not labels:
+            raise ValueError(f'the table [{name}] needs at least one column')
+
+        self.__get_xml()
+        if not inline:
+            self.__get_strxml()
+        self.__get_cchxml()
+
+        with measure(self.stats, 'convert'):
+            types, texts = frame_to_cells(data, header=False, index=False, ignore_nan=ignore_nan,
+                                          strings=None if inline else self.stree)
+
+        if header:
+            h_types = np.full(len(labels), 'inlineStr' if inline else 's', dtype=object)
+            h_texts = np.array(labels if inline else [str(self.stree.add(i)) for i in labels], dtype=object)
+            types, texts = np.vstack([h_types, types]), np.vstack([h_texts, texts])
+
+        if inline:
+            text_cells = types == 'str'
+            types[text_cells] = 'inlineStr'
+            for text in texts[text_cells]:
+                check_text(text)
+
+        # the old body (and header) is cleared in one pass, the new block is written on top of it
+        self.__clear_block(self.tree, row, column, last_row - totals, last_column)
+        self.__change_block(self.tree, row, column, types, texts)
+
+        self.__resize_table(table, labels, row, column, new_last_row, new_last_column, header, totals)
+        self.package.set(part)
 
         self.__clean_formula()
         self.__write_xml()
-        self.__write_strxml()
+        if not inline:
+            self.__write_strxml()
         self.__write_cchxml()
 
-    def save(self, path: str = None) -> None:
+        if not self.package.session:
+            self.package.flush()
+
+        return self
+
+    def __table_labels(self, columns) -> list:
+        """
+        Converts the column labels of a DataFrame into the names of table columns, which Excel requires to be
+        non-empty and unique (case-insensitive). Missing labels become 'Column<n>', duplicates get a number appended.
+
+        Parameters:
+            columns (pd.Index): The column labels.
+
+        Returns:
+            list: The names of the table columns.
+        """
+
+        labels = []
+        seen = set()
+
+        for i, label in enumerate(columns, start=1):
+            if isinstance(label, tuple):
+                label = ' '.join(str(j) for j in label if (j is not None) and str(j))
+            label = '' if (label is None) or (isinstance(label, float) and label != label) else check_text(str(label))
+
+            base, k = label or f'Column{i}', 1
+            label = base
+
+            while label.lower() in seen:
+                k += 1
+                label = f'{base}{k}'
+
+            seen.add(label.lower())
+            labels.append(label)
+
+        return labels
+
+    def __resize_table(self, table, labels, row, column, last_row, last_column, header, totals):
+        """
+        Updates the range, the autoFilter and the columns of a table. Existing table columns keep their id and
+        formatting, their calculated column formula is removed since the column now holds values.
+
+        Parameters:
+            table (Element): The XML tree of the table.
+            labels (list): The names of the table columns.
+            row (int): The first row number of the table.
+            column (int): The first column number of the table.
+            last_row (int): The last row number of the table (including the totals row).
+            last_column (int): The last column number of the table.
+            header (int): The number of header rows.
+            totals (int): The number of totals rows.
+
+        Returns:
+            self: The instance of the class.
+        """
+
+        ref = f'{column_name(column)}{row}:{column_name(last_column)}{last_row}'
+        table.attrib['ref'] = ref
+
+        autofilter = table.find(f'{self.xmain}autoFilter')
+
+        if autofilter is not None:
+            autofilter.attrib['ref'] = f'{column_name(column)}{row}:{column_name(last_column)}{last_row - totals}'
+
+            for child in list(autofilter):
+                # a sort state refers to the old rows, filters may refer to removed columns
+                if (child.tag == f'{self.xmain}sortState') or (int(child.attrib.get('colId', '0')) >= len(labels)):
+                    autofilter.remove(child)
+
+        tcolumns = table.find(f'{self.xmain}tableColumns')
+        existing = list(tcolumns.iterchildren(f'{self.xmain}tableColumn'))
+        next_id = max((int(i.attrib['id']) for i in existing), default=0) + 1
+
+        for el in existing[len(labels):]:
+            tcolumns.remove(el)
+
+        for i, label in enumerate(labels):
+            if i < len(existing):
+                el = existing[i]
+                for formula in el.findall(f'{self.xmain}calculatedColumnFormula'):
+                    el.remove(formula)
+            else:
+                el = etree.SubElement(tcolumns, f'{self.xmain}tableColumn', {'id': str(next_id)})
+                next_id += 1
+
+            el.attrib['name'] = label
+
+        tcolumns.attrib['count'] = str(len(labels))
+
+        return self
+
+    @timed('refresh_pivot')
+    def refresh_pivot(self, name: str, data: pd.DataFrame, refresh_on_load: bool = True) -> Worksheets:
+        """
+        Rewrites the pivot cache of a pivot table from a DataFrame. The shared items of the cache fields are
+        rebuilt from `pd.factorize` codes and the pivotCacheRecords.xml is streamed from these codes chunk by chunk
+        while the archive is written, the records are never held as an XML tree. The items of the pivot fields of
+        all pivot tables using the cache are updated, their rendered rows and columns are recomputed by Excel.
+
+        The cache and its source range must hold the same data, because Excel refreshes the pivot tables from the
+        source range (on load or when the user clicks refresh). If the cache refers to a range of a worksheet, the
+        data (a header row with the names of the cache fields and the records) is written into it in the same call,
+        the cells of the old range which are not covered are cleared and the range is resized. A source given by
+        name (a table or a defined name) is not written, it has to be updated first, e.g. with `replace_table()`.
+
+        Example:
+            wb.refresh_pivot('PivotSales', df)
+
+        Args:
+            name (str): The name of the pivot table, as shown by Excel.
+            data (pd.DataFrame): The source data, one column per cache field (matched by name).
+            refresh_on_load (bool, optional): True to let Excel refresh the pivot tables when the file is opened,
+                which renders them from the source range of the cache. Defaults to True.
+
+        Returns:
+            Worksheets: The current instance.
+
+        Raises:
+            KeyError: If the workbook has no pivot table with this name.
+            ValueError: If the data is not a DataFrame, a cache field is missing in the data or a field is grouped,
+                or the source worksheet of the cache is not included in the workbook.
+        """
+
+        if not is_frame(data):
+            raise ValueError(f'Input is outside of the parameters. (DataFrame expected, {type(data).__name__} received)')
+
+        pivots = {}
+
+        for part in self.package.content:
+            if part.startswith('xl/pivotTables/') and part.endswith('.xml') and ('/_rels/' not in part):
+                pivots[part] = self.package.get(part)
+
+        found = [part for part, pivot in pivots.items() if pivot.attrib.get('name', '').lower() == name.lower()]
+        caches = self.__relations(found[0], 'pivotCacheDefinition') if found else []
+
+        if not caches:
+            raise KeyError(f"the pivot table [{name}] seems to be not included in this Excel workbook, "
+                           f"possible pivot tables: {[i.attrib.get('name') for i in pivots.values()]}")
+
+        part = caches[0]
+        definition = self.package.get(part)
+        pivots = {i: pivot for i, pivot in pivots.items() if part in self.__relations(i, 'pivotCacheDefinition')}
+
+        # fields on rows, columns or pages need shared items, the pivot fields refer to them
+        axis = set()
+        for pivot in pivots.values():
+            for i, field in enumerate(pivot.iterfind(f'{self.xmain}pivotFields/{self.xmain}pivotField')):
+                if ('axis' in field.attrib) or (field.find(f'{self.xmain}items') is not None):
+                    axis.add(i)
+
+        source = definition.find(f'{self.xmain}cacheSource/{self.xmain}worksheetSource')
+
+        if (source is not None) and ('ref' in source.attrib) and (source.attrib.get('sheet') not in self.wb_dict):
+            raise ValueError(f"the source sheet [{source.attrib.get('sheet')}] of the pivot table [{name}] seems to be not "
+                             f"included in this Excel workbook, possible sheets: {list(self.wb_dict)}")
+
+        with self.edit():
+            with measure(self.stats, 'convert'):
+                records = refresh_cache(definition, data, axis)
+
+            definition.attrib['recordCount'] = str(records.count)
+            if refresh_on_load:
+                definition.attrib['refreshOnLoad'] = '1'
+
+            fields = list(definition.iterfind(f'{self.xmain}cacheFields/{self.xmain}cacheField'))
+
+            if (source is not None) and ('ref' in source.attrib):
+                # calculated fields are not part of the source range
+                names = [i.attrib['name'] for i in fields if ('formula' not in i.attrib) and (i.attrib.get('databaseField') != '0')]
+                row, column, last_row, last_column = split_range(source.attrib['ref'])
+
+                ws = self[source.attrib['sheet']]
+                ws.clear(f'{column_name(column)}{row}:{column_name(last_column)}{last_row}')
+                ws.insert(data[names], row, column)
+
+                source.attrib['ref'] = f'{column_name(column)}{row}:{column_name(column + len(names) - 1)}{row + records.count}'
+
+            for i, pivot in pivots.items():
+                self.__refresh_pivot_fields(pivot, fields)
+                self.package.set(i)
+
+            self.package.set(part)
+
+            for i in self.__relations(part, 'pivotCacheRecords'):
+                self.package.set(i, records)
+
+        return self
+
+    def __refresh_pivot_fields(self, pivot, fields):
+        """
+        Rebuilds the items of the pivot fields of a pivot table from the shared items of the cache fields and
+        removes the rendered rows and columns, which refer to the old items.
+
+        Parameters:
+            pivot (Element): The XML tree of the pivot table.
+            fields (list): The `<cacheField>` elements of the pivot cache.
+
+        Returns:
+            self: The instance of the class.
+        """
+
+        for i, field in enumerate(pivot.iterfind(f'{self.xmain}pivotFields/{self.xmain}pivotField')):
+            items = field.find(f'{self.xmain}items')
+
+            if (items is None) or (i >= len(fields)):
+                continue
+
+            shared = fields[i].find(f'{self.xmain}sharedItems')
+            # subtotals ('default', 'sum', ...) are kept behind the items
+            totals = [item for item in items if 'x' not in item.attrib]
+
+            for item in list(items):
+                items.remove(item)
+
+            for j in range(len(shared) if shared is not None else 0):
+                etree.SubElement(items, f'{self.xmain}item', {'x': str(j)})
+
+            items.extend(totals)
+            items.attrib['count'] = str(len(items))
+
+        for tag in ('rowItems', 'colItems'):
+            for el in pivot.findall(f'{self.xmain}{tag}'):
+                pivot.remove(el)
+
+        for el in pivot.iterfind(f'{self.xmain}pageFields/{self.xmain}pageField'):
+            # a selected page item may not exist anymore
+            el.attrib.pop('item', None)
+
+        return self
+
+    @timed('save')
+    def save(self, path: Union[str, BinaryIO] = None, workers: int = None, compression: int = None, level: int = None,
+             compact_strings: bool = False) -> None:
         """
-        Saves the converted Excel file to the specified path
+        Saves the converted Excel file to the specified path. The output archive is written in one pass,
+        only modified parts are serialized and all other members are copied without recompression.
+        Several modified parts (worksheets, sharedStrings.xml, ...) are serialized and compressed in parallel.
+        The compression applies to all serialized parts, `zipfile.ZIP_STORED` skips the compression entirely
+        and is the fastest mode for large worksheets, at the cost of a larger file.
 
         Args:
-            path (str): The file path of the Excel workbook to read.
+            path (str or file): The file path of the Excel workbook or a writable binary file object
+                (e.g. `BytesIO` or the body of a response), the workbook is written at its current position.
+            workers (int, optional): The number of threads which serialize and compress the modified parts.
+                Defaults to the number of CPUs, 1 serializes them one after another.
+            compression (int, optional): `zipfile.ZIP_DEFLATED` or `zipfile.ZIP_STORED`. Defaults to the compression
+                of `load_workbook()`.
+            level (int, optional): The compression level of deflate, from 0 (none) to 9 (best). Defaults to the level
+                of `load_workbook()`.
+            compact_strings (bool, optional): True to remove the entries of the shared string table which are not
+                referenced by any cell anymore (e.g. after overwriting the strings of a template again and again) and
+                to repair its counts. All worksheets are scanned once, the cells of the worksheets whose references
+                change are renumbered. Defaults to False.
+
+        Returns:
+            The path or the file object.
 
         Raises:
-            ValueError: If the `path` argument is None.
+            ValueError: If the `path` argument is None or the compression method or level is not supported.
 
         """
 
         if path is None:
             raise ValueError('Output path is missing')
 
-        return shutil.copy(self.temp, path)
+        if compact_strings:
+            self.__compact_strings()
+
+        if not (self.package.dirty or self.package.rewritten):
+            self.package.copy(path)
+        else:
+            self.package.write(path, workers=workers, compression=compression, level=level)
+
+        return path
+
+    def save_bytes(self, **kwargs) -> bytes:
+        """
+        Returns the content of the converted Excel file without writing it to disk.
+
+        Args:
+            **kwargs: The keyword arguments of `save()`, e.g. `compact_strings`.
+
+        Returns:
+            bytes: The content of the Excel workbook.
+
+        """
+
+        return self.save(io.BytesIO(), **kwargs).getvalue()
+
+    async def ainsert(self, data, row: int = 1, column: int = 1, **kwargs) -> None:
+        """
+        Inserts data without blocking the event loop, see `insert()`. The jobs of one workbook are run one after another.
+
+        """
+
+        return await run(self.insert, data, row, column, package=self.package, **kwargs)
+
+    async def ainsert_many(self, plan) -> Worksheets:
+        """
+        Applies a write plan without blocking the event loop, see `insert_many()`.
+
+        """
+
+        return await run(self.insert_many, list(plan), package=self.package)
+
+    async def asave(self, path: Union[str, BinaryIO] = None, **kwargs):
+        """
+        Saves the workbook without blocking the event loop, see `save()`. A file object is written from a worker
+        thread, for the stream of an async server use `asave_bytes()`.
+
+        """
+
+        return await run(self.save, path, package=self.package, **kwargs)
+
+    async def asave_bytes(self, **kwargs) -> bytes:
+        """
+        Returns the content of the workbook without blocking the event loop, see `save_bytes()`.
+
+        """
+
+        return await run(self.save_bytes, package=self.package, **kwargs)
+
+    async def aclose(self) -> None:
+        """
+        Closes the workbook without blocking the event loop, see `close()`.
+
+        """
+
+        return await run(self.close, package=self.package)
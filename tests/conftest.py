@@ -0,0 +1,36 @@
+# conftest.py
+import os
+import sys
+import zipfile
+import pytest
+
+# the tests use the synthetic templates of the benchmarks
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.templates import make_template  # noqa: E402
+
+
+@pytest.fixture
+def template(tmp_path):
+
+    """
+    Returns a function which writes a synthetic template (see `make_template()`) into the temporary
+    directory of the test. `media` adds members of random bytes in front of all other members.
+
+    """
+
+    def make(name='template', media=0, **kwargs):
+        path = make_template(str(tmp_path / f'{name}.xlsx'), **kwargs)
+
+        if media:
+            source = tmp_path / f'{name}_source.xlsx'
+            os.replace(path, source)
+            with zipfile.ZipFile(source) as src, zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+                for i in range(media):
+                    dst.writestr(f'xl/media/image{i}.bin', os.urandom(1 << 20))
+                for info in src.infolist():
+                    dst.writestr(info, src.read(info))
+
+        return path
+
+    return make
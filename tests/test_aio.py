@@ -0,0 +1,65 @@
+# test_aio.py
+import asyncio
+import os
+import threading
+import in2xl
+
+
+def test_workbook_in_several_event_loops(template):
+    wb = asyncio.run(in2xl.aload_workbook(template()))
+    ws = wb['Data']
+
+    # the lock of the workbook must not be bound to the loop which used it first
+    asyncio.run(ws.ainsert('first', 1, 1))
+    asyncio.run(ws.ainsert('second', 2, 1))
+
+    errors = []
+
+    def worker(i):
+        async def main():
+            for j in range(5):
+                await ws.ainsert(i * 10 + j, 10 + i, 2 + j)
+        try:
+            asyncio.run(main())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+    values = ws.read('A1:F13', header=False)
+    asyncio.run(wb.aclose())
+
+    assert values.iloc[0, 0] == 'first'
+    assert values.iloc[1, 0] == 'second'
+    assert [values.iloc[9 + i, 1:6].tolist() for i in range(4)] == [[i * 10 + j for j in range(5)] for i in range(4)]
+
+
+def test_async_wrappers(template):
+    import pandas as pd
+
+    async def main():
+        in2xl.configure_executor(max_workers=2, max_pending=1)
+        wb = await in2xl.aload_workbook(template())
+        df = pd.DataFrame({'a': [1.5, 2.5]})
+
+        await asyncio.gather(wb['Data'].ainsert(df, 2, 2), wb.ainsert_many([('Other', 'A1', 'title')]))
+        content = await wb.asave_bytes()
+        await wb.aclose()
+        return content
+
+    try:
+        content = asyncio.run(main())
+    finally:
+        # the default limits
+        in2xl.configure_executor(max_workers=min(32, (os.cpu_count() or 1) + 4))
+
+    wb = in2xl.load_workbook(content)
+    assert wb['Data'].read('B2:B4').to_dict('list') == {'a': [1.5, 2.5]}
+    assert wb['Other'].read('A1:A1', header=False).iloc[0, 0] == 'title'
+    wb.close()
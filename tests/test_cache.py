@@ -0,0 +1,73 @@
+# test_cache.py
+import io
+import os
+import zipfile
+import in2xl
+from in2xl.in2xl.cache import TemplateCache
+
+
+def test_template_cache_evicts_least_recently_used(template):
+    paths = [os.path.realpath(template(name=f'template{i}', rows=20 * (i + 1))) for i in range(3)]
+    sizes = [in2xl.Template.fromfile(path).nbytes for path in paths]
+    cache = TemplateCache(max_bytes=sizes[0] + sizes[1] + sizes[2] - 1)
+
+    first = cache.get(paths[0])
+    cache.get(paths[1])
+    # the first template was used last, so the second one is evicted
+    assert cache.get(paths[0]) is first
+    cache.get(paths[2])
+
+    assert [key[0] for key in cache.entries] == [paths[0], paths[2]]
+    assert cache.nbytes == sizes[0] + sizes[2] == sum(t.nbytes for t in cache.entries.values())
+
+    # a template larger than the limit is compiled but not kept
+    small = TemplateCache(max_bytes=sizes[0] - 1)
+    assert small.get(paths[0]).nbytes == sizes[0]
+    assert len(small) == 0 and small.nbytes == 0
+
+
+def test_template_cache_reloads_changed_file(template):
+    path = template(rows=20)
+    cache = TemplateCache()
+
+    first = cache.get(path)
+    assert cache.get(path) is first
+
+    template(rows=40)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    second = cache.get(path)
+
+    assert second is not first
+    assert len(cache) == 1 and cache.nbytes == second.nbytes
+    assert cache.clear().nbytes == 0 and len(cache) == 0
+
+
+def test_cached_loads_are_isolated(template):
+    path = template(rows=20)
+    in2xl.template_cache.clear()
+
+    try:
+        first = in2xl.load_workbook(path, cache=True)
+        first['Data'].insert('changed', 2, 1)
+        first['Data'].insert('new string', 3, 1)
+        first['Other'].state = 1
+        output = first.save(io.BytesIO())
+        first.close()
+
+        second = in2xl.load_workbook(path, cache=True)
+        assert len(in2xl.template_cache) == 1
+        assert second['Data'].read('A1:A3', header=False).iloc[:, 0].tolist() == ['label 1', 'label 2', 'label 3']
+        # the parsed parts of the template are copied, the modifications of the first load are not visible
+        assert second.wb_state['Other'] == 'visible'
+        second['Data'].insert(1.5, 4, 2)
+        with zipfile.ZipFile(second.save(io.BytesIO())) as myzip:
+            assert b'new string' not in myzip.read('xl/sharedStrings.xml')
+        second.close()
+    finally:
+        in2xl.template_cache.clear()
+
+    changed = in2xl.load_workbook(output.getvalue())
+    assert changed['Data'].read('A1:A3', header=False).iloc[:, 0].tolist() == ['label 1', 'changed', 'new string']
+    changed.close()
@@ -0,0 +1,63 @@
+# test_charts.py
+import zipfile
+import pytest
+import in2xl
+from in2xl.in2xl.utils import formula_sheets
+
+CHART = ('<c:chartSpace xmlns:c="http://schemas.openxmlformats.org/drawingml/2006/chart"><c:chart><c:plotArea><c:barChart>'
+         '{series}</c:barChart></c:plotArea></c:chart></c:chartSpace>')
+
+
+def with_charts(path, charts):
+    with zipfile.ZipFile(path, 'a') as myzip:
+        for name, formulas in charts.items():
+            series = ''.join(f'<c:ser><c:val><c:numRef><c:f>{f}</c:f></c:numRef></c:val></c:ser>' for f in formulas)
+            myzip.writestr(name, CHART.format(series=series))
+    return path
+
+
+@pytest.mark.parametrize('formula, sheets', [
+    ("'Data'!$B$2:$B$10", {'Data'}),
+    ("('Other''s'!$A$1:$A$5,Data!$B$2)", {"Other's", 'Data'}),
+    ("'[1]Data'!$A$1", set()),
+    ('', set()),
+])
+def test_formula_sheets(formula, sheets):
+    assert formula_sheets(formula) == sheets
+
+
+def test_chart_dict(template):
+    path = with_charts(template(rows=20, charts=True), {
+        'xl/charts/chart2.xml': ["'Other'!$A$1:$A$5", 'Data!$C$2:$C$5'],
+        'xl/charts/chart3.xml': ["'[1]Data'!$A$1:$A$5", 'Missing!$A$1'],
+    })
+    stats = in2xl.Stats()
+    wb = in2xl.load_workbook(path, stats=stats)
+
+    # the charts are only read on first access
+    assert 'charts' not in stats.calls
+
+    assert wb.chart_dict == {'Data': ['xl/charts/chart1.xml', 'xl/charts/chart2.xml'], 'Other': ['xl/charts/chart2.xml']}
+    assert wb['Other'].chart_dict is wb.chart_dict
+    assert stats.calls['charts'] == 1
+    wb.close()
+
+
+def test_chart_dict_without_charts(template):
+    wb = in2xl.load_workbook(template(rows=20))
+    assert wb.chart_dict == {}
+    wb.close()
+
+
+def test_chart_dict_of_compiled_template(template):
+    path = template(rows=20, charts=True)
+    compiled = in2xl.Template.fromfile(path)
+
+    assert compiled.chart_dict == {'Data': ['xl/charts/chart1.xml']}
+
+    wb = in2xl.load_workbook(compiled)
+    wb.chart_dict['Data'].append('changed')
+    wb.close()
+
+    # every load gets its own copy of the index
+    assert compiled.chart_dict == {'Data': ['xl/charts/chart1.xml']}
@@ -0,0 +1,113 @@
+# test_formulas.py
+import io
+import re
+import zipfile
+import pytest
+from lxml import etree
+import in2xl
+from in2xl.in2xl.formulas import formula_refs, CalcChain, FormulaIndex, MAX_ROW
+
+XMAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+
+
+def test_formula_refs():
+    assert formula_refs('SUM($B2:D3)*2', 'Data') == [(2, 2, 3, 4, (False, True, False, False))]
+    assert formula_refs("A1+'Data'!B2+Other!C3+[1]Data!D4", 'Data') == [(1, 1, 1, 1, (False,) * 4), (2, 2, 2, 2, (False,) * 4)]
+    assert formula_refs('SUM(B:B)', 'Data') == [(1, 2, MAX_ROW, 2, (True, False, True, False))]
+    assert formula_refs('"A1"&TRUE&1.5E10', 'Data') == []
+
+
+@pytest.mark.parametrize('formula', ['Rate*2', 'INDIRECT("A1")', 'OFFSET(A1,1,1)', 'A1:INDEX(B:B,5)', 'A1#', "'Data:Other'!A1"])
+def test_formula_refs_unknown(formula):
+    assert formula_refs(formula, 'Data') is None
+
+
+def sheet(cells):
+    rows = ''.join(f'<row r="{r}">' + ''.join(f'<c r="{ref}"><f{attrib}>{f}</f><v>0</v></c>' for ref, attrib, f in items) + '</row>'
+                   for r, items in cells.items())
+    return etree.fromstring(f'<worksheet xmlns="{XMAIN}"><sheetData>{rows}</sheetData></worksheet>')
+
+
+def refs(cells):
+    return sorted(c.get('r') for c in cells)
+
+
+def test_formula_index_affected():
+    tree = sheet({
+        1: [('C1', '', 'A1+B1'), ('D1', '', 'C1*2'), ('E1', '', 'NOW()')],
+        2: [('C2', ' t="shared" ref="C2:C4" si="0"', 'A2+B2'), ('D2', '', 'SUM(A:A)')],
+        3: [('C3', ' t="shared" si="0"', '')],
+        4: [('C4', ' t="shared" si="0"', '')],
+        3000: [('C3000', '', 'A3000')],
+    })
+    index = FormulaIndex(tree, 'Data')
+
+    # dependents are followed through other formulas, volatile formulas are always affected
+    assert refs(index.affected([(1, 1, 1, 1)])) == ['C1', 'D1', 'D2', 'E1']
+    # the references of shared formulas are moved from their master
+    assert refs(index.affected([(3, 2, 3, 2)])) == ['C3', 'E1']
+    assert refs(index.affected([(3000, 1, 3000, 1)])) == ['C3000', 'D2', 'E1']
+    assert refs(index.affected([(5, 8, 9, 9)])) == ['E1']
+
+
+def test_calc_chain_remove():
+    root = etree.fromstring(f'<calcChain xmlns="{XMAIN}"><c r="A1" i="1" l="1"/><c r="A2"/><c r="A1" i="2"/></calcChain>')
+    chain = CalcChain(root)
+
+    assert len(chain) == 3
+    assert chain.remove('1', 'A1')
+    # the sheet id and the start of the level are passed on to the next cell
+    assert [dict(c.attrib) for c in root] == [{'r': 'A2', 'i': '1', 'l': '1'}, {'r': 'A1', 'i': '2'}]
+    assert not chain.remove('1', 'B7')
+    assert chain.remove('1', 'A2') and chain.remove('2', 'A1')
+    assert len(root) == 0
+
+
+def cached(output):
+    with zipfile.ZipFile(output) as myzip:
+        data = myzip.read('xl/worksheets/sheet1.xml').decode()
+        chain = myzip.read('xl/calcChain.xml').decode()
+        workbook = myzip.read('xl/workbook.xml').decode()
+
+    formulas = dict(re.findall(r'<c r="([A-Z]+[0-9]+)"[^>]*><f>[^<]*</f>(<v>[^<]*</v>)?', data))
+    return {ref for ref, v in formulas.items() if v}, re.findall(r'<c r="([A-Z]+[0-9]+)"', chain), workbook
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_insert_removes_affected_cached_values(template, stream):
+    wb = in2xl.load_workbook(template(rows=30, formulas=True, calc_chain=True), stream=stream)
+    wb['Data'].insert(1.5, 5, 2)
+    wb['Data'].insert(2.5, 10, 10)
+    values, chain, workbook = cached(wb.save(io.BytesIO()))
+    wb.close()
+
+    # J5 depends on B5, the formula of J10 is overwritten, the other formulas keep their cached values
+    assert values == {'J15', 'J20', 'J25', 'J30'}
+    assert chain == ['J5', 'J15', 'J20', 'J25', 'J30']
+    assert 'fullCalcOnLoad' not in workbook
+
+
+def test_stream_saves_remove_affected_cached_values(template):
+    wb = in2xl.load_workbook(template(rows=30, formulas=True, calc_chain=True), stream=True)
+
+    with wb.edit() as session:
+        session['Data'].insert(1.5, 5, 2)
+        first, _, _ = cached(session.save(io.BytesIO()))
+        # the formulas are indexed once, the second save adds the formulas affected in the meantime
+        session['Data'].clear('C20:D20')
+        second, _, _ = cached(session.save(io.BytesIO()))
+
+    wb.close()
+
+    assert first == {'J10', 'J15', 'J20', 'J25', 'J30'}
+    assert second == {'J10', 'J15', 'J25', 'J30'}
+
+
+def test_insert_full_calc(template):
+    wb = in2xl.load_workbook(template(rows=30, formulas=True, calc_chain=True), full_calc=True)
+    wb['Data'].insert(1.5, 5, 2)
+    values, chain, workbook = cached(wb.save(io.BytesIO()))
+    wb.close()
+
+    assert values == {'J5', 'J10', 'J15', 'J20', 'J25', 'J30'}
+    assert '<calcPr fullCalcOnLoad="1"/>' in workbook
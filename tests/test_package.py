@@ -0,0 +1,114 @@
+# test_package.py
+import io
+import zipfile
+import numpy as np
+import pandas as pd
+import pytest
+import in2xl
+
+
+def frame(rows, columns=4):
+    return pd.DataFrame(np.arange(rows * columns, dtype=float).reshape(rows, columns), columns=[f'col{i}' for i in range(columns)])
+
+
+def test_save_flushed_members_with_workers(template):
+    # the members flushed by the inserts are recompressed on the thread pool while the members in front of
+    # them (the media) are copied with their compressed bytes
+    path = template(rows=20000, media=16)
+
+    with zipfile.ZipFile(path) as myzip:
+        media = {name: myzip.read(name) for name in myzip.namelist() if name.startswith('xl/media/')}
+
+    wb = in2xl.load_workbook(path)
+    wb['Data'].insert(frame(20000), 2, 2)
+    wb['Other'].insert(frame(3000), 1, 1)
+
+    try:
+        for _ in range(10):
+            output = wb.save(io.BytesIO(), workers=8)
+            with zipfile.ZipFile(output) as myzip:
+                assert myzip.testzip() is None
+                assert all(myzip.read(name) == content for name, content in media.items())
+    finally:
+        wb.close()
+
+
+@pytest.mark.parametrize('compression, level', [(zipfile.ZIP_DEFLATED, None), (zipfile.ZIP_DEFLATED, 1), (zipfile.ZIP_STORED, None)])
+@pytest.mark.parametrize('workers', [1, 4])
+def test_save_compression(template, compression, level, workers):
+    wb = in2xl.load_workbook(template(), compression=compression, level=level)
+    wb['Data'].insert(frame(50), 2, 2)
+    output = wb.save(io.BytesIO(), workers=workers)
+    wb.close()
+
+    with zipfile.ZipFile(output) as myzip:
+        assert myzip.testzip() is None
+        # the compression applies to the serialized parts, all other members are copied
+        assert myzip.getinfo('xl/worksheets/sheet1.xml').compress_type == compression
+
+    wb = in2xl.load_workbook(output.getvalue())
+    assert wb['Data'].read('B2:E52').to_numpy().tolist() == frame(50).to_numpy().tolist()
+    wb.close()
+
+
+def test_save_invalid_compression(template):
+    wb = in2xl.load_workbook(template())
+    wb['Data'].insert(1, 2, 2)
+    with pytest.raises(ValueError):
+        wb.save(io.BytesIO(), compression=zipfile.ZIP_BZIP2)
+    wb.close()
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_save_within_session_skips_flush(template, tmp_path, stream):
+    stats = in2xl.Stats()
+    wb = in2xl.load_workbook(template(rows=20), stream=stream, stats=stats)
+
+    with wb.edit() as session:
+        session['Data'].insert(frame(3), 2, 2)
+        session.save(str(tmp_path / 'saved.xlsx'))
+
+    # the saved modifications are kept in memory, the temporary archive is not rewritten
+    assert stats.calls['write'] == 1
+    assert 'archive_rewrites' not in stats.counters
+
+    with wb.edit() as session:
+        session['Data'].insert('later', 1, 1)
+
+    assert stats.counters['archive_rewrites'] == 1
+
+    output = wb.save(io.BytesIO())
+    wb.close()
+    wb = in2xl.load_workbook(output.getvalue())
+    saved = in2xl.load_workbook(str(tmp_path / 'saved.xlsx'))
+
+    assert saved['Data'].read('A1:C3', header=False).values.tolist() == [['label 1', 2.5, 3.5], ['label 2', 'col0', 'col1'], ['label 3', 0.0, 1.0]]
+    assert wb['Data'].read('A1:C3', header=False).values.tolist() == [['later', 2.5, 3.5], ['label 2', 'col0', 'col1'], ['label 3', 0.0, 1.0]]
+    saved.close()
+    wb.close()
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_save_without_raw_zip_access(template, monkeypatch, workers):
+    from in2xl.in2xl.package import _RawZip
+
+    path = template(rows=200, media=2)
+    expected = {}
+
+    for supported in (True, False):
+        monkeypatch.setattr(_RawZip, 'supported', staticmethod(lambda *archives: supported))
+        if not supported:
+            for name in ('read', 'append'):
+                monkeypatch.setattr(_RawZip, name, None)
+        wb = in2xl.load_workbook(path)
+        wb['Data'].insert(frame(50), 2, 2)
+        output = wb.save(io.BytesIO(), workers=workers, compression=zipfile.ZIP_DEFLATED, level=9)
+        wb.close()
+
+        # the members are decompressed and compressed again, the content is the same
+        with zipfile.ZipFile(output) as myzip:
+            assert myzip.testzip() is None
+            content = {name: myzip.read(name) for name in myzip.namelist()}
+
+        expected.setdefault('content', content)
+        assert content == expected['content']
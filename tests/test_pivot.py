@@ -0,0 +1,50 @@
+# test_pivot.py
+import io
+import re
+import zipfile
+import pandas as pd
+import pytest
+import in2xl
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_refresh_pivot_writes_source(template, stream):
+    df = pd.DataFrame({'label': ['a', 'b', None, 'a'], 'value': [1.5, 2.0, 3.0, None]})
+
+    wb = in2xl.load_workbook(template(rows=50, pivot=True), stream=stream)
+    wb.refresh_pivot('Pivot', df)
+    output = wb.save(io.BytesIO())
+    wb.close()
+
+    with zipfile.ZipFile(output) as myzip:
+        definition = myzip.read('xl/pivotCache/pivotCacheDefinition1.xml').decode()
+        records = myzip.read('xl/pivotCache/pivotCacheRecords1.xml').decode()
+
+    assert 'ref="A1:B5"' in definition
+    assert 'recordCount="4"' in definition
+    assert 'refreshOnLoad="1"' in definition
+    assert records.count('<r>') == 4
+    assert re.findall(r'<s v="([^"]*)"/>', definition) == ['a', 'b']
+
+    # the source range holds the same data as the cache, the rows of the old range are cleared
+    wb = in2xl.load_workbook(output.getvalue())
+    source = wb['Data'].read('A1:B50')
+    wb.close()
+
+    assert source.columns.tolist() == ['label', 'value']
+    assert source['label'].iloc[:2].tolist() == ['a', 'b']
+    assert source['value'].iloc[:3].tolist() == [1.5, 2.0, 3.0]
+    assert source.iloc[4:].isna().all().all()
+
+
+def test_refresh_pivot_errors(template):
+    wb = in2xl.load_workbook(template(rows=20, pivot=True))
+
+    with pytest.raises(KeyError):
+        wb.refresh_pivot('Missing', pd.DataFrame({'label': ['a'], 'value': [1]}))
+    with pytest.raises(ValueError):
+        wb.refresh_pivot('Pivot', pd.DataFrame({'label': ['a']}))
+    with pytest.raises(ValueError):
+        wb.refresh_pivot('Pivot', [1, 2])
+
+    wb.close()
@@ -0,0 +1,53 @@
+# test_render.py
+import io
+import zipfile
+import pandas as pd
+import pytest
+import in2xl
+from in2xl.in2xl.utils import split_ref
+
+
+def members(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as myzip:
+        return {name: myzip.read(name) for name in myzip.namelist()}
+
+
+def jobs(count):
+    return [(None, [('Data', 'B3', pd.DataFrame({'a': [i, i + 0.5], 'b': [f'job {i}', 'x']})),
+                    ('Other', (1, 1), f'title {i}'), ('Data', 'A30', i, {'strings': 'inline'})]) for i in range(count)]
+
+
+def sequential(path, inserts):
+    wb = in2xl.load_workbook(path)
+    for sheet, anchor, data, *options in inserts:
+        row, column = anchor if isinstance(anchor, tuple) else split_ref(anchor)
+        wb[sheet].insert(data, row, column, **(options[0] if options else {}))
+    data = wb.save_bytes()
+    wb.close()
+    return data
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+def test_render_many_equals_sequential(template, processes):
+    path = template(rows=30, formulas=True, calc_chain=True)
+    plan = jobs(3)
+
+    results = in2xl.render_many(path, plan, processes=processes)
+
+    assert len(results) == len(plan)
+    for result, (_, inserts) in zip(results, plan):
+        assert members(result) == members(sequential(path, inserts))
+
+
+def test_render_many_outputs(template, tmp_path):
+    path = template(rows=10)
+    buffer = io.BytesIO()
+    plan = [(str(tmp_path / 'first.xlsx'), [('Data', 'A1', 'first')]), (buffer, [('Data', 'A1', 'second')])]
+
+    assert in2xl.render_many(path, plan, processes=0) == [plan[0][0], buffer]
+
+    # every job starts from the unchanged template
+    for output, expected in ((plan[0][0], 'first'), (io.BytesIO(buffer.getvalue()), 'second')):
+        wb = in2xl.load_workbook(output)
+        assert wb['Data'].read('A1:A2', header=False).iloc[:, 0].tolist() == [expected, 'label 2']
+        wb.close()
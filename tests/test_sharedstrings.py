@@ -0,0 +1,104 @@
+# test_sharedstrings.py
+import io
+import os
+import re
+import zipfile
+import pandas as pd
+import pytest
+import in2xl
+from in2xl.in2xl.sharedstrings import SharedStrings
+
+
+def table(output):
+    with zipfile.ZipFile(output) as myzip:
+        sst = myzip.read('xl/sharedStrings.xml').decode()
+        cells = sum(len(re.findall(r't="s"', myzip.read(name).decode())) for name in myzip.namelist() if name.startswith('xl/worksheets/sheet'))
+
+    count, unique = map(int, re.search(r'count="(\d+)" uniqueCount="(\d+)"', sst).groups())
+    return count, unique, re.findall(r'<t[^>]*>([^<]*)</t>', sst), cells
+
+
+def values(output):
+    wb = in2xl.load_workbook(output.getvalue())
+    result = {name: wb[name].read(header=False) for name in ('Data', 'Other')}
+    wb.close()
+    return result
+
+
+def test_compact():
+    strings = SharedStrings()
+    for text in ['a', 'b', 'c']:
+        strings.add(text)
+    strings.strings.append('b')
+
+    # 'c' is not referenced anymore, the second 'b' is merged into the first one
+    assert strings.compact([3, 1, 0, 2]) == [0, 1, None, 1]
+    assert strings.strings == ['a', 'b']
+    assert strings.count == 6
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_save_compact_strings(template, stream):
+    wb = in2xl.load_workbook(template(rows=40, unique=40), stream=stream)
+
+    # every run overwrites the strings of the previous one, the old entries are left in the table
+    for run in range(5):
+        wb['Data'].insert(pd.DataFrame({'text': [f'run {run} {i}' for i in range(30)]}), 1, 1)
+    wb['Other'].insert('label 0', 1, 2)
+
+    plain = wb.save(io.BytesIO())
+    compact = wb.save(io.BytesIO(), compact_strings=True)
+    wb.close()
+
+    count, unique, texts, cells = table(compact)
+
+    assert table(plain)[1] > unique
+    assert count == cells
+    assert unique == len(texts) == len(set(texts))
+    # the header and the texts of the last run, the labels of the rows below them (row 40 and 'Other' hold 'label 0')
+    assert set(texts) == {'text'} | {f'run 4 {i}' for i in range(30)} | {f'label {i}' for i in range(32, 40)} | {'label 0'}
+
+    for name, frame in values(plain).items():
+        assert frame.equals(values(compact)[name])
+
+
+def renamed(path):
+
+    """
+    Stores the worksheet 'Other' (rId2) as sheet5.xml, so its file name does not match its relationship id.
+
+    """
+
+    source = f'{path}.source'
+    os.replace(path, source)
+
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            content = src.read(info).replace(b'worksheets/sheet2.xml', b'worksheets/sheet5.xml')
+            dst.writestr(info.filename.replace('sheet2.xml', 'sheet5.xml'), content)
+
+    return path
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_save_compact_strings_sheet_names(template, stream):
+    wb = in2xl.load_workbook(renamed(template(rows=40, unique=40)), stream=stream)
+
+    # 'label 0' is only used by 'Other' after the first column of 'Data' is overwritten
+    wb['Data'].insert(pd.DataFrame({'text': [f'new {i}' for i in range(40)]}), 1, 1, header=False)
+    output = wb.save(io.BytesIO(), compact_strings=True)
+    wb.close()
+
+    with zipfile.ZipFile(output) as myzip:
+        assert 'xl/worksheets/sheet5.xml' in myzip.namelist()
+        cells = sum(len(re.findall(r't="s"', myzip.read(name).decode())) for name in ('xl/worksheets/sheet1.xml', 'xl/worksheets/sheet5.xml'))
+        other = myzip.read('xl/worksheets/sheet5.xml').decode()
+
+    count, unique, texts, _ = table(output)
+
+    assert count == cells
+    assert set(texts) == {f'new {i}' for i in range(40)} | {'label 0'}
+
+    # the cells of 'Other' still refer to their string
+    indexes = [int(i) for i in re.findall(r't="s"><v>(\d+)</v>', other)]
+    assert indexes and all(texts[i] == 'label 0' for i in indexes)
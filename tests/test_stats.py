@@ -0,0 +1,54 @@
+# test_stats.py
+import io
+import pandas as pd
+import in2xl
+
+
+def test_stats_counters_after_insert_and_save(template):
+    stats = in2xl.Stats()
+    wb = in2xl.load_workbook(template(rows=20), stats=stats)
+
+    assert wb.stats is stats
+    assert stats.calls['load'] == 1
+
+    wb['Data'].insert(pd.DataFrame({'a': [1.5, 2.5], 'b': ['label 1', 'new']}), 30, 2)
+
+    counters = dict(stats.counters)
+
+    # the header row and the data of the DataFrame, the existing string is found in the table
+    assert counters['cells_written'] == 6
+    assert counters['cells_created'] == 6
+    assert counters['string_misses'] == 3
+    assert counters['string_hits'] == 1
+    assert counters['archive_rewrites'] == 1
+    assert counters['parts_read'] >= 2
+    assert stats.calls['insert'] == 1 and stats.calls['flush'] == 1
+
+    wb['Data'].insert(9.5, 30, 2)
+    wb.save(io.BytesIO())
+    wb.close()
+
+    assert stats.counters['cells_updated'] == 1
+    assert stats.counters['archive_rewrites'] == counters['archive_rewrites'] + 1
+    assert stats.counters['bytes_written'] > counters['bytes_written']
+    assert stats.counters['members_rewritten'] > 0 and stats.counters['members_copied'] > 0
+    assert stats.calls['write'] == stats.calls['flush'] + 1
+    assert all(seconds >= 0 for seconds in stats.timings.values())
+
+
+def test_profile_callback_and_reset(template):
+    wb = in2xl.load_workbook(template(rows=20))
+    events = []
+
+    assert wb.stats is None
+
+    stats = wb.profile(callback=lambda kind, name, value: events.append((kind, name)))
+    wb['Data'].insert('text', 1, 1)
+    wb.close()
+
+    assert ('counter', 'cells_written') in events
+    assert ('phase', 'insert') in events
+    assert stats.as_dict()['counters'] == stats.counters
+
+    stats.reset()
+    assert stats.as_dict() == {'timings': {}, 'calls': {}, 'counters': {}}
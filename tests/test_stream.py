@@ -0,0 +1,77 @@
+# test_stream.py
+import io
+import zipfile
+import numpy as np
+import pandas as pd
+import pytest
+from lxml import etree
+import in2xl
+
+XMAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+def frame(rows=60):
+    df = pd.DataFrame({'number': np.arange(rows) * 1.5, 'text': [f'text {i % 7}' for i in range(rows)],
+                       'date': pd.date_range('2024-01-01', periods=rows, freq='D'), 'flag': np.arange(rows) % 2 == 0})
+    df.loc[::5, 'number'] = np.nan
+    df.loc[::6, 'text'] = None
+    return df
+
+
+def cells(output):
+
+    """
+    Returns the cells of all worksheets with their type, style and value, shared strings are resolved.
+
+    """
+
+    with zipfile.ZipFile(output) as myzip:
+        strings = [''.join(si.itertext()) for si in etree.fromstring(myzip.read('xl/sharedStrings.xml'))]
+        result = {}
+
+        for name in ('xl/worksheets/sheet1.xml', 'xl/worksheets/sheet2.xml'):
+            for c in etree.fromstring(myzip.read(name)).iter(f'{XMAIN}c'):
+                t, v = c.get('t', 'n'), c.findtext(f'{XMAIN}v')
+                if t == 's':
+                    t, v = 'str', strings[int(v)]
+                elif t == 'inlineStr':
+                    t, v = 'str', ''.join(c.find(f'{XMAIN}is').itertext())
+                if v is not None:
+                    result[(name, c.get('r'))] = (t, c.get('s'), v)
+
+    return result
+
+
+def edit(wb):
+    ws = wb['Data']
+    ws.insert(frame(), 3, 2)
+    ws.insert(frame(20), 1, 12, axis=1, index=True)
+    ws.insert('scalar', 2, 1)
+    ws.insert(42, 200, 3)
+    ws.insert(frame(10), 70, 2, strings='inline')
+    ws.clear('C10:D20')
+    wb['Other'].insert(frame(5), 2, 2, header=False)
+    wb.insert_many([('Data', 'A150', frame(5)), ('Other', (1, 1), 'title')])
+
+
+@pytest.mark.parametrize('session', [False, True])
+def test_stream_output_equals_memory(template, session):
+    path = template(rows=100, charts=True, formulas=True, calc_chain=True)
+    outputs = []
+
+    for stream in (False, True):
+        wb = in2xl.load_workbook(path, stream=stream)
+        if session:
+            with wb.edit() as s:
+                edit(s)
+        else:
+            edit(wb)
+        outputs.append(wb.save(io.BytesIO()))
+        wb.close()
+
+    memory, streamed = map(cells, outputs)
+
+    assert memory == streamed
+    assert memory[('xl/worksheets/sheet1.xml', 'A1')] == ('str', None, 'label 1')
+    assert memory[('xl/worksheets/sheet1.xml', 'A2')] == ('str', None, 'scalar')
+    assert ('xl/worksheets/sheet1.xml', 'C10') not in memory
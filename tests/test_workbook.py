@@ -0,0 +1,211 @@
+# test_workbook.py
+import io
+import os
+import zipfile
+import pandas as pd
+import pytest
+import in2xl
+
+
+def reopen(wb):
+    output = wb.save(io.BytesIO())
+    wb.close()
+    return in2xl.load_workbook(output.getvalue())
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_insert_many(template, stream):
+    wb = in2xl.load_workbook(template(rows=20), stream=stream)
+    df = pd.DataFrame({'a': [1.5, 2.5], 'b': ['x', 'y']})
+
+    wb.insert_many([('Other', 'B2', 'title'), ('Data', (30, 2), df), ('Data', 'A1', 'first'), ('Data', 'E30', df, {'header': False})])
+    wb = reopen(wb)
+
+    assert wb['Other'].read('B2:B2', header=False).iloc[0, 0] == 'title'
+    assert wb['Data'].read('A1:A1', header=False).iloc[0, 0] == 'first'
+    assert wb['Data'].read('B30:C32').to_dict('list') == {'a': [1.5, 2.5], 'b': ['x', 'y']}
+    assert wb['Data'].read('E30:F31', header=False).values.tolist() == [[1.5, 'x'], [2.5, 'y']]
+    wb.close()
+
+
+def test_insert_many_discards_failed_plan(template):
+    wb = in2xl.load_workbook(template(rows=20))
+
+    with pytest.raises(KeyError):
+        wb.insert_many([('Data', 'A1', 'first'), ('Missing', 'A1', 'x')])
+    with pytest.raises(ValueError):
+        wb.insert_many([('Data', 'A1', 'first'), ('Data', 'A2', 'x', {'strings': 'unknown'})])
+
+    assert wb['Data'].read('A1:A2', header=False).values.tolist() == [['label 1'], ['label 2']]
+    wb.close()
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_insert_many_failed_plan_in_session(template, stream):
+    wb = in2xl.load_workbook(template(rows=20), stream=stream)
+
+    with wb.edit() as session:
+        session['Data'].insert('outer', 1, 1)
+        session['Data'].insert(7.5, 3, 2)
+
+        with pytest.raises(ValueError):
+            session.insert_many([('Data', 'A2', 'inner'), ('Data', 'B3', 1.5), ('Data', 'A4', 'bad\x01')])
+
+        # only the plan is discarded, the session and its modifications are kept
+        assert wb.package.session
+        session['Data'].insert('after', 5, 1)
+
+    wb = reopen(wb)
+
+    assert wb['Data'].read('A1:A5', header=False).iloc[:, 0].tolist() == ['outer', 'label 2', 'label 3', 'label 4', 'after']
+    assert wb['Data'].read('B3:B3', header=False).iloc[0, 0] == 7.5
+    wb.close()
+
+
+_TABLE = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<table xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" id="1" name="Sales" displayName="Sales" ref="B1:C6">'
+    '<autoFilter ref="B1:C6"/><tableColumns count="2"><tableColumn id="1" name="first"/><tableColumn id="2" name="second"/></tableColumns>'
+    '<tableStyleInfo name="TableStyleMedium2" showFirstColumn="0" showLastColumn="0" showRowStripes="1" showColumnStripes="0"/></table>'
+)
+
+_TABLE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/table" Target="../tables/table1.xml"/>'
+    '</Relationships>'
+)
+
+_TABLE_TYPE = '<Override PartName="/xl/tables/table1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.table+xml"/>'
+
+
+def with_table(path):
+
+    """
+    Adds the table 'Sales' (B1:C6) to 'Data' of a template.
+
+    """
+
+    source = f'{path}.source'
+    os.replace(path, source)
+
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            content = src.read(info)
+            if info.filename == '[Content_Types].xml':
+                content = content.replace(b'</Types>', _TABLE_TYPE.encode() + b'</Types>')
+            elif info.filename == 'xl/worksheets/sheet1.xml':
+                content = content.replace(b'</worksheet>', b'<tableParts count="1"><tablePart r:id="rId1"/></tableParts></worksheet>')
+            dst.writestr(info, content)
+
+        dst.writestr('xl/worksheets/_rels/sheet1.xml.rels', _TABLE_RELS)
+        dst.writestr('xl/tables/table1.xml', _TABLE)
+
+    return path
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_replace_table(template, stream):
+    wb = in2xl.load_workbook(with_table(template(rows=20)), stream=stream)
+    df = pd.DataFrame([['a', 1.5, 1], ['b', 2.5, 2], ['c', 3.5, 3]], columns=['label', 'value', None])
+
+    wb['Data'].replace_table('Sales', df)
+    output = wb.save(io.BytesIO())
+    wb.close()
+
+    with zipfile.ZipFile(output) as myzip:
+        table = myzip.read('xl/tables/table1.xml').decode()
+
+    assert 'ref="B1:D4"' in table
+    assert '<autoFilter ref="B1:D4"/>' in table
+    assert [f'name="{i}"' in table for i in ('label', 'value', 'Column3')] == [True] * 3
+
+    wb = in2xl.load_workbook(output.getvalue())
+    # the rows of the old body below the new one are cleared, the cells beside the table are kept
+    values = wb['Data'].read('B1:E7')
+    wb.close()
+
+    assert values.columns.tolist() == ['label', 'value', 'Column3', 5.5]
+    assert values.iloc[:3, :3].values.tolist() == [['a', 1.5, 1], ['b', 2.5, 2], ['c', 3.5, 3]]
+    assert values.iloc[3:5, :2].isna().all().all()
+    assert values.iloc[3:, 2].tolist() == [20.5, 24.5, 28.5]
+    assert values.iloc[5, :2].tolist() == [14.5, 21.5]
+    assert values.iloc[:, 3].tolist() == [10.5, 15.5, 20.5, 25.5, 30.5, 35.5]
+
+
+def test_replace_table_missing(template):
+    wb = in2xl.load_workbook(with_table(template(rows=20)))
+
+    with pytest.raises(KeyError):
+        wb['Data'].replace_table('Missing', pd.DataFrame({'a': [1]}))
+    with pytest.raises(ValueError):
+        wb['Data'].replace_table('Sales', [1, 2])
+
+    wb.close()
+
+
+@pytest.mark.parametrize('stream', [False, True])
+@pytest.mark.parametrize('keep_styles', [True, False])
+def test_clear(template, stream, keep_styles):
+    wb = in2xl.load_workbook(template(rows=30, formulas=True, calc_chain=True), stream=stream)
+    wb['Data'].clear('B4:J10', keep_styles=keep_styles)
+    output = wb.save(io.BytesIO())
+    wb.close()
+
+    with zipfile.ZipFile(output) as myzip:
+        chain = myzip.read('xl/calcChain.xml').decode()
+
+    # the formulas of the cleared range are removed from the calcChain
+    assert 'r="J5"' not in chain and 'r="J10"' not in chain and 'r="J15"' in chain
+
+    wb = in2xl.load_workbook(output.getvalue())
+    values = wb['Data'].read('A3:J11', header=False)
+    wb.close()
+
+    assert values.iloc[1:8, 1:].isna().all().all()
+    assert values.iloc[1:8, 0].tolist() == [f'label {r % 10}' for r in range(4, 11)]
+    assert values.iloc[0, 1:9].notna().all() and values.iloc[8, 1:9].notna().all()
+
+
+def test_clear_invalid_range(template):
+    wb = in2xl.load_workbook(template(rows=10))
+    with pytest.raises(ValueError):
+        wb['Data'].clear('B4:7Q')
+    wb.close()
+
+
+def test_read(template):
+    wb = in2xl.load_workbook(template(rows=20))
+    ws = wb['Data']
+
+    df = pd.DataFrame({'number': [1.5, None, 3.5], 'whole': [1, 2, 3], 'text': ['a', None, 'c'],
+                       'date': pd.to_datetime(['2024-01-01', None, '2024-03-01']), 'flag': [True, False, True]})
+    ws.insert(df, 30, 2)
+
+    values = ws.read('B30:F33')
+    wb.close()
+
+    assert values.columns.tolist() == ['number', 'whole', 'text', 'date', 'flag']
+    assert values['number'].tolist()[::2] == [1.5, 3.5] and pd.isna(values['number'][1])
+    assert values['whole'].dtype.kind == 'i' and values['whole'].tolist() == [1, 2, 3]
+    assert values['text'][0] == 'a' and pd.isna(values['text'][1])
+    assert values['flag'].tolist() == [True, False, True]
+
+
+def test_read_used_range(template):
+    wb = in2xl.load_workbook(template(rows=20, columns=4))
+    values = wb['Data'].read(header=False)
+
+    assert values.shape == (20, 4)
+    assert values.iloc[0].tolist() == ['label 1', 2.5, 3.5, 1]
+
+    # a worksheet which is parsed for inserts is read from its tree, a streamed one with its pending cells
+    with wb.edit() as session:
+        session['Data'].insert('changed', 1, 1)
+        assert session['Data'].read('A1:A1', header=False).iloc[0, 0] == 'changed'
+    wb.close()
+
+    wb = in2xl.load_workbook(template(name='streamed', rows=20, columns=4), stream=True)
+    wb['Data'].insert('changed', 1, 1)
+    assert wb['Data'].read('A1:B1', header=False).iloc[0].tolist() == ['changed', 2.5]
+    wb.close()